@@ -0,0 +1,376 @@
+import argparse
+import codecs
+import json
+import os
+import re
+import sys
+import tarfile
+from array import array
+
+import numpy as np
+
+# -------------------------------
+# Streaming guidellm reports
+# -------------------------------
+
+# Keys whose values are parsed: a benchmark's strategy (which starts a new
+# benchmark) and its per-request arrays. Everything else, including other
+# arrays and the large prompt/output strings, is skipped without decoding.
+_KEYS = re.compile(r'"(strategy|successful|errored|incomplete)"\s*:\s*([\[{])')
+_SKIP = re.compile(r"[\s,]*")
+_DECODER = json.JSONDecoder()
+_CHUNK = 1 << 20
+
+
+class _Stream:
+    """Text buffer over a binary file that grows on demand and forgets what has been consumed."""
+
+    def __init__(self, f):
+        self.f = f
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.eof = False
+
+    def more(self) -> bool:
+        data = self.f.read(_CHUNK)
+        self.eof = not data
+        self.buf += self.decoder.decode(data, final=self.eof)
+        return not self.eof
+
+    def drop(self, pos: int):
+        self.buf = self.buf[pos:]
+
+    def decode(self, pos: int):
+        """(value, end) for the JSON value starting at pos, reading more as needed."""
+        while True:
+            try:
+                return _DECODER.raw_decode(self.buf, pos)
+            except json.JSONDecodeError as e:
+                if not self.more():
+                    raise ValueError(f"malformed or truncated report ({e.msg})") from None
+
+
+def iter_report_records(f):
+    """Yield (benchmark number, strategy, status, record) from a guidellm report file object.
+
+    status is successful, errored or incomplete. Only one request record is
+    held in memory at a time.
+    """
+    stream = _Stream(f)
+    benchmark, strategy = -1, None
+    stream.more()
+    while True:
+        m = _KEYS.search(stream.buf)
+        if not m:
+            # keep a tail that may hold the start of a key cut by the chunk boundary
+            stream.drop(max(len(stream.buf) - 64, 0))
+            if not stream.more():
+                return
+            continue
+        key, opener = m.groups()
+        pos = m.end() - 1
+        if opener == "{":
+            value, end = stream.decode(pos)
+            if key == "strategy":
+                benchmark, strategy = benchmark + 1, value
+            stream.drop(end)
+            continue
+
+        pos += 1
+        while True:
+            pos = _SKIP.match(stream.buf, pos).end()
+            while pos >= len(stream.buf):
+                if not stream.more():
+                    raise ValueError("report ends inside a request array")
+                pos = _SKIP.match(stream.buf, pos).end()
+            if stream.buf[pos] == "]":
+                stream.drop(pos + 1)
+                break
+            record, pos = stream.decode(pos)
+            stream.drop(pos)
+            pos = 0
+            if isinstance(record, dict):
+                yield max(benchmark, 0), strategy, key, record
+
+
+# -------------------------------
+# Statistics
+# -------------------------------
+
+PERCENTILES = [50, 90, 95, 99]
+LATENCIES = ["ttft", "itl", "e2e"]
+
+
+class TierColumns:
+    """Per-request values of one benchmark, kept as columns of doubles."""
+
+    def __init__(self, strategy=None):
+        self.strategy = strategy
+        self.counts = {"successful": 0, "errored": 0, "incomplete": 0}
+        self.columns = {name: array("d") for name in ["ttft", "itl", "e2e", "start", "end", "prompt", "output"]}
+
+    def add(self, status: str, record: dict):
+        self.counts[status] += 1
+        if status != "successful":
+            return
+        start, end = record["start_time"], record["end_time"]
+        first, last = record.get("first_token_time"), record.get("last_token_time")
+        output = record.get("output_tokens") or 0
+        ttft = record.get("time_to_first_token_ms")
+        if ttft is None and first is not None:
+            ttft = (first - start) * 1000
+        itl = record.get("inter_token_latency_ms")
+        if itl is None and first is not None and last is not None and output > 1:
+            itl = (last - first) * 1000 / (output - 1)
+        e2e = record.get("request_latency", end - start)
+        c = self.columns
+        c["ttft"].append(np.nan if ttft is None else ttft)
+        c["itl"].append(np.nan if itl is None else itl)
+        c["e2e"].append(e2e * 1000)
+        c["start"].append(start)
+        c["end"].append(end)
+        c["prompt"].append(record.get("prompt_tokens") or 0)
+        c["output"].append(output)
+
+    def summary(self) -> dict:
+        """Percentiles (ms) of TTFT, ITL and E2E over successful requests, plus throughput."""
+        c = {name: np.frombuffer(col) for name, col in self.columns.items()}
+        summary = {"requests": self.counts["successful"], "errored": self.counts["errored"],
+                   "incomplete": self.counts["incomplete"]}
+        if not len(c["start"]):
+            return summary
+        duration = float(c["end"].max() - c["start"].min())
+        for name in LATENCIES:
+            values = c[name][~np.isnan(c[name])]
+            if len(values):
+                for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+                    summary[f"{name}_p{p}"] = float(v)
+                summary[f"{name}_mean"] = float(values.mean())
+        if duration > 0:
+            summary["duration"] = duration
+            summary["request_rate"] = len(c["start"]) / duration
+            summary["output_tps"] = float(c["output"].sum()) / duration
+            summary["total_tps"] = float(c["prompt"].sum() + c["output"].sum()) / duration
+        return summary
+
+
+def tier_label(member: str, benchmark: int, count: int, strategy) -> str:
+    """Tier name: the rate in '<scenario>-<rate>.json', else the strategy's streams/rate."""
+    m = re.search(r"-(\d+(?:\.\d+)?)\.json$", member)
+    if m:
+        label = m.group(1)
+    elif isinstance(strategy, dict) and (strategy.get("streams") or strategy.get("rate")):
+        label = f"{strategy.get('streams') or strategy.get('rate'):g}"
+    else:
+        label = os.path.splitext(os.path.basename(member))[0]
+    return label if count == 1 else f"{label}#{benchmark}"
+
+
+def analyze_file(f, member: str, tiers: dict):
+    """Add every benchmark in one report to tiers, keyed by tier label."""
+    benchmarks = {}
+    for benchmark, strategy, status, record in iter_report_records(f):
+        if benchmark not in benchmarks:
+            benchmarks[benchmark] = TierColumns(strategy)
+        benchmarks[benchmark].add(status, record)
+    for benchmark, columns in benchmarks.items():
+        tiers[tier_label(member, benchmark, len(benchmarks), columns.strategy)] = columns.summary()
+
+
+def analyze(path: str) -> dict:
+    """{tier: summary} for a tar archive of guidellm reports (any compression) or a single report."""
+    tiers = {}
+    if path.endswith(".json"):
+        with open(path, "rb") as f:
+            analyze_file(f, path, tiers)
+    else:
+        # stream mode reads members in order without seeking or extracting
+        with tarfile.open(path, "r|*") as tar:
+            for member in tar:
+                if member.isfile() and member.name.endswith(".json"):
+                    analyze_file(tar.extractfile(member), member.name, tiers)
+    return dict(sorted(tiers.items(), key=lambda kv: _tier_key(kv[0])))
+
+
+def _tier_key(label: str):
+    try:
+        return (0, float(label.split("#")[0]), label)
+    except ValueError:
+        return (1, 0.0, label)
+
+
+# -------------------------------
+# Comparison
+# -------------------------------
+
+# Metrics compared between scenarios; True when higher is better
+COMPARED = {f"{name}_p{p}": False for name in LATENCIES for p in PERCENTILES}
+COMPARED.update(request_rate=True, output_tps=True, total_tps=True)
+
+
+def compare(baseline: dict, candidate: dict, thresholds: dict, default: float) -> list:
+    """One entry per tier and metric present in both scenarios, flagged when worse than its threshold."""
+    rows = []
+    for tier in baseline:
+        if tier not in candidate:
+            continue
+        for metric, higher_is_better in COMPARED.items():
+            base, cand = baseline[tier].get(metric), candidate[tier].get(metric)
+            if base is None or cand is None:
+                continue
+            change = (cand - base) / base * 100 if base else 0.0
+            worse = -change if higher_is_better else change
+            threshold = thresholds.get(metric, default)
+            rows.append({
+                "tier": tier, "metric": metric, "baseline": base, "candidate": cand,
+                "change_pct": change, "threshold_pct": threshold, "regressed": worse > threshold,
+            })
+    return rows
+
+
+def scenario_name(path: str) -> str:
+    name = os.path.basename(path)
+    for suffix in (".tar.gz", ".tar.zst", ".tar.xz", ".tar.bz2", ".tgz", ".tar", ".json"):
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    return name
+
+
+def print_scenarios(results: dict):
+    for name, tiers in results.items():
+        print(f"\n==== {name}")
+        print(
+            f"{'tier':>8} {'reqs':>6} {'err':>4} {'req/s':>7} {'out tok/s':>9} "
+            f"{'TTFT p50':>9} {'TTFT p99':>9} {'ITL p50':>8} {'ITL p99':>8} {'E2E p50':>9} {'E2E p99':>9}"
+        )
+        for tier, s in tiers.items():
+            def ms(key, width):
+                return f"{s[key]:>{width - 2}.0f}ms" if key in s else f"{'-':>{width}}"
+
+            rate = f"{s['request_rate']:>7.2f}" if "request_rate" in s else f"{'-':>7}"
+            tps = f"{s['output_tps']:>9.0f}" if "output_tps" in s else f"{'-':>9}"
+            print(
+                f"{tier:>8} {s['requests']:>6} {s['errored'] + s['incomplete']:>4} {rate} {tps} "
+                f"{ms('ttft_p50', 9)} {ms('ttft_p99', 9)} {ms('itl_p50', 8)} {ms('itl_p99', 8)} "
+                f"{ms('e2e_p50', 9)} {ms('e2e_p99', 9)}"
+            )
+
+
+def print_comparison(baseline: str, candidate: str, rows: list, verbose: bool):
+    shown = [r for r in rows if verbose or r["regressed"] or r["metric"] in
+             ("ttft_p50", "ttft_p99", "itl_p50", "e2e_p99", "output_tps")]
+    print(f"\n==== {candidate} vs {baseline}")
+    print(f"{'tier':>8} {'metric':<12} {'baseline':>12} {'candidate':>12} {'change':>8}")
+    for r in shown:
+        flag = f"  REGRESSION (> {r['threshold_pct']:g}%)" if r["regressed"] else ""
+        print(
+            f"{r['tier']:>8} {r['metric']:<12} {r['baseline']:>12.2f} {r['candidate']:>12.2f} "
+            f"{r['change_pct']:>+7.1f}%{flag}"
+        )
+
+
+# -------------------------------
+# Main
+# -------------------------------
+
+
+def parse_thresholds(value: str) -> dict:
+    thresholds = {}
+    try:
+        for item in value.split(","):
+            metric, _, pct = item.partition("=")
+            thresholds[metric.strip()] = float(pct)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected metric=percent,... got '{value}'")
+    unknown = set(thresholds) - set(COMPARED)
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown metrics {', '.join(sorted(unknown))} (choose from {', '.join(COMPARED)})"
+        )
+    return thresholds
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(
+        description="Summarize guidellm result archives per tier and compare scenarios, "
+        "streaming the reports without extracting them"
+    )
+    p.add_argument(
+        "archives",
+        nargs="+",
+        help="Archives written by bench-all.sh (<scenario>.tar, any tar compression) or single report .json files.",
+    )
+    p.add_argument(
+        "--baseline",
+        type=str,
+        default=None,
+        help="Scenario the others are compared against (archive name without .tar). Defaults to the first archive.",
+    )
+    p.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="Percent change in the worse direction that counts as a regression. Defaults to 10.",
+    )
+    p.add_argument(
+        "--metric-thresholds",
+        type=parse_thresholds,
+        default={},
+        help="Per-metric overrides of --threshold, e.g. 'ttft_p99=20,output_tps=5'.",
+    )
+    p.add_argument("--output-json", type=str, default=None, help="Write summaries and comparisons as JSON.")
+    p.add_argument("--all-metrics", action="store_true", help="Show every compared metric, not just the headline ones.")
+    p.add_argument(
+        "--fail-on-regression",
+        action="store_true",
+        help="Exit with status 1 when any metric regresses beyond its threshold.",
+    )
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = {}
+    for path in args.archives:
+        name = scenario_name(path)
+        if name in results:
+            sys.exit(f"Two archives are named {name}; rename one")
+        try:
+            results[name] = analyze(path)
+        except (ValueError, tarfile.TarError) as e:
+            sys.exit(f"{path}: {e}")
+    print_scenarios(results)
+
+    baseline = args.baseline or next(iter(results))
+    if baseline not in results:
+        sys.exit(f"--baseline {baseline} is not one of: {', '.join(results)}")
+    comparisons = {}
+    for name in results:
+        if name != baseline:
+            comparisons[name] = compare(results[baseline], results[name], args.metric_thresholds, args.threshold)
+            print_comparison(baseline, name, comparisons[name], args.all_metrics)
+    regressions = sum(r["regressed"] for rows in comparisons.values() for r in rows)
+    if comparisons:
+        print(f"\n{regressions} regression(s) beyond threshold.")
+
+    if args.output_json:
+        with open(args.output_json, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "baseline": baseline,
+                    "threshold_pct": args.threshold,
+                    "metric_thresholds_pct": args.metric_thresholds,
+                    "scenarios": results,
+                    "comparisons": comparisons,
+                    "regressions": regressions,
+                },
+                f,
+                indent=2,
+            )
+            f.write("\n")
+    if args.fail_on_regression and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,619 @@
+import argparse
+import asyncio
+import gzip
+import io
+import json
+import os
+import signal
+import ssl
+import sys
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+# -------------------------------
+# Metrics
+# -------------------------------
+
+# column -> (exposition names, aggregation over label sets and engines).
+# Names are aliases across vLLM versions; the first one a scrape contains wins.
+COLUMNS = {
+    "running": (["vllm:num_requests_running"], "sum"),
+    "waiting": (["vllm:num_requests_waiting"], "sum"),
+    "kv_cache_usage": (["vllm:kv_cache_usage_perc", "vllm:gpu_cache_usage_perc"], "max"),
+    "preemptions": (["vllm:num_preemptions_total"], "sum"),
+    "prompt_tokens": (["vllm:prompt_tokens_total"], "sum"),
+    "generation_tokens": (["vllm:generation_tokens_total"], "sum"),
+    "prefix_cache_queries": (["vllm:prefix_cache_queries_total"], "sum"),
+    "prefix_cache_hits": (["vllm:prefix_cache_hits_total"], "sum"),
+    "ttft_sum": (["vllm:time_to_first_token_seconds_sum"], "sum"),
+    "ttft_count": (["vllm:time_to_first_token_seconds_count"], "sum"),
+    "itl_sum": (["vllm:inter_token_latency_seconds_sum", "vllm:time_per_output_token_seconds_sum"], "sum"),
+    "itl_count": (["vllm:inter_token_latency_seconds_count", "vllm:time_per_output_token_seconds_count"], "sum"),
+    "queue_time_sum": (["vllm:request_queue_time_seconds_sum"], "sum"),
+    "queue_time_count": (["vllm:request_queue_time_seconds_count"], "sum"),
+    "epp_queue_size": (["inference_pool_average_queue_size"], "max"),
+    "epp_kv_cache_usage": (["inference_pool_average_kv_cache_utilization"], "max"),
+    "epp_ready_pods": (["inference_pool_ready_pods"], "max"),
+}
+
+
+class ExpositionParser:
+    """Incremental Prometheus text parser that keeps only the wanted metric names.
+
+    Bytes are fed as they arrive. Lines of unwanted metrics (histogram
+    buckets, most of a vLLM scrape) are dropped after a dictionary lookup on
+    the name, without parsing labels or values.
+    """
+
+    def __init__(self, columns: dict):
+        self.names = {}
+        self.reduce = []
+        for i, (aliases, how) in enumerate(columns.values()):
+            for name in aliases:
+                self.names[name.encode()] = i
+            self.reduce.append(how == "max")
+        self.reset()
+
+    def reset(self):
+        self.values = np.full(len(self.reduce), np.nan)
+        self.source = [None] * len(self.reduce)
+        self.rest = b""
+
+    def feed(self, data: bytes):
+        lines = (self.rest + data).split(b"\n")
+        self.rest = lines.pop()
+        for line in lines:
+            self._line(line)
+
+    def close(self) -> np.ndarray:
+        """Values of this scrape (NaN where a metric was absent); resets for the next one."""
+        if self.rest:
+            self._line(self.rest)
+        values = self.values
+        self.reset()
+        return values
+
+    def _line(self, line: bytes):
+        if not line or line[0] == 35:  # '#'
+            return
+        brace = line.find(b"{")
+        if brace >= 0:
+            name, tail = line[:brace], line[line.rfind(b"}") + 1 :]
+        else:
+            name, _, tail = line.partition(b" ")
+        i = self.names.get(name.strip())
+        if i is None:
+            return
+        if self.source[i] is None:
+            self.source[i] = name
+        elif self.source[i] != name:
+            return
+        try:
+            value = float(tail.split()[0])
+        except (IndexError, ValueError):
+            return
+        current = self.values[i]
+        if current != current:  # NaN: first sample of this column
+            self.values[i] = value
+        elif self.reduce[i]:
+            self.values[i] = max(current, value)
+        else:
+            self.values[i] = current + value
+
+
+# -------------------------------
+# Scraping
+# -------------------------------
+
+
+class Target:
+    """One /metrics endpoint scraped over a single keep-alive HTTP/1.1 connection."""
+
+    def __init__(self, url: str, insecure: bool, token: str, timeout: float):
+        if "://" not in url:
+            url = "http://" + url
+        parts = urlsplit(url)
+        self.url = url
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.path = (parts.path if parts.path not in ("", "/") else "/metrics") + (
+            f"?{parts.query}" if parts.query else ""
+        )
+        self.ssl = None
+        if parts.scheme == "https":
+            self.ssl = ssl.create_default_context()
+            if insecure:
+                self.ssl.check_hostname = False
+                self.ssl.verify_mode = ssl.CERT_NONE
+        auth = f"Authorization: Bearer {token}\r\n" if token else ""
+        self.request = (
+            f"GET {self.path} HTTP/1.1\r\nHost: {parts.netloc}\r\nAccept: text/plain\r\n"
+            f"Accept-Encoding: identity\r\n{auth}\r\n"
+        ).encode()
+        self.timeout = timeout
+        self.reader = self.writer = None
+        self.errors = 0
+
+    async def scrape(self, parser: ExpositionParser) -> np.ndarray:
+        try:
+            return await asyncio.wait_for(self._scrape(parser), self.timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            self.errors += 1
+            if self.errors == 1 or self.errors % 100 == 0:
+                print(f"{self.url}: scrape failed ({e!r}), {self.errors} failure(s) so far", file=sys.stderr)
+            self.close()
+            parser.reset()
+            return parser.values
+
+    async def _scrape(self, parser: ExpositionParser) -> np.ndarray:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+        self.writer.write(self.request)
+        await self.writer.drain()
+        status = await self.reader.readline()
+        if not status:
+            raise ConnectionResetError("connection closed")
+        code = int(status.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip().lower()
+        if headers.get("transfer-encoding") == "chunked":
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                parser.feed(await self.reader.readexactly(size))
+                await self.reader.readline()
+        elif "content-length" in headers:
+            remaining = int(headers["content-length"])
+            while remaining:
+                data = await self.reader.read(min(remaining, 1 << 16))
+                if not data:
+                    raise asyncio.IncompleteReadError(b"", remaining)
+                parser.feed(data)
+                remaining -= len(data)
+        else:
+            while data := await self.reader.read(1 << 16):
+                parser.feed(data)
+            headers["connection"] = "close"
+        if headers.get("connection") == "close":
+            self.close()
+        if code != 200:
+            raise ValueError(f"HTTP {code}")
+        return parser.close()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class RecordedTarget:
+    """Replays recorded exposition text: one file every scrape, or a directory's files in name order."""
+
+    def __init__(self, path: str):
+        self.url = path
+        if os.path.isdir(path):
+            self.files = sorted(os.path.join(path, f) for f in os.listdir(path))
+        else:
+            self.files = [path]
+        self.next = 0
+        self.errors = 0
+
+    async def scrape(self, parser: ExpositionParser) -> np.ndarray:
+        path = self.files[min(self.next, len(self.files) - 1)]
+        self.next += 1
+        with open(path, "rb") as f:
+            while data := f.read(1 << 16):
+                parser.feed(data)
+        return parser.close()
+
+    def close(self):
+        pass
+
+
+def make_target(spec: str, args):
+    if spec.startswith("file://"):
+        return RecordedTarget(spec[len("file://") :])
+    if "://" not in spec and os.path.exists(spec):
+        return RecordedTarget(spec)
+    return Target(spec, args.insecure, args.token, args.timeout)
+
+
+# -------------------------------
+# Storage
+# -------------------------------
+
+
+def open_output(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "wt", encoding="utf-8")
+    if path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            sys.exit(f"Writing {path} requires the 'zstandard' package (pip install zstandard)")
+        return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(open(path, "wb")), encoding="utf-8")
+    return open(path, "w", encoding="utf-8")
+
+
+def open_input(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            sys.exit(f"Reading {path} requires the 'zstandard' package (pip install zstandard)")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb")), encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+class SampleRing:
+    """Fixed-size columnar buffer of samples, written out as one JSON line per full ring.
+
+    Memory stays constant however long the sampler runs. Each block holds
+    the sample times, the tier labels run-length encoded, and one list per
+    (target, column) series.
+    """
+
+    def __init__(self, out, capacity: int, width: int):
+        self.out = out
+        self.times = np.empty(capacity)
+        self.values = np.empty((capacity, width))
+        self.tiers = []
+        self.n = 0
+
+    def append(self, t: float, tier, row: np.ndarray):
+        self.times[self.n] = t
+        self.values[self.n] = row
+        if self.tiers and self.tiers[-1][0] == tier:
+            self.tiers[-1][1] += 1
+        else:
+            self.tiers.append([tier, 1])
+        self.n += 1
+        if self.n == len(self.times):
+            self.flush()
+
+    def flush(self):
+        if not self.n:
+            return
+        values = np.round(self.values[: self.n].T, 6)
+        block = {
+            "time": np.round(self.times[: self.n], 3).tolist(),
+            "tier": self.tiers,
+            "values": [[None if v != v else v for v in series] for series in values.tolist()],
+        }
+        self.out.write(json.dumps(block, separators=(",", ":")) + "\n")
+        self.out.flush()
+        self.tiers = []
+        self.n = 0
+
+
+class TierFile:
+    """Current tier label, re-read whenever the file's mtime changes. Empty means between tiers."""
+
+    def __init__(self, path: str, default=None):
+        self.path = path
+        self.tier = default
+        self.mtime = None
+
+    def current(self):
+        if self.path is None:
+            return self.tier
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            self.mtime, self.tier = None, None
+            return None
+        if mtime != self.mtime:
+            self.mtime = mtime
+            with open(self.path, encoding="utf-8") as f:
+                self.tier = f.read().strip() or None
+        return self.tier
+
+
+async def sample(args) -> str:
+    targets = [make_target(spec, args) for spec in args.targets]
+    columns = dict(COLUMNS)
+    for name in args.metric:
+        columns[name] = ([name], "sum")
+    parsers = [ExpositionParser(columns) for _ in targets]
+    tiers = TierFile(args.tier_file, args.tier)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    header = {
+        "version": 1,
+        "interval": args.interval,
+        "targets": [t.url for t in targets],
+        "columns": list(columns),
+    }
+    scrape_seconds = 0.0
+    count = 0
+    with open_output(args.output) as out:
+        out.write(json.dumps(header) + "\n")
+        ring = SampleRing(out, args.ring_size, len(targets) * len(columns))
+        start = time.monotonic()
+        deadline = start + args.duration if args.duration else None
+        print(f"==== Sampling {len(targets)} target(s) every {args.interval}s into {args.output}")
+        while not stop.is_set() and (not args.count or count < args.count):
+            tick = time.monotonic()
+            if deadline and tick >= deadline:
+                break
+            now = time.time()
+            rows = await asyncio.gather(*(t.scrape(p) for t, p in zip(targets, parsers)))
+            scrape_seconds += time.monotonic() - tick
+            ring.append(now, tiers.current(), np.concatenate(rows))
+            count += 1
+            # stay on the start + k * interval grid, skipping ticks that a slow scrape overran
+            elapsed = time.monotonic() - start
+            wait = args.interval - elapsed % args.interval
+            try:
+                await asyncio.wait_for(stop.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+        ring.flush()
+    for t in targets:
+        t.close()
+    errors = sum(t.errors for t in targets)
+    mean_ms = scrape_seconds / max(count, 1) * 1000
+    print(f"==== {count} samples, {mean_ms:.1f} ms per scrape round, {errors} failed scrape(s)")
+    return args.output
+
+
+# -------------------------------
+# Diagnosis
+# -------------------------------
+
+
+def load_samples(path: str):
+    """(header, times, tier labels, values[target, column, sample]) from a sampler output."""
+    with open_input(path) as f:
+        header = json.loads(f.readline())
+        times, tiers, blocks = [], [], []
+        for line in f:
+            block = json.loads(line)
+            times.extend(block["time"])
+            for tier, n in block["tier"]:
+                tiers.extend([tier] * n)
+            blocks.append(np.array(block["values"], dtype=float))
+    width = len(header["columns"])
+    values = np.concatenate(blocks, axis=1) if blocks else np.empty((len(header["targets"]) * width, 0))
+    return header, np.array(times), np.array(tiers, dtype=object), values.reshape(len(header["targets"]), width, len(times))
+
+
+def counter_delta(series: np.ndarray) -> float:
+    """Increase of a counter over a window, summed over targets; NaN when no target reports it."""
+    total, seen = 0.0, False
+    for s in series:
+        s = s[~np.isnan(s)]
+        if len(s) >= 2:
+            total += max(s[-1] - s[0], 0.0)
+            seen = True
+    return total if seen else float("nan")
+
+
+def mean_ratio(values, column: dict, name: str) -> float:
+    total, count = counter_delta(values[:, column[f"{name}_sum"]]), counter_delta(values[:, column[f"{name}_count"]])
+    return total / count * 1000 if count > 0 else float("nan")
+
+
+def diagnose_tier(values: np.ndarray, column: dict, tier, args) -> dict:
+    """Window statistics and the performance-debugging playbook's verdict for one tier.
+
+    With no samples (the sampler stopped before its first scrape), every
+    statistic is NaN and the verdict is "no samples".
+    """
+
+    def mean(a):
+        return float(np.mean(a)) if len(a) else float("nan")
+
+    running = np.nansum(values[:, column["running"]], axis=0)
+    waiting = np.nansum(values[:, column["waiting"]], axis=0)
+    kv = np.fmax.reduce(values[:, column["kv_cache_usage"]], axis=0)
+    kv = kv[~np.isnan(kv)]
+    # vLLM reports usage as a fraction; the playbook reads it as a percentage
+    kv_p90 = float(np.percentile(kv, 90)) * 100 if len(kv) else float("nan")
+    queued = mean(waiting > 0)
+    stats = {
+        "samples": int(values.shape[2]),
+        "inflight_mean": mean(running + waiting),
+        "waiting_mean": mean(waiting),
+        "waiting_fraction": queued,
+        "kv_cache_p90_pct": kv_p90,
+        "ttft_mean_ms": mean_ratio(values, column, "ttft"),
+        "itl_mean_ms": mean_ratio(values, column, "itl"),
+        "queue_time_mean_ms": mean_ratio(values, column, "queue_time"),
+        "preemptions": counter_delta(values[:, column["preemptions"]]),
+    }
+
+    notes = []
+    if not stats["samples"]:
+        verdict = "no samples"
+        notes.append("no scrapes were recorded; check that the sampler ran during the benchmark")
+    elif not np.any(running + waiting):
+        verdict = "idle"
+    elif queued >= args.waiting_fraction and kv_p90 >= args.kv_full:
+        verdict = "memory-bound"
+        notes.append("KV cache is full and requests queue: add VRAM or replicas, or shorten sequences")
+    elif queued >= args.waiting_fraction:
+        verdict = "queue-bound"
+        notes.append("requests queue with KV cache headroom: batch slots (--max-num-seqs) limit admission; add replicas")
+    elif stats["ttft_mean_ms"] > args.high_ttft_ms:
+        verdict = "compute-bound prefill"
+        notes.append("TTFT is high with no queue: long prompts dominate; add replicas or use P/D disaggregation")
+    else:
+        verdict = "ok"
+    if stats["preemptions"] > 0:
+        notes.append(f"{stats['preemptions']:.0f} preemption(s): requests were evicted mid-generation")
+    try:
+        concurrency = float(tier)
+    except (TypeError, ValueError):
+        concurrency = None
+    if concurrency and verdict not in ("idle", "no samples") and stats["inflight_mean"] < args.upstream_fraction * concurrency:
+        notes.append(
+            f"running + waiting averages {stats['inflight_mean']:.1f} for concurrency {tier}: "
+            "the bottleneck is upstream of vLLM (gateway, EPP, network) or not every pod is scraped"
+        )
+    return {**stats, "verdict": verdict, "notes": notes}
+
+
+def diagnose(path: str, args) -> dict:
+    header, times, tiers, values = load_samples(path)
+    column = {name: i for i, name in enumerate(header["columns"])}
+    report = {}
+    labels = [t for t in dict.fromkeys(tiers.tolist()) if t is not None] or [None]
+    for tier in labels:
+        mask = tiers == tier if tier is not None else np.ones(len(times), bool)
+        report["all" if tier is None else tier] = diagnose_tier(values[:, :, mask], column, tier, args)
+    return report
+
+
+def print_diagnosis(report: dict):
+    def num(v, width, unit="", spec=".0f"):
+        return f"{v:>{width}{spec}}{unit}" if v == v else f"{'-':>{width + len(unit)}}"
+
+    print(
+        f"{'tier':>8} {'samples':>7} {'in-flight':>9} {'queued':>7} {'KV p90':>7} "
+        f"{'TTFT':>8} {'queue':>8} {'ITL':>7}  verdict"
+    )
+    for tier, d in report.items():
+        print(
+            f"{tier:>8} {d['samples']:>7} {num(d['inflight_mean'], 9, spec='.1f')} {num(d['waiting_fraction'], 7, spec='.0%')} "
+            f"{num(d['kv_cache_p90_pct'], 6, '%')} {num(d['ttft_mean_ms'], 6, 'ms')} "
+            f"{num(d['queue_time_mean_ms'], 6, 'ms')} {num(d['itl_mean_ms'], 5, 'ms')}  {d['verdict']}"
+        )
+        for note in d["notes"]:
+            print(f"{'':>10}- {note}")
+
+
+# -------------------------------
+# Main
+# -------------------------------
+
+
+def add_diagnosis_args(p):
+    p.add_argument(
+        "--waiting-fraction",
+        type=float,
+        default=0.2,
+        help="Share of samples with waiting requests that counts as queueing. Defaults to 0.2.",
+    )
+    p.add_argument(
+        "--kv-full",
+        type=float,
+        default=90.0,
+        help="KV cache usage percent (P90 over the tier) that counts as full. Defaults to 90.",
+    )
+    p.add_argument(
+        "--high-ttft-ms",
+        type=float,
+        default=1000.0,
+        help="Mean TTFT above which an unqueued tier is prefill compute-bound. Defaults to 1000.",
+    )
+    p.add_argument(
+        "--upstream-fraction",
+        type=float,
+        default=0.8,
+        help="Flag an upstream bottleneck when running + waiting averages below this share of a "
+        "numeric tier's concurrency. Defaults to 0.8.",
+    )
+    p.add_argument("--output-json", type=str, default=None, help="Write the per-tier diagnosis as JSON.")
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(
+        description="Sample vLLM / EPP Prometheus metrics at sub-second intervals during a benchmark, "
+        "tag samples with the active tier and diagnose each tier",
+        epilog="Use 'diagnose SAMPLES' to rerun the diagnosis on a saved time series.",
+    )
+    p.add_argument(
+        "targets",
+        nargs="+",
+        help="Metrics endpoints (http[s]://pod:8000/metrics; the path defaults to /metrics), or recorded "
+        "exposition text: a file replayed every scrape, or a directory of files replayed in name order.",
+    )
+    p.add_argument("--interval", type=float, default=0.25, help="Seconds between scrapes. Defaults to 0.25.")
+    p.add_argument("--duration", type=float, default=None, help="Stop after this many seconds. Defaults to SIGINT/SIGTERM.")
+    p.add_argument("--count", type=int, default=None, help="Stop after this many samples.")
+    p.add_argument(
+        "--tier-file",
+        type=str,
+        default=None,
+        help="File holding the active tier label (bench-all.sh writes it when TIER_FILE is set). "
+        "Re-read whenever it changes.",
+    )
+    p.add_argument("--tier", type=str, default=None, help="Fixed tier label when no --tier-file is given.")
+    p.add_argument(
+        "--metric",
+        action="append",
+        default=[],
+        help="Extra exposition metric name to record (summed over label sets). Repeatable.",
+    )
+    p.add_argument(
+        "--ring-size",
+        type=int,
+        default=1024,
+        help="Samples buffered in memory before a block is written. Defaults to 1024.",
+    )
+    p.add_argument("--timeout", type=float, default=2.0, help="Per-scrape timeout in seconds. Defaults to 2.")
+    p.add_argument("--token", type=str, default=os.environ.get("METRICS_TOKEN"), help="Bearer token (env METRICS_TOKEN).")
+    p.add_argument("--insecure", action="store_true", help="Skip TLS verification for https endpoints.")
+    p.add_argument(
+        "--output",
+        type=str,
+        default="metrics-samples.jsonl",
+        help="Time series output (.gz / .zst for compression). Defaults to metrics-samples.jsonl.",
+    )
+    p.add_argument("--no-diagnose", action="store_true", help="Only record; skip the diagnosis at exit.")
+    add_diagnosis_args(p)
+    args = p.parse_args(argv)
+    if args.interval <= 0 or args.ring_size <= 0:
+        p.error("--interval and --ring-size must be positive")
+    return args
+
+
+def parse_diagnose_args(argv):
+    p = argparse.ArgumentParser(
+        prog="metrics-sampler.py diagnose",
+        description="Apply the performance-debugging playbook to a recorded metrics time series, per tier",
+    )
+    p.add_argument("samples", help="Output of a previous sampler run.")
+    add_diagnosis_args(p)
+    return p.parse_args(argv)
+
+
+def report_diagnosis(path: str, args):
+    report = diagnose(path, args)
+    print_diagnosis(report)
+    if args.output_json:
+        with open(args.output_json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "diagnose":
+        args = parse_diagnose_args(argv[1:])
+        report_diagnosis(args.samples, args)
+        return
+    args = parse_args(argv)
+    path = asyncio.run(sample(args))
+    if not args.no_diagnose:
+        report_diagnosis(path, args)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
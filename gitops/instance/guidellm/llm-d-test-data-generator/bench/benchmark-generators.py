@@ -0,0 +1,265 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+# -------------------------------
+# Generators under test
+# -------------------------------
+
+
+def prefix_case(count: int, words: int, outdir: str):
+    """Command, output files and prompts written for count prefix pairs of about words words each."""
+    prefix_words = words * 4 // 5
+    pairs, prompts = os.path.join(outdir, "pairs.csv"), os.path.join(outdir, "prompts.csv")
+    cmd = [
+        os.path.join(ROOT, "prefix", "prefix-cache-generator.py"),
+        "--num-pairs", str(count),
+        "--target-prefix-words", str(prefix_words),
+        "--target-continuation-words", str(words - prefix_words),
+        "--output-prefix-csv", pairs,
+        "--output-guidellm-csv", prompts,
+    ]
+    return cmd, [pairs, prompts], 2 * count
+
+
+def heterogeneous_case(count: int, words: int, outdir: str):
+    """Command, output files and prompts written for count prompts whose long class has words words."""
+    output = os.path.join(outdir, "prompts.csv")
+    cmd = [
+        os.path.join(ROOT, "heterogeneous", "heterogeneous-workload-generator.py"),
+        "--total-prompts", str(count),
+        "--workload-m-words", str(words),
+        "--workload-n-words", str(max(words // 10, 50)),
+        "--output-csv", output,
+    ]
+    return cmd, [output], count
+
+
+GENERATORS = {"prefix": prefix_case, "heterogeneous": heterogeneous_case}
+
+# metric -> True when higher is better
+METRICS = {"prompts_per_second": True, "mb_per_second": True, "peak_rss_mb": False}
+
+
+# -------------------------------
+# Measurement
+# -------------------------------
+
+# The generators' --cache-dir defaults to $LLMD_DATAGEN_CACHE; with it set, every run after the first
+# would restore a hard link instead of generating, so the timed runs never see it.
+CHILD_ENV = {k: v for k, v in os.environ.items() if k != "LLMD_DATAGEN_CACHE"}
+
+
+def run_measured(cmd: list) -> tuple:
+    """(wall seconds, peak RSS in MB) of one child process; its output is discarded."""
+    with tempfile.TemporaryFile() as stderr:
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=stderr, env=CHILD_ENV)
+        # wait4 reports this run's peak (including the worker processes it reaped);
+        # RUSAGE_CHILDREN would be the peak over every run so far
+        _, status, usage = os.wait4(proc.pid, 0)
+        seconds = time.perf_counter() - start
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        if proc.returncode:
+            stderr.seek(0)
+            sys.exit(f"{' '.join(cmd)} failed with status {proc.returncode}:\n{stderr.read().decode(errors='replace')}")
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = usage.ru_maxrss / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+    return seconds, rss
+
+
+def measure_startup(generator: str, runs: int) -> float:
+    """Best-of-runs wall time of '--help', i.e. interpreter start, imports and argument parsing."""
+    with tempfile.TemporaryDirectory() as outdir:
+        cmd, _, _ = GENERATORS[generator](1, 1, outdir)
+    return min(run_measured([sys.executable, cmd[0], "--help"])[0] for _ in range(runs))
+
+
+def measure_case(generator: str, count: int, words: int, args) -> dict:
+    """Best-of-repeat throughput (and largest peak RSS) of one grid point."""
+    times, peaks = [], []
+    for _ in range(args.repeat):
+        with tempfile.TemporaryDirectory(dir=args.work_dir) as outdir:
+            cmd, outputs, prompts = GENERATORS[generator](count, words, outdir)
+            cmd = [sys.executable] + cmd + (["--workers", str(args.workers)] if args.workers is not None else [])
+            seconds, rss = run_measured(cmd)
+            size = sum(os.path.getsize(p) for p in outputs)
+        times.append(seconds)
+        peaks.append(rss)
+    seconds, rss = min(times), max(peaks)
+    return {
+        "generator": generator,
+        "count": count,
+        "words": words,
+        "prompts": prompts,
+        "seconds": round(seconds, 4),
+        "bytes": size,
+        "prompts_per_second": round(prompts / seconds, 2),
+        "mb_per_second": round(size / seconds / 1e6, 3),
+        "peak_rss_mb": round(rss, 1),
+    }
+
+
+# -------------------------------
+# Baseline comparison
+# -------------------------------
+
+
+def compare(baseline: dict, results: dict, threshold: float, startup_threshold: float) -> list:
+    """Regressions beyond the thresholds (percent), for every case and startup time present in both runs."""
+    regressions = []
+
+    def check(name, metric, base, value, higher_is_better, limit=threshold):
+        if not base:
+            return
+        change = (value - base) / base * 100
+        worse = -change if higher_is_better else change
+        status = "REGRESSION" if worse > limit else ""
+        print(f"{name:<30} {metric:<20} {base:>12.2f} {value:>12.2f} {change:>+8.1f}%  {status}")
+        if status:
+            regressions.append({"case": name, "metric": metric, "baseline": base, "value": value, "change_pct": change})
+
+    print(f"\n==== Against baseline (threshold {threshold:g}%, startup {startup_threshold:g}%)")
+    print(f"{'case':<30} {'metric':<20} {'baseline':>12} {'current':>12} {'change':>9}")
+    for generator, seconds in results["startup_seconds"].items():
+        if generator in baseline.get("startup_seconds", {}):
+            check(generator, "startup_seconds", baseline["startup_seconds"][generator], seconds, False, startup_threshold)
+    base_cases = {(c["generator"], c["count"], c["words"]): c for c in baseline.get("cases", [])}
+    for case in results["cases"]:
+        base = base_cases.get((case["generator"], case["count"], case["words"]))
+        if base:
+            name = f"{case['generator']} {case['count']}x{case['words']}"
+            for metric, higher_is_better in METRICS.items():
+                check(name, metric, base[metric], case[metric], higher_is_better)
+    return regressions
+
+
+# -------------------------------
+# Main
+# -------------------------------
+
+
+def int_list(value: str) -> list:
+    try:
+        return [int(v) for v in value.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated integers, got '{value}'")
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(
+        description="Benchmark the data generators' throughput, peak memory and startup time over a "
+        "grid of dataset sizes, optionally failing on regression against a stored baseline"
+    )
+    p.add_argument(
+        "--generators",
+        type=lambda v: v.split(","),
+        default=list(GENERATORS),
+        help=f"Comma-separated generators to run ({', '.join(GENERATORS)}). Defaults to all.",
+    )
+    p.add_argument(
+        "--counts",
+        type=int_list,
+        default=[100, 1000, 10000],
+        help="Comma-separated pair counts (prefix) / prompt counts (heterogeneous). Defaults to 100,1000,10000.",
+    )
+    p.add_argument(
+        "--words",
+        type=int_list,
+        default=[500, 2000, 10000],
+        help="Comma-separated prompt lengths in words (prefix + continuation, or the long class "
+        "of the heterogeneous mix). Defaults to 500,2000,10000.",
+    )
+    p.add_argument("--repeat", type=int, default=1, help="Runs per grid point; the fastest is kept. Defaults to 1.")
+    p.add_argument("--startup-runs", type=int, default=5, help="Runs of '--help' per generator; the fastest is kept. Defaults to 5.")
+    p.add_argument("--workers", type=int, default=None, help="Passed to both generators as --workers. Defaults to theirs.")
+    p.add_argument("--work-dir", type=str, default=None, help="Directory for the temporary outputs. Defaults to the system temp dir.")
+    p.add_argument(
+        "--output-json",
+        type=str,
+        default="generator-benchmark.json",
+        help="Where to write the results. Defaults to generator-benchmark.json.",
+    )
+    p.add_argument("--baseline", type=str, default=None, help="Results of an earlier run to compare against.")
+    p.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="Percent change in the worse direction that fails the run. Defaults to 10.",
+    )
+    p.add_argument(
+        "--startup-threshold",
+        type=float,
+        default=25.0,
+        help="Same for startup time, which is noisier at a few hundred ms. Defaults to 25.",
+    )
+    args = p.parse_args(argv)
+    unknown = set(args.generators) - set(GENERATORS)
+    if unknown:
+        p.error(f"unknown generators: {', '.join(sorted(unknown))}")
+    return args
+
+
+def git_commit():
+    if not shutil.which("git"):
+        return None
+    result = subprocess.run(["git", "-C", ROOT, "rev-parse", "HEAD"], capture_output=True, text=True)
+    return result.stdout.strip() or None
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if "LLMD_DATAGEN_CACHE" in os.environ:
+        print("==== Ignoring LLMD_DATAGEN_CACHE: the generators run without the dataset cache")
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = {
+        "version": 1,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "workers": args.workers,
+        "startup_seconds": {},
+        "cases": [],
+    }
+    for generator in args.generators:
+        seconds = measure_startup(generator, args.startup_runs)
+        results["startup_seconds"][generator] = round(seconds, 4)
+        print(f"==== {generator}: startup {seconds * 1000:.0f} ms")
+        print(f"{'count':>7} {'words':>7} {'seconds':>9} {'prompts/s':>10} {'MB/s':>8} {'peak RSS':>10}")
+        for count in args.counts:
+            for words in args.words:
+                case = measure_case(generator, count, words, args)
+                results["cases"].append(case)
+                print(
+                    f"{count:>7} {words:>7} {case['seconds']:>9.2f} {case['prompts_per_second']:>10.1f} "
+                    f"{case['mb_per_second']:>8.1f} {case['peak_rss_mb']:>8.0f}MB"
+                )
+
+    with open(args.output_json, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+    print(f"Wrote {args.output_json}")
+
+    if baseline is not None:
+        regressions = compare(baseline, results, args.threshold, args.startup_threshold)
+        print(f"\n{len(regressions)} regression(s) beyond threshold.")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
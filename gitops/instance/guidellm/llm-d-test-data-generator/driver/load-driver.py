@@ -0,0 +1,580 @@
+import argparse
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import ssl
+import sys
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+# -------------------------------
+# Input
+# -------------------------------
+
+
+def open_input(path: str):
+    """Open a generator output (.csv / .jsonl, optionally .gz / .zst) as text."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", newline="", encoding="utf-8")
+    if path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            sys.exit(f"Reading {path} requires the 'zstandard' package (pip install zstandard)")
+        raw = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        return io.TextIOWrapper(raw, newline="", encoding="utf-8")
+    return open(path, newline="", encoding="utf-8")
+
+
+def iter_rows(path: str):
+    """Yield (prompt, output_tokens_count) from a generator output, starting over at the end."""
+    name = path
+    for suffix in (".gz", ".zst"):
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+    csv.field_size_limit(sys.maxsize)
+    while True:
+        empty = True
+        with open_input(path) as f:
+            rows = (json.loads(line) for line in f if line.strip()) if name.endswith(".jsonl") else csv.DictReader(f)
+            for row in rows:
+                empty = False
+                yield row["prompt"], int(row["output_tokens_count"])
+        if empty:
+            sys.exit(f"{path} has no rows")
+
+
+def read_trace(path: str) -> np.ndarray:
+    """Arrival times from a trace: one timestamp (seconds) per line, or a CSV with a timestamp column."""
+    with open(path, newline="", encoding="utf-8") as f:
+        first = f.readline()
+        f.seek(0)
+        if "timestamp" in first:
+            times = [float(row["timestamp"]) for row in csv.DictReader(f)]
+        else:
+            times = [float(line) for line in f if line.strip()]
+    if not times:
+        sys.exit(f"{path} has no timestamps")
+    times = np.sort(np.array(times))
+    return times - times[0]
+
+
+# -------------------------------
+# Arrival schedules
+# -------------------------------
+
+
+def make_schedule(kind: str, rate: float, count: int, rng, burstiness: float = 1.0,
+                  ramp_steps: int = 5, trace=None) -> np.ndarray:
+    """Send times (seconds from the start) of count requests at a mean of rate per second.
+
+    poisson has exponential gaps. gamma has gamma gaps with shape burstiness
+    (below 1 is burstier than Poisson, above 1 is smoother). ramp runs Poisson
+    arrivals in ramp_steps equal-length steps at rate/ramp_steps, 2 *
+    rate/ramp_steps, ... rate. trace replays recorded times at rate times
+    their original speed.
+    """
+    if kind == "poisson":
+        gaps = rng.exponential(1.0 / rate, count)
+    elif kind == "gamma":
+        gaps = rng.gamma(burstiness, 1.0 / (rate * burstiness), count)
+    elif kind == "ramp":
+        per_step = -(-count // ramp_steps)
+        step_rates = np.repeat(rate * np.arange(1, ramp_steps + 1) / ramp_steps, per_step)[:count]
+        gaps = rng.exponential(1.0 / step_rates)
+    elif kind == "trace":
+        return trace[:count] / rate
+    else:
+        raise ValueError(f"unknown schedule {kind}")
+    return np.cumsum(gaps) - gaps[0]
+
+
+# -------------------------------
+# HTTP
+# -------------------------------
+
+
+class ConnectionPool:
+    """Keep-alive HTTP/1.1 connections to one server, at most size at a time.
+
+    Only what OpenAI-compatible servers need is supported: JSON request
+    bodies and Content-Length, chunked or close-delimited responses.
+    """
+
+    def __init__(self, url: str, size: int, insecure: bool = False, api_key: str = None):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.base = parts.path.rstrip("/")
+        self.ssl = None
+        if parts.scheme == "https":
+            self.ssl = ssl.create_default_context()
+            if insecure:
+                self.ssl.check_hostname = False
+                self.ssl.verify_mode = ssl.CERT_NONE
+        self.api_key = api_key
+        self.idle = []
+        self.slots = asyncio.Semaphore(size)
+        self.opened = 0
+
+    async def _connect(self, fresh: bool = False):
+        if self.idle and not fresh:
+            return self.idle.pop()
+        self.opened += 1
+        return await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+
+    async def request(self, method: str, path: str, payload=None, on_data=None, on_send=None) -> bytes:
+        """Send one request and return its body, or pass each piece of it to on_data as it arrives.
+
+        When all size connections are busy, the request waits for one; on_send
+        is called once it has a connection slot, just before it is sent.
+        """
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        head = [
+            f"{method} {self.base}{path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            "Accept: */*",
+            f"Content-Length: {len(body)}",
+        ]
+        if payload is not None:
+            head.append("Content-Type: application/json")
+        if self.api_key:
+            head.append(f"Authorization: Bearer {self.api_key}")
+        request = ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+
+        async with self.slots:
+            if on_send is not None:
+                on_send()
+            for attempt in range(2):
+                reused = bool(self.idle) and not attempt
+                reader, writer = await self._connect(fresh=attempt > 0)
+                try:
+                    writer.write(request)
+                    status, headers = await self._read_head(reader)
+                    break
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    writer.close()
+                    # an idle connection the server has since closed; retry once on a new one
+                    if not reused:
+                        raise
+            try:
+                # error bodies are collected for the message rather than streamed
+                chunks = [] if on_data is None or status >= 400 else None
+                emit = chunks.append if chunks is not None else on_data
+                keep_alive = await self._read_body(reader, headers, emit)
+            except BaseException:
+                writer.close()
+                raise
+            if keep_alive and headers.get("connection", "").lower() != "close":
+                self.idle.append((reader, writer))
+            else:
+                writer.close()
+        if status >= 400:
+            raise RuntimeError(f"HTTP {status}: {b''.join(chunks or [])[:200]!r}")
+        return b"".join(chunks) if chunks is not None else b""
+
+    @staticmethod
+    async def _read_head(reader):
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        status = int(line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                return status, headers
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    @staticmethod
+    async def _read_body(reader, headers, emit) -> bool:
+        """Pass the body to emit; returns whether the connection can be reused."""
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    return True
+                emit(await reader.readexactly(size))
+                await reader.readexactly(2)
+        if "content-length" in headers:
+            emit(await reader.readexactly(int(headers["content-length"])))
+            return True
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                return False
+            emit(data)
+
+    def close(self):
+        for _, writer in self.idle:
+            writer.close()
+        self.idle.clear()
+
+
+# -------------------------------
+# Requests
+# -------------------------------
+
+
+async def send_completion(pool, model: str, prompt: str, max_tokens: int, scheduled: float,
+                          ignore_eos: bool = True) -> dict:
+    """Stream one completion; returns its timings in seconds (all relative to time.perf_counter).
+
+    start is when the request was sent, and TTFT and E2E are measured from it.
+    Time spent waiting for a free connection before that is queue_wait.
+    """
+    record = {"scheduled": scheduled, "max_tokens": max_tokens, "error": None}
+    token_times = []
+    usage = {}
+    buffer = b""
+
+    def on_data(data):
+        nonlocal buffer
+        now = time.perf_counter()
+        buffer += data.replace(b"\r\n", b"\n")
+        while b"\n\n" in buffer:
+            event, buffer = buffer.split(b"\n\n", 1)
+            for line in event.split(b"\n"):
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    continue
+                chunk = json.loads(data)
+                if chunk.get("usage"):
+                    usage.update(chunk["usage"])
+                if any(choice.get("text") for choice in chunk.get("choices", [])):
+                    token_times.append(now)
+
+    payload = {
+        "model": model,
+        "prompt": prompt,
+        "max_tokens": max_tokens,
+        "stream": True,
+        "stream_options": {"include_usage": True},
+    }
+    if ignore_eos:
+        payload["ignore_eos"] = True
+
+    def on_send():
+        record["start"] = time.perf_counter()
+
+    waiting = pool.slots.locked()
+    called = time.perf_counter()
+    try:
+        await pool.request("POST", "/v1/completions", payload, on_data, on_send)
+    except Exception as e:  # recorded, not fatal: one failed request should not end the sweep
+        record["error"] = f"{type(e).__name__}: {e}"
+    end = time.perf_counter()
+
+    start = record.setdefault("start", end)
+    record["queue_wait"] = start - called if waiting else 0.0
+    record["e2e"] = end - start
+    record["ttft"] = token_times[0] - start if token_times else None
+    record["itl"] = np.diff(token_times).tolist()
+    record["output_tokens"] = usage.get("completion_tokens", len(token_times))
+    record["prompt_tokens"] = usage.get("prompt_tokens")
+    if record["error"] is None and not token_times:
+        record["error"] = "no tokens received"
+    return record
+
+
+async def run_open_loop(pool, args, rows, offsets):
+    """Send one request per offset (seconds from now), without waiting for earlier ones."""
+    start = time.perf_counter()
+    tasks = []
+    for offset in offsets:
+        delay = start + offset - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        prompt, max_tokens = next(rows)
+        tasks.append(asyncio.create_task(
+            send_completion(pool, args.model, prompt, max_tokens, start + offset, not args.no_ignore_eos)
+        ))
+    return await asyncio.gather(*tasks)
+
+
+async def run_closed_loop(pool, args, rows, concurrency: int, count: int, max_seconds: float):
+    """Keep concurrency requests in flight until count requests or max_seconds."""
+    start = time.perf_counter()
+    records = []
+
+    async def worker():
+        while len(records) < count and time.perf_counter() - start < max_seconds:
+            prompt, max_tokens = next(rows)
+            now = time.perf_counter()
+            i = len(records)
+            records.append(None)  # claim the slot before awaiting so count holds across workers
+            records[i] = await send_completion(
+                pool, args.model, prompt, max_tokens, now, not args.no_ignore_eos
+            )
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return records
+
+
+# -------------------------------
+# Results
+# -------------------------------
+
+PERCENTILES = [50, 90, 95, 99]
+
+
+def summarize(label, records) -> dict:
+    ok = [r for r in records if r["error"] is None]
+    summary = {
+        "rate": label,
+        "requests": len(records),
+        "errors": len(records) - len(ok),
+        "queued_requests": sum(r["queue_wait"] > 0 for r in records),
+    }
+    if not ok:
+        return summary
+    first = min(r["start"] for r in records)
+    last = max(r["start"] + r["e2e"] for r in records)
+    duration = last - first
+    itl = np.array([gap for r in ok for gap in r["itl"]])
+    summary.update(
+        duration=duration,
+        request_rate=len(ok) / duration if duration else None,
+        output_tokens_per_second=sum(r["output_tokens"] for r in ok) / duration if duration else None,
+        max_send_lag=max(r["start"] - r["queue_wait"] - r["scheduled"] for r in records),
+    )
+    for name, values in [
+        ("queue_wait", np.array([r["queue_wait"] for r in records if r["queue_wait"] > 0])),
+        ("ttft", np.array([r["ttft"] for r in ok])),
+        ("itl", itl),
+        ("e2e", np.array([r["e2e"] for r in ok])),
+    ]:
+        if len(values):
+            summary[name] = dict(zip((f"p{p}" for p in PERCENTILES), np.percentile(values, PERCENTILES).tolist()))
+            summary[name]["mean"] = float(values.mean())
+    return summary
+
+
+def print_summaries(summaries, unit: str):
+    print(
+        f"\n{unit:>10} {'reqs':>6} {'errors':>6} {'queued':>6} {'req/s':>7} {'tok/s':>8} "
+        f"{'TTFT p50':>9} {'TTFT p99':>9} {'ITL p50':>8} {'ITL p99':>8} {'E2E p50':>8} {'E2E p99':>8}"
+    )
+    for s in summaries:
+        if "ttft" not in s:
+            print(f"{s['rate']:>10} {s['requests']:>6} {s['errors']:>6} {s['queued_requests']:>6}")
+            continue
+
+        def ms(name, p):
+            return f"{s[name][p] * 1000:.0f}ms" if name in s else "-"
+
+        print(
+            f"{s['rate']:>10} {s['requests']:>6} {s['errors']:>6} {s['queued_requests']:>6} {s['request_rate']:>7.2f} "
+            f"{s['output_tokens_per_second']:>8.0f} {ms('ttft', 'p50'):>9} {ms('ttft', 'p99'):>9} "
+            f"{ms('itl', 'p50'):>8} {ms('itl', 'p99'):>8} {ms('e2e', 'p50'):>8} {ms('e2e', 'p99'):>8}"
+        )
+
+
+# -------------------------------
+# Main
+# -------------------------------
+
+
+def parse_rates(value: str):
+    try:
+        rates = [float(v) for v in value.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated numbers, got '{value}'")
+    if any(r <= 0 for r in rates):
+        raise argparse.ArgumentTypeError("rates must be > 0")
+    return rates
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(
+        description="Replay a generated dataset against an OpenAI-compatible server with open-loop "
+        "arrival schedules and record TTFT, ITL and E2E latency per request"
+    )
+    p.add_argument("--target", required=True, help="Server base URL, e.g. http://localhost:8000")
+    p.add_argument(
+        "--data",
+        type=str,
+        default=None,
+        help="Dataset (.csv or .jsonl, optionally .gz/.zst) with prompt and output_tokens_count columns.",
+    )
+    p.add_argument(
+        "--manifest",
+        type=str,
+        default=None,
+        help="sweep-manifest.json from a generator sweep: run every tier against its own data file, "
+        "with the tier's rate as the concurrency (or as requests per second with --schedule).",
+    )
+    p.add_argument(
+        "--schedule",
+        choices=["concurrent", "poisson", "gamma", "ramp", "trace"],
+        default="poisson",
+        help="Arrival schedule. 'concurrent' is closed-loop with --rates requests in flight; the others "
+        "send at --rates requests per second regardless of responses. Defaults to poisson.",
+    )
+    p.add_argument(
+        "--rates",
+        type=parse_rates,
+        default=None,
+        help="Comma-separated rates to sweep in order (requests per second, or concurrency with "
+        "--schedule concurrent; speed-up factors with --schedule trace). Defaults to 1.",
+    )
+    p.add_argument(
+        "--max-requests",
+        type=int,
+        default=None,
+        help="Requests per rate. Defaults to the tier's size with --manifest, else 100.",
+    )
+    p.add_argument(
+        "--max-seconds",
+        type=float,
+        default=None,
+        help="Stop scheduling new requests after this many seconds per rate.",
+    )
+    p.add_argument(
+        "--burstiness",
+        type=float,
+        default=0.5,
+        help="Gamma shape for --schedule gamma; below 1 is burstier than Poisson. Defaults to 0.5.",
+    )
+    p.add_argument(
+        "--ramp-steps",
+        type=int,
+        default=5,
+        help="Number of equal-length steps up to the full rate for --schedule ramp. Defaults to 5.",
+    )
+    p.add_argument(
+        "--trace",
+        type=str,
+        default=None,
+        help="Recorded arrival times for --schedule trace: one timestamp in seconds per line, or a CSV "
+        "with a timestamp column.",
+    )
+    p.add_argument("--model", type=str, default=None, help="Model name. Defaults to the first model in /v1/models.")
+    p.add_argument(
+        "--connections",
+        type=int,
+        default=256,
+        help="Maximum pooled HTTP connections; requests beyond this wait for a free one. The wait is "
+        "recorded as queue_wait, not in TTFT, and a warning is printed when it happens. Defaults to 256.",
+    )
+    p.add_argument(
+        "--cooldown",
+        type=float,
+        default=0.0,
+        help="Seconds to wait between rates so queues drain. Defaults to 0.",
+    )
+    p.add_argument(
+        "--no-ignore-eos",
+        action="store_true",
+        help="Do not send ignore_eos, so responses may stop before output_tokens_count.",
+    )
+    p.add_argument("--api-key", type=str, default=os.environ.get("OPENAI_API_KEY"),
+                   help="Bearer token. Defaults to $OPENAI_API_KEY.")
+    p.add_argument("--insecure", action="store_true", help="Skip TLS certificate verification.")
+    p.add_argument("--seed", type=int, default=42, help="Random seed for the arrival schedules. Defaults to 42.")
+    p.add_argument(
+        "--output-dir",
+        type=str,
+        default="load-results",
+        help="Directory for per-request records (requests-<rate>.jsonl) and summary.json. Defaults to load-results.",
+    )
+    args = p.parse_args(argv)
+    if bool(args.data) == bool(args.manifest):
+        p.error("pass exactly one of --data and --manifest")
+    if args.schedule == "trace" and not args.trace:
+        p.error("--schedule trace requires --trace")
+    if args.max_requests is not None and args.max_requests < 1:
+        p.error("--max-requests must be >= 1")
+    if args.schedule == "concurrent" and any(r != int(r) for r in args.rates or []):
+        p.error("--schedule concurrent needs whole-number rates")
+    if args.connections < 1 or args.ramp_steps < 1 or args.burstiness <= 0:
+        p.error("--connections and --ramp-steps must be >= 1 and --burstiness > 0")
+    return args
+
+
+def plan_runs(args):
+    """(rate, data file, request count) for every run of the sweep."""
+    if args.data:
+        return [(rate, args.data, args.max_requests or 100) for rate in args.rates or [1.0]]
+    with open(args.manifest, encoding="utf-8") as f:
+        manifest = json.load(f)
+    base = os.path.dirname(os.path.abspath(args.manifest))
+    runs = []
+    for tier in manifest["tiers"]:
+        size = tier.get("total_prompts") or 2 * tier["num_pairs"]
+        runs.append((float(tier["rate"]), os.path.join(base, tier["data"]), args.max_requests or size))
+    return runs
+
+
+async def run(args):
+    pool = ConnectionPool(args.target, args.connections, args.insecure, args.api_key)
+    if args.model is None:
+        models = json.loads(await pool.request("GET", "/v1/models"))
+        args.model = models["data"][0]["id"]
+    trace = read_trace(args.trace) if args.schedule == "trace" else None
+    rng = np.random.default_rng(args.seed)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    print(f"==== Target: {args.target} (model {args.model}), schedule: {args.schedule}")
+    summaries = []
+    for n, (rate, data, count) in enumerate(plan_runs(args)):
+        if n and args.cooldown:
+            await asyncio.sleep(args.cooldown)
+        label = f"{rate:g}"
+        rows = iter_rows(data)
+        max_seconds = args.max_seconds or float("inf")
+        if args.schedule == "concurrent":
+            print(f"==== Concurrency {label}: {count} requests from {data}")
+            records = await run_closed_loop(pool, args, rows, int(rate), count, max_seconds)
+        else:
+            offsets = make_schedule(args.schedule, rate, count, rng, args.burstiness, args.ramp_steps, trace)
+            offsets = offsets[offsets <= max_seconds]
+            print(f"==== Rate {label}: {len(offsets)} requests over {offsets[-1]:.1f}s from {data}")
+            records = await run_open_loop(pool, args, rows, offsets)
+
+        summary = summarize(label, records)
+        summaries.append(summary)
+        with open(os.path.join(args.output_dir, f"requests-{label}.jsonl"), "w", encoding="utf-8") as f:
+            for r in records:
+                f.write(json.dumps(r) + "\n")
+        if summary["queued_requests"]:
+            longest = max(r["queue_wait"] for r in records)
+            print(
+                f"==== Warning: {summary['queued_requests']} of {len(records)} requests at {label} waited up to "
+                f"{longest * 1000:.0f}ms for one of the {args.connections} connections before being sent; "
+                f"the wait is recorded as queue_wait, not in TTFT. Raise --connections to send them on schedule.",
+                file=sys.stderr,
+            )
+        if summary["errors"]:
+            first_error = next(r["error"] for r in records if r["error"])
+            print(f"     {summary['errors']} errors, first: {first_error}")
+    pool.close()
+
+    print_summaries(summaries, "concurrency" if args.schedule == "concurrent" else "rate")
+    with open(os.path.join(args.output_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(
+            {"target": args.target, "model": args.model, "schedule": args.schedule,
+             "connections_opened": pool.opened, "rates": summaries},
+            f,
+            indent=2,
+        )
+        f.write("\n")
+    print(f"\nDone. Results saved to {args.output_dir}/.")
+
+
+def main(argv=None):
+    asyncio.run(run(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
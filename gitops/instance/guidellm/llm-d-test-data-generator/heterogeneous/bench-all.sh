@@ -12,6 +12,16 @@ BENCHMARKS=(
   "100 heterogeneous-100.csv"
 )
 
+# Prefer the tiers recorded by generate-all.sh (sweep manifest) when present
+MANIFEST=sweep-manifest.json
+if [ -f "$MANIFEST" ]; then
+  mapfile -t BENCHMARKS < <(python -c "
+import json, sys
+for t in sorted(json.load(open(sys.argv[1]))['tiers'], key=lambda t: t['rate']):
+    print(t['rate'], t['data'])
+" "$MANIFEST")
+fi
+
 # Loop through the list and run guidellm benchmark for each pair
 for benchmark in "${BENCHMARKS[@]}"; do
   RATE=$(echo $benchmark | awk '{print $1}')
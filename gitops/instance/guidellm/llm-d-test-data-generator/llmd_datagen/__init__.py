@@ -0,0 +1,26 @@
+"""Synthetic prompt generators for llm-d benchmarks, usable without writing datasets to disk.
+
+    from llmd_datagen import iter_prefix_prompts
+    for prompt, output_tokens_count in iter_prefix_prompts(num_pairs=100, chunk_size=20):
+        ...
+
+The generator modules (and NumPy) are imported on first use, so importing
+the package is cheap.
+"""
+
+_EXPORTS = {
+    "iter_prefix_prompts": "prefix",
+    "iter_heterogeneous_prompts": "heterogeneous",
+}
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    return getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_EXPORTS))
@@ -0,0 +1,26 @@
+"""python -m llmd_datagen {prefix,heterogeneous} [options]: one entry point for both generators."""
+import sys
+
+COMMANDS = {
+    "prefix": "paired prefix + continuation prompts (prefix-cache-generator.py)",
+    "heterogeneous": "interleaved short/long or spec-driven prompts (heterogeneous-workload-generator.py)",
+}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        print("usage: python -m llmd_datagen {prefix,heterogeneous} [options]\n", file=sys.stderr)
+        for name, description in COMMANDS.items():
+            print(f"  {name:<14} {description}", file=sys.stderr)
+        sys.exit(0 if argv and argv[0] in ("-h", "--help") else 2)
+    # Import only the generator that runs
+    if argv[0] == "prefix":
+        from .prefix import main as run
+    else:
+        from .heterogeneous import main as run
+    run(argv[1:])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""Content-addressed cache of generated datasets, shared by both generators.
+
+An entry is keyed by a hash of everything the output depends on (generator,
+sentence pool version, effective parameters, tokenizer / workload spec
+contents, output formats) and holds the output files. Hits are hard-linked
+(or copied) into place, so the files of an entry are made read-only and their
+size and mtime are checked on every hit; the least recently used entries are
+evicted once the cache exceeds its size bound.
+"""
+import argparse
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from .common import file_sha256
+
+# Bump when a code change alters the output for unchanged parameters
+CACHE_VERSION = 1
+
+_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+def parse_size(value: str) -> int:
+    """Parse '500M', '20G' or a plain byte count."""
+    text = value.strip().upper().removesuffix("B").removesuffix("I")
+    unit = text[-1:] if text[-1:] in _UNITS else ""
+    try:
+        return int(float(text[: len(text) - len(unit)]) * _UNITS[unit])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a size such as 500M or 20G, got '{value}'")
+
+
+def output_format(path: str) -> str:
+    """'prompts.jsonl.gz' -> '.jsonl.gz': the part of an output name that changes its bytes."""
+    name = os.path.basename(path)
+    compression = ""
+    for suffix in (".gz", ".zst"):
+        if name.endswith(suffix):
+            name, compression = name[: -len(suffix)], suffix
+    return (".jsonl" if name.endswith(".jsonl") else ".csv") + compression
+
+
+def iter_output_rows(path: str):
+    """Yield the data rows of a generator output (.csv / .jsonl, optionally .gz / .zst) as lists of strings."""
+    if path.endswith(".gz"):
+        f = gzip.open(path, "rt", newline="", encoding="utf-8")
+    elif path.endswith(".zst"):
+        import zstandard
+
+        f = io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb")), newline="", encoding="utf-8")
+    else:
+        f = open(path, newline="", encoding="utf-8")
+    with f:
+        if output_format(path).startswith(".jsonl"):
+            for line in f:
+                yield [str(v) for v in json.loads(line).values()]
+        else:
+            rows = csv.reader(f)
+            next(rows, None)
+            yield from rows
+
+
+def spot_check(path: str, total: int, expected, samples: int) -> list:
+    """Indices among samples random rows of path whose fields differ from expected(index)."""
+    wanted = set(random.sample(range(total), min(samples, total)))
+    bad = []
+    seen = 0
+    for i, row in enumerate(iter_output_rows(path)):
+        seen = i + 1
+        if i in wanted and row != [str(v) for v in expected(i)]:
+            bad.append(i)
+    if seen != total:
+        bad.append(seen)
+    return bad
+
+
+class DatasetCache:
+    """Directory of entries <key>/{entry.json, <role><format>}, bounded to max_bytes by LRU eviction."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(fields: dict) -> str:
+        body = {"cache": CACHE_VERSION, **fields}
+        return hashlib.sha256(json.dumps(body, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def fetch(self, key: str, outputs: dict, verify: int = 0, expected: dict = None):
+        """Restore outputs (role -> path) from entry key; returns the entry's info, or None on a miss.
+
+        With verify, each file's checksum is checked and verify sampled rows
+        of every role in expected (role -> (rows, index -> row)) are compared
+        with a fresh regeneration. A failed check drops the entry and counts
+        as a miss.
+        """
+        special = [p for p in outputs.values() if os.path.exists(p) and not os.path.isfile(p)]
+        if special:
+            print(f"==== Not using the cache: {', '.join(sorted(set(special)))} is not a regular file")
+            return None
+        entry = self._entry(key)
+        try:
+            with open(os.path.join(entry, "entry.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            print(f"==== Cache miss {key[:12]}: generating")
+            return None
+        if not set(outputs) <= set(meta["files"]):
+            print(f"==== Cache miss {key[:12]}: entry lacks {', '.join(sorted(set(outputs) - set(meta['files'])))}")
+            return None
+
+        for role in outputs:
+            problem = _modified(os.path.join(entry, meta["files"][role]["name"]), meta["files"][role])
+            if problem:
+                print(f"==== Cache entry {key[:12]} was modified after it was stored ({problem}): dropping it",
+                      file=sys.stderr)
+                shutil.rmtree(entry, ignore_errors=True)
+                return None
+
+        how = set()
+        for role, path in outputs.items():
+            how.add(_place(os.path.join(entry, meta["files"][role]["name"]), path))
+        os.utime(os.path.join(entry, "entry.json"))
+        names = ", ".join(outputs.values())
+        print(f"==== Cache hit {key[:12]}: {' and '.join(sorted(how))} {names}")
+
+        if verify:
+            problems = []
+            for role, path in outputs.items():
+                if file_sha256(path) != meta["files"][role]["sha256"]:
+                    problems.append(f"{path} does not match its checksum")
+                elif role in (expected or {}):
+                    total, row = expected[role]
+                    bad = spot_check(path, total, row, verify)
+                    if bad:
+                        problems.append(f"{path} differs from a fresh regeneration at rows {bad[:5]}")
+            if problems:
+                for problem in problems:
+                    print(f"==== Cache entry {key[:12]} is stale: {problem}", file=sys.stderr)
+                for path in outputs.values():
+                    os.unlink(path)
+                shutil.rmtree(entry, ignore_errors=True)
+                return None
+            checked = ", ".join(f"{min(verify, expected[r][0])} {r}" for r in outputs if r in (expected or {}))
+            print(f"==== Verified checksums{' and ' + checked + ' sampled rows' if checked else ''}")
+        return meta.get("info", {})
+
+    def store(self, key: str, outputs: dict, info: dict = None):
+        """Add freshly written outputs (role -> path) as entry key, then evict down to the size bound."""
+        if not all(os.path.isfile(p) for p in outputs.values()):
+            return
+        size = sum(os.path.getsize(p) for p in outputs.values())
+        if size > self.max_bytes:
+            print(f"==== Not cached: {size / 1e6:.1f} MB exceeds the cache size of {self.max_bytes / 1e6:.1f} MB")
+            self.evict()
+            return
+        entry = self._entry(key)
+        tmp = tempfile.mkdtemp(dir=self.directory, prefix=".tmp-")
+        files = {}
+        for role, path in outputs.items():
+            name = role + output_format(path)
+            _place(path, os.path.join(tmp, name))
+            # read-only, so editing a restored (hard-linked) output in place fails rather than changing the entry
+            os.chmod(os.path.join(tmp, name), 0o444)
+            st = os.stat(os.path.join(tmp, name))
+            files[role] = {"name": name, "bytes": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": file_sha256(path)}
+        meta = {"key": key, "created": time.time(), "bytes": size, "files": files, "info": info or {}}
+        with open(os.path.join(tmp, "entry.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+            f.write("\n")
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # another run stored the same entry first
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+        print(f"==== Cached as {key[:12]} in {self.directory}")
+        self.evict(keep=key)
+
+    def evict(self, keep: str = None):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for name in os.listdir(self.directory):
+            meta_path = os.path.join(self.directory, name, "entry.json")
+            try:
+                with open(meta_path, encoding="utf-8") as f:
+                    size = json.load(f)["bytes"]
+                entries.append((os.stat(meta_path).st_mtime, size, name))
+            except (OSError, ValueError, KeyError):
+                continue
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+            total -= size
+            print(f"==== Evicted cache entry {name[:12]} ({size / 1e6:.1f} MB)")
+
+
+def _modified(path: str, stored: dict):
+    """How the entry file at path differs from its stored size and mtime, or None if it does not."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return "file missing"
+    if st.st_size != stored["bytes"]:
+        return f"{stored['bytes']} bytes stored, {st.st_size} now"
+    if "mtime_ns" in stored and st.st_mtime_ns != stored["mtime_ns"]:
+        return "mtime changed"
+    return None
+
+
+def _place(src: str, dst: str) -> str:
+    """Hard-link src to dst, or copy it across file systems; returns 'linked' or 'copied'."""
+    if os.path.lexists(dst):
+        os.unlink(dst)
+    try:
+        os.link(src, dst)
+        return "linked"
+    except OSError:
+        shutil.copyfile(src, dst)
+        return "copied"
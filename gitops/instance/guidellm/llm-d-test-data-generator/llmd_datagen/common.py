@@ -0,0 +1,345 @@
+"""Helpers shared by the generators: sizing text, drawing sentences and writing rows."""
+import argparse
+import collections
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import random
+import shutil
+import stat
+import sys
+import tempfile
+
+# -------------------------------
+# Sizing
+# -------------------------------
+
+
+def word_count(s: str) -> int:
+    return len(s.split())
+
+
+def normalize(text: str) -> str:
+    """Collapse whitespace so the text is single-spaced, as " ".join(text.split())."""
+    return " ".join(text.split())
+
+
+def make_rng(seed: int, legacy: bool = False):
+    """Per-item random source: random.Random for --legacy-random output, else a NumPy Generator."""
+    import numpy as np
+    return random.Random(seed) if legacy else np.random.default_rng(seed)
+
+
+class WordSizer:
+    """Measure text in whitespace-separated words.
+
+    Sentence lengths and word-prefix trims are computed once, so prompts are
+    assembled by joining whole sentences. Sentences are single-spaced, so this
+    gives the same text as joining their words.
+    """
+
+    unit = "words"
+
+    def __init__(self, sentences):
+        import numpy as np
+        split = [s.split() for s in sentences]
+        self.lengths = np.array([len(words) for words in split])
+        self.spaced = [" " + s for s in sentences]
+        # partials[j][r] is " " + the first r words of sentence j
+        self.partials = [
+            {r: " " + " ".join(words[:r]) for r in range(1, len(words) + 1)}
+            for words in split
+        ]
+
+    def count(self, text: str) -> int:
+        return word_count(text)
+
+    def truncate(self, text: str, n: int) -> str:
+        return " ".join(text.split()[:n])
+
+
+class TokenSizer:
+    """Measure text in tokens of a local tokenizer.json (no hub access).
+
+    The token count of " " + sentence is cached for every pool sentence, along
+    with the decoded text of each of its token prefixes. This relies on the
+    tokenizer splitting on whitespace before merging, as the Qwen, gpt-oss and
+    Llama tokenizers do, so sentences add the same tokens wherever they appear.
+    """
+
+    unit = "tokens"
+
+    def __init__(self, path: str, sentences):
+        import numpy as np
+        try:
+            from tokenizers import Tokenizer
+        except ImportError:
+            sys.exit("--target-unit tokens requires the 'tokenizers' package (pip install tokenizers)")
+        self.tokenizer = Tokenizer.from_file(path)
+        self.spaced = [" " + s for s in sentences]
+        self.lengths = np.array([self.count(s) for s in self.spaced])
+        # partials[j][r] is text adding exactly r tokens from the start of sentence j
+        self.partials = []
+        for s, n in zip(sentences, self.lengths):
+            ids = self.encode(" " + s)
+            partial = {int(n): " " + s}
+            for r in range(1, n):
+                text = self.tokenizer.decode(ids[:r])
+                if not text.startswith(" "):
+                    text = " " + text
+                if self.count(text) == r:
+                    partial[r] = text
+            self.partials.append(partial)
+
+    def encode(self, text: str) -> list:
+        return self.tokenizer.encode(text, add_special_tokens=False).ids
+
+    def count(self, text: str) -> int:
+        return len(self.encode(text))
+
+    def truncate(self, text: str, n: int) -> str:
+        # Decoding a cut token stream can re-encode to a slightly different
+        # length; try nearby cut points before giving up.
+        ids = self.encode(text)
+        for m in (n, n + 1, n - 1, n + 2, n - 2):
+            cut = self.tokenizer.decode(ids[:m])
+            if self.count(cut) == n:
+                return cut
+        raise ValueError(f"Cannot cut text to exactly {n} tokens with this tokenizer")
+
+
+_SIZERS = {}
+
+
+def get_sizer(sentences, tokenizer_path: str = None):
+    """Word sizer for a sentence pool, or a token sizer for tokenizer_path; built once per process."""
+    key = (tuple(sentences), tokenizer_path)
+    if key not in _SIZERS:
+        if tokenizer_path is None:
+            _SIZERS[key] = WordSizer(sentences)
+        else:
+            _SIZERS[key] = TokenSizer(tokenizer_path, sentences)
+    return _SIZERS[key]
+
+
+def pick_sentences(need: int, lengths, rng):
+    """Choose sentences until their lengths cover need.
+
+    Returns (picks, last, rest): whole sentences picks, then the first rest
+    units of sentence last. With a random.Random rng, sentences are drawn one
+    at a time exactly as the original implementation did, so output is
+    byte-identical. With a NumPy Generator, the whole sequence is drawn in one
+    call and the cut point is found on the cumulative lengths.
+    """
+    import numpy as np
+    if isinstance(rng, random.Random):
+        ids = range(len(lengths))
+        picks = []
+        while need > 0:
+            j = rng.choice(ids)
+            picks.append(j)
+            need -= lengths[j]
+        last = picks.pop()
+        return picks, last, int(lengths[last] + need)
+
+    draws = rng.integers(len(lengths), size=-(-need // int(lengths.min())))
+    cum = np.cumsum(lengths[draws])
+    k = int(np.searchsorted(cum, need))
+    rest = need - (int(cum[k - 1]) if k else 0)
+    return draws[:k].tolist(), int(draws[k]), rest
+
+
+# -------------------------------
+# Output
+# -------------------------------
+
+
+def unshare(path: str, keep: bool = False):
+    """Make sure writing to path cannot modify another name for the same file.
+
+    Outputs restored from the dataset cache are hard links into it; a later
+    run writing to the same path must create a new file rather than truncate
+    the cached one. Cached files are read-only, which outlives the link once
+    the entry is evicted, so such files are replaced too. With keep, the
+    current contents are copied to the new file (for appending); otherwise
+    the link is simply removed.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return
+    if not os.path.isfile(path) or (st.st_nlink < 2 and st.st_mode & stat.S_IWUSR):
+        return
+    if not keep:
+        os.unlink(path)
+        return
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".unshare-")
+    os.close(fd)
+    shutil.copyfile(path, tmp)
+    os.replace(tmp, path)
+
+
+def open_output(path: str, append: bool = False):
+    """Open path for streaming text output.
+
+    A ".gz" or ".zst" suffix selects compression. Compressed output is
+    written without timestamps so identical inputs give identical bytes.
+    append continues an uncompressed file (see --resume). An existing file
+    restored from the dataset cache is replaced, not overwritten.
+    """
+    unshare(path, keep=append)
+    if path.endswith(".gz"):
+        raw = open(path, "wb")
+        gz = gzip.GzipFile(filename="", mode="wb", fileobj=raw, mtime=0)
+        return _TextOutput(gz, raw)
+    if path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            sys.exit(f"Writing {path} requires the 'zstandard' package (pip install zstandard)")
+        raw = open(path, "wb")
+        return _TextOutput(zstandard.ZstdCompressor().stream_writer(raw, closefd=False), raw)
+    return open(path, "a" if append else "w", newline="", encoding="utf-8")
+
+
+class _TextOutput(io.TextIOWrapper):
+    """Text wrapper around a compressor that also closes the underlying file."""
+
+    def __init__(self, stream, raw):
+        super().__init__(stream, encoding="utf-8", newline="")
+        self._raw = raw
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._raw.close()
+
+
+def is_jsonl(path: str) -> bool:
+    """True for .jsonl outputs, compressed or not."""
+    for suffix in (".gz", ".zst"):
+        if path.endswith(suffix):
+            path = path[: -len(suffix)]
+    return path.endswith(".jsonl")
+
+
+def csv_field(value):
+    """value as csv.writer's default dialect writes it, or None if that needs csv itself.
+
+    csv.writer inspects every character in Python; long prompts without line
+    breaks only need a comma/quote check and quote doubling, done by str methods.
+    """
+    if isinstance(value, int):
+        return str(value)
+    if not isinstance(value, str) or "\r" in value or "\n" in value:
+        return None
+    if "," in value or '"' in value:
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def update_digest(digest, row):
+    """Feed one row to digest, independently of the output format and compression."""
+    digest.update(json.dumps(row, ensure_ascii=False, default=int).encode("utf-8"))
+    digest.update(b"\n")
+
+
+class RowWriter:
+    """Write rows as CSV or JSON Lines, chosen by the output path suffix.
+
+    With a hashlib digest, the header and every row are also fed to it (see
+    update_digest), so the same rows give the same checksum in any format.
+    """
+
+    def __init__(self, f, path: str, fieldnames, lineterminator: str = "\n", header: bool = True,
+                 digest=None):
+        self.fieldnames = fieldnames
+        self.digest = digest
+        if digest is not None:
+            update_digest(digest, fieldnames)
+        self.jsonl = is_jsonl(path)
+        self.f = f
+        if self.jsonl:
+            return
+        self.lineterminator = lineterminator
+        self.writer = csv.writer(f, lineterminator=lineterminator)
+        if header:
+            self.writer.writerow(fieldnames)
+
+    def writerow(self, row):
+        if self.digest is not None:
+            update_digest(self.digest, row)
+        if self.jsonl:
+            self.f.write(json.dumps(dict(zip(self.fieldnames, row)), ensure_ascii=False))
+            self.f.write("\n")
+            return
+        fields = [csv_field(value) for value in row]
+        if None in fields:
+            self.writer.writerow(row)
+        else:
+            self.f.write(",".join(fields) + self.lineterminator)
+
+
+def ordered_map(executor, fn, tasks, window):
+    """Like executor.map, but results come back in task order with at most
+    window tasks in flight, so a slow writer bounds memory use."""
+    pending = collections.deque()
+    for task in tasks:
+        pending.append(executor.submit(fn, task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def parse_tiers(value: str):
+    """Parse '10,25,100:5000' into [(10, None), (25, None), (100, 5000)]"""
+    tiers = []
+    try:
+        for item in value.split(","):
+            rate, _, count = item.strip().partition(":")
+            tiers.append((int(rate), int(count) if count else None))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected rate[:count],... got '{value}'")
+    if any(rate < 1 or (count is not None and count < 1) for rate, count in tiers):
+        raise argparse.ArgumentTypeError("tier rates and counts must be >= 1")
+    return tiers
+
+
+# -------------------------------
+# Checksums
+# -------------------------------
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def numpy_version() -> str:
+    """Installed NumPy version. Its Generator streams may change between releases (NEP 19)."""
+    import numpy as np
+    return np.__version__
+
+
+def check_numpy_version(path: str, recipe: dict):
+    """Exit unless recipe (read from path) was made with the installed NumPy; older recipes do not say."""
+    made_with = recipe.get("numpy_version")
+    if made_with and made_with != numpy_version():
+        sys.exit(
+            f"{path} was made with NumPy {made_with}, but {numpy_version()} is installed and its random "
+            f"streams may differ; install numpy=={made_with} to reproduce it"
+        )
+
+
+def recipe_id(recipe: dict) -> str:
+    """Content hash of a recipe, over every field except the id itself."""
+    body = {k: v for k, v in recipe.items() if k != "id"}
+    return hashlib.sha256(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()
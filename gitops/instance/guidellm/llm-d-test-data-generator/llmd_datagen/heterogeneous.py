@@ -0,0 +1,1343 @@
+import csv
+import hashlib
+import json
+import math
+import os
+import argparse
+import collections
+import functools
+import itertools
+import sys
+
+from . import common
+from .cache import DatasetCache, output_format, parse_size
+from .common import (
+    RowWriter, check_numpy_version, file_sha256, is_jsonl, make_rng, numpy_version, open_output, ordered_map,
+    parse_tiers, pick_sentences, recipe_id, unshare,
+)
+
+
+# -------------------------------
+# Helpers
+# -------------------------------
+
+
+# Base sentences that can be used to construct prompts of varying lengths
+BASE_SENTENCES = [
+    "The application processes data from multiple sources and transforms it according to predefined rules and business logic.",
+    "A distributed system coordinates tasks across several nodes to ensure consistent and reliable operation.",
+    "The algorithm analyzes patterns in historical data to predict future trends and optimize resource allocation.",
+    "Modern architectures balance scalability requirements with maintainability concerns and operational complexity.",
+    "The framework provides abstractions that simplify common tasks while maintaining flexibility for custom implementations.",
+    "Performance monitoring tools track metrics across the system and alert operators when thresholds are exceeded.",
+    "The service layer mediates between presentation and data access to enforce business rules and validation logic.",
+    "Caching strategies improve response times by storing frequently accessed data in memory rather than fetching it repeatedly.",
+    "The configuration system allows administrators to adjust behavior without modifying code or redeploying services.",
+    "Authentication mechanisms verify user identity through various methods including passwords, tokens, and biometric data.",
+    "Load balancers distribute incoming requests across multiple servers to prevent any single instance from being overwhelmed.",
+    "The database schema organizes information into tables with relationships that reflect the domain model and access patterns.",
+    "Error handling routines catch exceptions, log diagnostic information, and return meaningful messages to the caller.",
+    "The API gateway routes requests to appropriate backend services and aggregates responses before returning to clients.",
+    "Deployment pipelines automate testing, building, and releasing software to reduce manual effort and human error.",
+    "The message queue decouples producers from consumers and provides buffering when processing rates differ significantly.",
+    "Security policies restrict access to sensitive resources based on roles, permissions, and contextual factors.",
+    "The logging infrastructure captures events at different levels and stores them for analysis and troubleshooting.",
+    "Data validation ensures that inputs conform to expected formats and constraints before being processed or persisted.",
+    "The scheduler manages background jobs and ensures they execute at appropriate times without interfering with interactive workloads.",
+    "Backup procedures create copies of critical data and test restoration processes to minimize downtime during failures.",
+    "The network layer handles communication between components using protocols that ensure reliable and ordered delivery.",
+    "Testing frameworks enable developers to write automated checks that verify functionality and catch regressions early.",
+    "The orchestration system coordinates complex workflows involving multiple services and manages state across steps.",
+    "Documentation provides guidance for developers, operators, and end users about features, configuration, and troubleshooting.",
+    "The middleware pipeline processes requests through a series of steps that perform authentication, logging, and transformation.",
+    "Resource management utilities monitor consumption of CPU, memory, and storage to prevent exhaustion and degradation.",
+    "The notification system delivers alerts through various channels including email, SMS, and push messages.",
+    "Version control tracks changes to source code and enables collaboration among team members working on shared files.",
+    "The analytics platform aggregates metrics from disparate sources and presents them in dashboards for decision making.",
+]
+
+
+@functools.lru_cache(maxsize=None)
+def get_sizer(tokenizer_path: str = None):
+    """Word sizer over the base sentences, or a token sizer for tokenizer_path; built once per process."""
+    return common.get_sizer(BASE_SENTENCES, tokenizer_path)
+
+
+def make_prompt_with_index(index: int, target_words: int, rng, sizer=None) -> str:
+    """
+    Create a prompt with exactly target_words words (or tokens, with a token sizer).
+    The index appears in the first 10 words to prevent prefix caching.
+    """
+    sizer = sizer or get_sizer()
+
+    # Start with a unique prefix containing the index
+    prefix = f"Request number {index}:"
+    prefix_len = sizer.count(prefix)
+    if target_words <= prefix_len:
+        return sizer.truncate(prefix, target_words)
+
+    # Add sentences until we reach the target, then trim to the exact count
+    picks, last, rest = pick_sentences(target_words - prefix_len, sizer.lengths, rng)
+    text = prefix + "".join(map(sizer.spaced.__getitem__, picks))
+    partial = sizer.partials[last].get(rest)
+    if partial is None:
+        # No clean cut inside this sentence; fall back to cutting the token stream.
+        return sizer.truncate(text + " " + BASE_SENTENCES[last], target_words)
+    return text + partial
+
+
+# -------------------------------
+# Workload spec
+# -------------------------------
+
+
+WorkloadClass = collections.namedtuple("WorkloadClass", ["name", "weight", "isl", "osl"])
+
+
+def read_histogram(path: str):
+    """Read an empirical length distribution from CSV.
+
+    The file needs a 'value' column and may have a 'weight' or 'count'
+    column; without one every row (e.g. an observed request) counts once.
+    """
+    import numpy as np
+    values, weights = [], []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            values.append(int(float(row["value"])))
+            weights.append(float(row.get("weight") or row.get("count") or 1))
+    if not values:
+        raise ValueError(f"Empirical histogram {path} has no rows")
+    return np.array(values), np.cumsum(weights)
+
+
+def make_length_sampler(spec: dict, base_dir: str = "."):
+    """Build rng -> int for one length distribution of a workload class.
+
+    Supported distributions (key 'dist'):
+      fixed      value
+      uniform    min, max (inclusive)
+      lognormal  median, sigma (of the underlying normal)
+      empirical  csv (see read_histogram), relative to the spec file
+    Every distribution accepts optional 'min'/'max' clamps; lengths are at least 1.
+    """
+    import numpy as np
+    kind = spec.get("dist", "fixed")
+    if kind == "fixed":
+        value = int(spec["value"])
+        draw = lambda rng: value
+    elif kind == "uniform":
+        low, high = int(spec["min"]), int(spec["max"])
+        draw = lambda rng: int(rng.integers(low, high + 1))
+    elif kind == "lognormal":
+        mu, sigma = math.log(spec["median"]), float(spec["sigma"])
+        draw = lambda rng: int(round(rng.lognormal(mu, sigma)))
+    elif kind == "empirical":
+        values, cum_weights = read_histogram(os.path.join(base_dir, spec["csv"]))
+        draw = lambda rng: int(
+            values[np.searchsorted(cum_weights, rng.random() * cum_weights[-1], side="right")]
+        )
+    else:
+        raise ValueError(f"Unknown length distribution '{kind}' (expected fixed, uniform, lognormal or empirical)")
+
+    low = max(1, int(spec.get("min", 1)))
+    high = int(spec["max"]) if "max" in spec else None
+
+    def sample(rng) -> int:
+        n = max(low, draw(rng))
+        return min(n, high) if high is not None else n
+
+    return sample
+
+
+def read_workload_spec(path: str) -> dict:
+    """Parse a JSON or YAML workload spec file without interpreting it."""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                sys.exit(f"Reading {path} requires PyYAML (pip install pyyaml)")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+@functools.lru_cache(maxsize=None)
+def load_workload_spec(path: str) -> list:
+    """Load the workload classes from a JSON or YAML spec file.
+
+    {"classes": [{"name": "chat", "weight": 0.7,
+                  "isl": {"dist": "lognormal", "median": 500, "sigma": 0.6},
+                  "osl": {"dist": "uniform", "min": 100, "max": 400}}, ...]}
+    """
+    spec = read_workload_spec(path)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    classes = []
+    for i, c in enumerate(spec.get("classes") or []):
+        name = c.get("name", f"class-{i}")
+        weight = float(c.get("weight", 1))
+        if weight <= 0:
+            raise ValueError(f"Workload class '{name}' needs a positive weight")
+        if "isl" not in c or "osl" not in c:
+            raise ValueError(f"Workload class '{name}' needs both 'isl' and 'osl' distributions")
+        classes.append(WorkloadClass(
+            name,
+            weight,
+            make_length_sampler(c["isl"], base_dir),
+            make_length_sampler(c["osl"], base_dir),
+        ))
+    if not classes:
+        raise ValueError(f"Workload spec {path} defines no classes")
+    return classes
+
+
+def make_spec_row(index: int, seed: int, classes: list, sizer=None, with_prompt: bool = True):
+    """Sample row index of a workload spec: (class position, prompt, isl, osl).
+
+    Each row draws its class, lengths and text from its own generator seeded
+    by (seed, index), so the interleaving is deterministic and independent of
+    how rows are sharded.
+    """
+    import numpy as np
+    rng = np.random.default_rng([seed, index])
+    cum_weights = np.cumsum([c.weight for c in classes])
+    k = int(np.searchsorted(cum_weights, rng.random() * cum_weights[-1], side="right"))
+    isl = classes[k].isl(rng)
+    osl = classes[k].osl(rng)
+    prompt = make_prompt_with_index(index, isl, rng, sizer) if with_prompt else None
+    return k, prompt, isl, osl
+
+
+def print_mix_summary(dataset, rows, unit: str):
+    """Print realized share and ISL/OSL percentiles per workload class."""
+    import numpy as np
+    isl_by_class = collections.defaultdict(list)
+    osl_by_class = collections.defaultdict(list)
+    for row in rows:
+        isl_by_class[row.workload].append(row.prompt_tokens)
+        osl_by_class[row.workload].append(row.output_tokens_count)
+    if dataset.workload_spec:
+        names = [c.name for c in load_workload_spec(dataset.workload_spec)]
+    else:
+        names = ["N", "M"]
+
+    total = sum(len(v) for v in isl_by_class.values())
+    print(f"\n==== Realized workload mix ({total} prompts, ISL in {unit}, OSL in tokens):")
+    print(f"{'class':<20} {'share':>7} {'ISL p50':>8} {'p90':>7} {'p99':>7} {'OSL p50':>8} {'p90':>7} {'p99':>7}")
+    for name in names:
+        isl = np.array(isl_by_class.get(name, []))
+        osl = np.array(osl_by_class.get(name, []))
+        if not len(isl):
+            print(f"{name:<20} {0:>6.1%}")
+            continue
+        ip = np.percentile(isl, [50, 90, 99])
+        op = np.percentile(osl, [50, 90, 99])
+        print(
+            f"{name:<20} {len(isl) / total:>6.1%} {ip[0]:>8.0f} {ip[1]:>7.0f} {ip[2]:>7.0f}"
+            f" {op[0]:>8.0f} {op[1]:>7.0f} {op[2]:>7.0f}"
+        )
+
+
+# -------------------------------
+# Ordering
+# -------------------------------
+
+
+ORDERINGS = ["modulo", "shuffle", "bursty", "drift", "adversarial"]
+
+Ordering = collections.namedtuple(
+    "Ordering", ["strategy", "burst_length", "drift_period", "drift_amplitude", "window"],
+    defaults=["modulo", 8, 0, 1.0, 32],
+)
+
+_LAYOUTS = {}
+
+
+def get_layout(ordering: Ordering, n_count: int, m_count: int, seed: int):
+    """(is_m, m_upto) arrays for a non-modulo ordering; built once per process.
+
+    is_m[i] says whether position i holds an M prompt and m_upto[i] counts the
+    M prompts at positions <= i, so the rank of a prompt within its class is
+    a lookup and any row can still be built on its own.
+    """
+    key = (ordering, n_count, m_count, seed)
+    if key not in _LAYOUTS:
+        import numpy as np
+        is_m = make_order(ordering, n_count, m_count, np.random.default_rng([seed, 7]))
+        _LAYOUTS[key] = is_m, np.cumsum(is_m, dtype=np.int64)
+    return _LAYOUTS[key]
+
+
+def make_order(ordering: Ordering, n_count: int, m_count: int, rng):
+    """Boolean array placing n_count N and m_count M prompts according to ordering.strategy.
+
+    shuffle      uniformly random positions
+    bursty       alternating runs of each class with geometric lengths; M runs
+                 average burst_length, N runs keep the overall ratio
+    drift        the M share follows a sine over drift_period rows (the whole
+                 dataset if 0), between (1 - drift_amplitude) and
+                 (1 + drift_amplitude) times its mean
+    adversarial  M prompts in bursts of `window`, each preceded by an equal
+                 share of the N prompts
+    """
+    import numpy as np
+    total = n_count + m_count
+    is_m = np.zeros(total, dtype=bool)
+    strategy = ordering.strategy
+    if strategy == "shuffle":
+        is_m[:m_count] = True
+        rng.shuffle(is_m)
+    elif strategy == "bursty":
+        mean = {True: ordering.burst_length, False: ordering.burst_length * n_count / max(m_count, 1)}
+        left = {True: m_count, False: n_count}
+        kind = bool(rng.random() < m_count / max(total, 1))
+        pos = 0
+        while pos < total:
+            if not left[kind]:
+                kind = not kind
+            run = min(int(rng.geometric(1 / max(mean[kind], 1))), left[kind])
+            is_m[pos:pos + run] = kind
+            pos += run
+            left[kind] -= run
+            kind = not kind
+    elif strategy == "drift":
+        period = ordering.drift_period or total
+        weight = 1 + ordering.drift_amplitude * np.sin(2 * np.pi * np.arange(total) / period)
+        # Weighted sampling without replacement (Efraimidis-Spirakis): the
+        # m_count largest log(u) / weight win
+        keys = np.log(rng.random(total)) / np.maximum(weight, 1e-9)
+        if m_count:
+            is_m[np.argpartition(keys, total - m_count)[total - m_count:]] = True
+    elif strategy == "adversarial":
+        # A window of long prefills completing together is the largest KV
+        # transfer burst the decode pool can receive; the N prompts before it
+        # keep the decode slots busy when it lands. Bursts start on window
+        # boundaries so that each fills one window.
+        window = ordering.window
+        bursts = -(-m_count // window)
+        for b in range(bursts):
+            start = (n_count * (b + 1) // bursts + b * window) // window * window
+            is_m[start:start + min(window, m_count - b * window)] = True
+    else:
+        raise ValueError(f"Unknown ordering '{strategy}' (expected one of {', '.join(ORDERINGS)})")
+    return is_m
+
+
+def longest_run(mask):
+    """(length, start) of the longest run of True in a boolean array."""
+    import numpy as np
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    if not len(edges):
+        return 0, 0
+    lengths = edges[1::2] - edges[::2]
+    k = int(np.argmax(lengths))
+    return int(lengths[k]), int(edges[2 * k])
+
+
+def print_load_analysis(isl, osl, window: int, unit: str, pd_threshold: int = 0, first_row: int = 0,
+                        report: str = None, top: int = 5, segments: int = 20):
+    """Print the prefill and decode load per window of consecutive requests.
+
+    With a benchmark concurrency of about `window`, a window approximates
+    what the deployment holds in flight at once. Prompts of at least
+    pd_threshold are counted as remote prefills, whose KV cache is
+    transferred from the prefill to the decode pool. report, if given,
+    receives one CSV row per window.
+    """
+    import numpy as np
+    isl, osl = np.asarray(isl, dtype=np.int64), np.asarray(osl, dtype=np.int64)
+    if not len(isl):
+        return
+    starts = np.arange(0, len(isl), window)
+    remote_mask = isl >= pd_threshold
+    long_mask = remote_mask if pd_threshold else isl > np.median(isl)
+    prefill = np.add.reduceat(isl, starts)
+    remote = np.add.reduceat(np.where(remote_mask, isl, 0), starts)
+    remote_requests = np.add.reduceat(remote_mask.astype(np.int64), starts)
+    long_requests = np.add.reduceat(long_mask.astype(np.int64), starts)
+    decode = np.add.reduceat(osl, starts)
+
+    # A partial last window would understate the minimum and percentiles
+    full = len(isl) // window or 1
+    mean = prefill[:full].mean()
+    p50, p95 = np.percentile(prefill[:full], [50, 95])
+    print(f"\n==== Load per {window}-request window ({len(starts)} windows, prompts in {unit}, outputs in tokens):")
+    print(
+        f"==== Prefill: mean {mean:,.0f}, p50 {p50:,.0f}, p95 {p95:,.0f}, max {prefill.max():,} "
+        f"({prefill.max() / mean:.1f}x mean)"
+    )
+    print(
+        f"==== Remote prefill / KV transfer (prompts >= {pd_threshold} {unit}): {remote.sum() / prefill.sum():.1%} "
+        f"of the prefill load, up to {remote.max():,} {unit} in {remote_requests.max()} requests per window"
+    )
+    print(f"==== Decode: mean {decode[:full].mean():,.0f}, min {decode[:full].min():,}, max {decode[:full].max():,}")
+    run, run_start = longest_run(long_mask)
+    long_label = f">= {pd_threshold}" if pd_threshold else f"> {np.median(isl):.0f}"
+    print(f"==== Longest run of long prompts ({long_label} {unit}): {run} requests from row {first_row + run_start}")
+
+    print("==== Heaviest windows:")
+    print(f"    {'rows':<17} {'prefill':>10} {'remote':>7} {'long':>5} {'decode':>8}")
+    for w in sorted(np.argsort(-prefill, kind="stable")[:top]):
+        lo = first_row + int(starts[w])
+        hi = lo + window - 1 if w + 1 < len(starts) else first_row + len(isl) - 1
+        rows = f"{lo}..{hi}"
+        print(f"    {rows:<17} {prefill[w]:>10,} {remote_requests[w]:>7} {long_requests[w]:>5} {decode[w]:>8,}")
+
+    parts = np.array_split(np.arange(len(starts)), min(segments, len(starts)))
+    means = [prefill[part].mean() for part in parts]
+    print("==== Mean prefill per window over the dataset:")
+    for part, value in zip(parts, means):
+        lo = first_row + int(starts[part[0]])
+        hi = first_row + min(int(starts[part[-1]]) + window, len(isl)) - 1
+        rows = f"{lo}..{hi}"
+        print(f"    {rows:<17} {'#' * round(40 * value / max(means)):<40} {value:>10,.0f}")
+
+    if report:
+        with open(report, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["window", "first_row", "last_row", "prefill", "remote_prefill",
+                             "remote_requests", "long_requests", "decode"])
+            for w, lo in enumerate(starts):
+                hi = min(int(lo) + window, len(isl)) - 1
+                writer.writerow([w, first_row + int(lo), first_row + hi, prefill[w], remote[w],
+                                 remote_requests[w], long_requests[w], decode[w]])
+        print(f"==== Per-window load saved to {report}")
+
+
+# -------------------------------
+# Dataset
+# -------------------------------
+
+
+PromptRow = collections.namedtuple(
+    "PromptRow", ["prompt", "output_tokens_count", "prompt_tokens", "workload"]
+)
+
+
+class HeterogeneousDataset:
+    """Random-access heterogeneous workload: dataset[i] builds row i on its own.
+
+    Every prompt depends only on the seed and its position, so any row or
+    slice is produced without generating the rows before it. This is what
+    makes sharding (--shard) and resuming (--resume) cheap. Rows are PromptRow
+    tuples; prompt_tokens is the target length in the sizer's unit.
+
+    ordering places the N and M prompts (see make_order); any ordering holds
+    the same prompts, only their positions change.
+    """
+
+    def __init__(self, total_prompts: int, n_words: int = 500, m_words: int = 10000,
+                 ratio: int = 9, output_tokens: int = 250, seed: int = 42,
+                 start_index: int = 1, legacy: bool = False, tokenizer_path: str = None,
+                 workload_spec: str = None, ordering: Ordering = Ordering(),
+                 n_output_tokens: int = None, m_output_tokens: int = None):
+        self.total_prompts = total_prompts
+        self.n_words = n_words
+        self.m_words = m_words
+        self.ratio = ratio
+        self.output_tokens = output_tokens
+        self.n_output_tokens = output_tokens if n_output_tokens is None else n_output_tokens
+        self.m_output_tokens = output_tokens if m_output_tokens is None else m_output_tokens
+        self.ordering = ordering
+        self.seed = seed
+        self.start_index = start_index
+        self.legacy = legacy
+        self.tokenizer_path = tokenizer_path
+        self.workload_spec = workload_spec
+        # Calculate number of prompts for each type based on ratio
+        self.n_count = int(total_prompts * (ratio / (ratio + 1)))
+        self.m_count = total_prompts - self.n_count
+
+    def __len__(self) -> int:
+        return self.total_prompts
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.row(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("dataset index out of range")
+        return self.row(i)
+
+    def row(self, i: int, with_prompt: bool = True) -> PromptRow:
+        """Row at position i; with_prompt=False samples lengths only."""
+        sizer = get_sizer(self.tokenizer_path)
+        if self.workload_spec:
+            classes = load_workload_spec(self.workload_spec)
+            k, prompt, isl, osl = make_spec_row(
+                self.start_index + i, self.seed, classes, sizer, with_prompt
+            )
+            return PromptRow(prompt, osl, isl, classes[k].name)
+
+        if self.ordering.strategy == "modulo":
+            # Follow the N:M ratio pattern: every (RATIO + 1)-th position, starting
+            # at 0, is an M prompt (e.g. 3:1 -> M, N, N, N, M, N, N, N, ...)
+            block = self.ratio + 1
+            is_m = i % block == 0
+            rank = i // block if is_m else i - i // block - 1
+        else:
+            flags, m_upto = get_layout(self.ordering, self.n_count, self.m_count, self.seed)
+            is_m = bool(flags[i])
+            rank = int(m_upto[i]) - 1 if is_m else i - int(m_upto[i])
+        if is_m:
+            # Different seed range to ensure variety
+            seed, index, target, osl, workload = (
+                self.seed + 10000 + rank, self.n_count + rank + self.start_index, self.m_words,
+                self.m_output_tokens, "M",
+            )
+        else:
+            seed, index, target, osl, workload = (
+                self.seed + rank, rank + self.start_index, self.n_words, self.n_output_tokens, "N"
+            )
+        prompt = None
+        if with_prompt:
+            prompt = make_prompt_with_index(index, target, make_rng(seed, self.legacy), sizer)
+        return PromptRow(prompt, osl, target, workload)
+
+    def rows(self, start: int, stop: int, with_prompt: bool = True) -> list:
+        return [self.row(i, with_prompt) for i in range(start, stop)]
+
+    def lengths(self, start: int = 0, stop: int = None):
+        """(prompt lengths, output token counts) of rows [start, stop) as arrays, without building prompts."""
+        import numpy as np
+        stop = len(self) if stop is None else stop
+        if self.workload_spec:
+            rows = self.rows(start, stop, with_prompt=False)
+            return (np.array([r.prompt_tokens for r in rows], dtype=np.int64),
+                    np.array([r.output_tokens_count for r in rows], dtype=np.int64))
+        is_m = self.m_flags(start, stop)
+        return (np.where(is_m, self.m_words, self.n_words),
+                np.where(is_m, self.m_output_tokens, self.n_output_tokens))
+
+    def m_flags(self, start: int = 0, stop: int = None):
+        """Boolean array: True where a row of [start, stop) is an M prompt (N/M workloads only)."""
+        import numpy as np
+        stop = len(self) if stop is None else stop
+        if self.ordering.strategy == "modulo":
+            return np.arange(start, stop) % (self.ratio + 1) == 0
+        return get_layout(self.ordering, self.n_count, self.m_count, self.seed)[0][start:stop]
+
+    def find(self, workload: str, start: int = 0, stop: int = None):
+        """Position of the first row of workload "N" or "M" in [start, stop), or None."""
+        import numpy as np
+        hits = np.flatnonzero(self.m_flags(start, stop) == (workload == "M"))
+        return start + int(hits[0]) if len(hits) else None
+
+    def iter_rows(self, start: int = 0, stop: int = None, workers: int = 1,
+                  shard_size: int = 256, with_prompt: bool = True):
+        """Yield rows [start, stop) in order, generated across worker processes if workers > 1."""
+        stop = len(self) if stop is None else stop
+        if workers <= 1:
+            for i in range(start, stop):
+                yield self.row(i, with_prompt)
+            return
+        from concurrent.futures import ProcessPoolExecutor
+
+        tasks = (
+            (self, lo, min(lo + shard_size, stop), with_prompt)
+            for lo in range(start, stop, shard_size)
+        )
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for shard in ordered_map(executor, _dataset_shard, tasks, window=2 * workers):
+                yield from shard
+
+
+def _dataset_shard(task):
+    dataset, start, stop, with_prompt = task
+    return dataset.rows(start, stop, with_prompt)
+
+
+def iter_heterogeneous_prompts(total_prompts: int = 10000, n_words: int = 500, m_words: int = 10000,
+                               ratio: int = 9, output_tokens: int = 250, seed: int = 42,
+                               start_index: int = 1, workers: int = 1, legacy_random: bool = False,
+                               tokenizer: str = None, workload_spec: str = None, ordering="modulo"):
+    """Yield the rows of a heterogeneous dataset as (prompt, output_tokens_count).
+
+    Same rows, in the same order, as --output-csv with the matching options,
+    without writing a file. With tokenizer (a local tokenizer.json), lengths
+    are in tokens instead of words; with workload_spec, the spec's classes
+    replace the N/M options. ordering is a strategy name or an Ordering.
+    """
+    if isinstance(ordering, str):
+        ordering = Ordering(ordering)
+    dataset = HeterogeneousDataset(
+        total_prompts, n_words, m_words, ratio, output_tokens, seed, start_index,
+        legacy_random, tokenizer, workload_spec, ordering,
+    )
+    for row in dataset.iter_rows(workers=workers):
+        yield row.prompt, row.output_tokens_count
+
+
+def shard_bounds(total: int, shard: int, num_shards: int):
+    """Contiguous [start, stop) row range of shard (0-based) out of num_shards."""
+    return total * shard // num_shards, total * (shard + 1) // num_shards
+
+
+def shard_output_path(path: str, shard: int, num_shards: int) -> str:
+    """heterogeneous.csv -> heterogeneous.shard-0-of-4.csv (compression suffix kept last)."""
+    compression = ""
+    for suffix in (".gz", ".zst"):
+        if path.endswith(suffix):
+            path, compression = path[: -len(suffix)], suffix
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard-{shard}-of-{num_shards}{ext}{compression}"
+
+
+def completed_lines(path: str) -> int:
+    """Count complete lines in a partly written output, truncating a torn last line."""
+    lines, end, pos = 0, 0, 0
+    with open(path, "r+b") as f:
+        while chunk := f.read(1 << 20):
+            lines += chunk.count(b"\n")
+            last = chunk.rfind(b"\n")
+            if last >= 0:
+                end = pos + last + 1
+            pos += len(chunk)
+        f.truncate(end)
+    return lines
+
+
+def params_path(path: str) -> str:
+    return path + ".params.json"
+
+
+def write_params(path: str, fields: dict):
+    """Record what the rows of path are generated from (see cache_fields), for --resume to check."""
+    with open(params_path(path), "w", encoding="utf-8") as f:
+        json.dump({**fields, "id": recipe_id(fields)}, f, indent=2)
+        f.write("\n")
+
+
+def check_resume(path: str, fields: dict):
+    """Exit unless the rows already in path were generated from fields, as recorded by write_params."""
+    if not os.path.exists(path):
+        return
+    try:
+        with open(params_path(path), encoding="utf-8") as f:
+            recorded = json.load(f)
+    except FileNotFoundError:
+        sys.exit(
+            f"Cannot resume {path}: {params_path(path)} is missing, so the options its rows were generated "
+            f"with are unknown; remove {path} or run without --resume"
+        )
+    if recorded.get("id") == recipe_id(fields):
+        return
+    # Compare as JSON, where tuples have become lists
+    fields = json.loads(json.dumps(fields))
+    changed = [k for k in fields["params"] if recorded.get("params", {}).get(k) != fields["params"][k]]
+    changed += [k for k in fields if k != "params" and recorded.get(k) != fields[k]]
+    sys.exit(
+        f"Cannot resume {path}: its rows were generated with a different {', '.join(changed) or 'generator'}; "
+        f"rerun with the original options, or without --resume to start over"
+    )
+
+
+# -------------------------------
+# Main generation
+# -------------------------------
+
+
+def parse_shard(value: str):
+    """Parse 'k/K' into (k, K) with 0 <= k < K."""
+    try:
+        shard, num_shards = (int(v) for v in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected k/K, got '{value}'")
+    if not 0 <= shard < num_shards:
+        raise argparse.ArgumentTypeError(f"shard must satisfy 0 <= k < K, got '{value}'")
+    return shard, num_shards
+
+
+def add_workload_args(parser):
+    """Options shared by the single-dataset CLI and the sweep subcommand."""
+    parser.add_argument(
+        "--workload-n-words",
+        type=int,
+        default=500,
+        help="Number of input words (tokens with --target-unit tokens) for workload type N (default: 500)"
+    )
+    parser.add_argument(
+        "--workload-m-words",
+        type=int,
+        default=10000,
+        help="Number of input words (tokens with --target-unit tokens) for workload type M (default: 10000)"
+    )
+    parser.add_argument(
+        "--ratio-n-to-m",
+        type=int,
+        default="9",
+        help="Ratio of N to M prompts (e.g., '9' means 9 N prompts for every 1 M prompt"
+    )
+    parser.add_argument(
+        "--output-tokens",
+        type=int,
+        default=250,
+        help="Number of output tokens to generate (default: 250)"
+    )
+    parser.add_argument(
+        "--workload-n-output-tokens",
+        type=int,
+        default=None,
+        help="Output tokens of N prompts, e.g. long outputs for short prompts (default: --output-tokens)"
+    )
+    parser.add_argument(
+        "--workload-m-output-tokens",
+        type=int,
+        default=None,
+        help="Output tokens of M prompts, e.g. short outputs for long prompts (default: --output-tokens)"
+    )
+    parser.add_argument(
+        "--ordering",
+        choices=ORDERINGS,
+        default="modulo",
+        help="Placement of the M prompts: 'modulo' puts one first in every block of RATIO + 1; 'shuffle' at "
+             "seeded random positions; 'bursty' in runs of --burst-length on average; 'drift' with an M share "
+             "that rises and falls over --drift-period rows; 'adversarial' in bursts of --window, each after an "
+             "equal share of the N prompts (default: modulo)"
+    )
+    parser.add_argument(
+        "--burst-length",
+        type=int,
+        default=8,
+        help="Mean length of a run of M prompts with --ordering bursty (default: 8)"
+    )
+    parser.add_argument(
+        "--drift-period",
+        type=int,
+        default=0,
+        help="Rows per cycle of the M share with --ordering drift; 0 is the whole dataset (default: 0)"
+    )
+    parser.add_argument(
+        "--drift-amplitude",
+        type=float,
+        default=1.0,
+        help="Relative swing of the M share with --ordering drift, from 0 (none) to 1 (between none and twice "
+             "the mean) (default: 1.0)"
+    )
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=32,
+        help="Requests per window of the load analysis and per M burst of --ordering adversarial; set it to "
+             "the benchmark concurrency (default: 32)"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=42,
+        help="Random seed for reproducibility (default: 42)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes used to generate prompts; 0 uses all CPUs. Output is identical for any value (default: 1)"
+    )
+    parser.add_argument(
+        "--legacy-random",
+        action="store_true",
+        help="Pick sentences with random.Random one at a time, reproducing the output of earlier versions byte for byte (slower)"
+    )
+    parser.add_argument(
+        "--target-unit",
+        choices=["words", "tokens"],
+        default="words",
+        help="Unit for --workload-n-words/--workload-m-words; 'tokens' needs --tokenizer and adds a prompt_tokens column (default: words)"
+    )
+    parser.add_argument(
+        "--tokenizer",
+        type=str,
+        default=None,
+        help="Path to a local tokenizer.json used with --target-unit tokens"
+    )
+    parser.add_argument(
+        "--workload-spec",
+        type=str,
+        default=None,
+        help="JSON/YAML file listing weighted workload classes with ISL/OSL distributions; replaces the N/M options. "
+             "Rows are streamed to --output-csv (.jsonl and .gz/.zst suffixes supported)"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=os.environ.get("LLMD_DATAGEN_CACHE"),
+        help="Content-addressed dataset cache: an output whose parameters, sentence pool and input files match an "
+             "earlier run is hard-linked (or copied) from here instead of regenerated (default: $LLMD_DATAGEN_CACHE, "
+             "unset disables it)"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=parse_size,
+        default=parse_size("20G"),
+        help="Size bound of --cache-dir; least recently used datasets are evicted beyond it (default: 20G)"
+    )
+    parser.add_argument(
+        "--verify",
+        type=int,
+        nargs="?",
+        const=16,
+        default=0,
+        help="On a cache hit, check the file's checksum and compare N (16 if omitted) sampled rows with a fresh "
+             "regeneration; a stale entry is dropped and regenerated (default: 0)"
+    )
+
+
+def check_workload_args(parser, args):
+    if args.workers < 0:
+        parser.error("--workers must be >= 0")
+    if args.verify < 0:
+        parser.error("--verify must be >= 0")
+    if args.target_unit == "tokens" and not args.tokenizer:
+        parser.error("--target-unit tokens requires --tokenizer")
+    if args.target_unit == "words":
+        args.tokenizer = None
+    if args.workload_spec and args.legacy_random:
+        parser.error("--legacy-random cannot be combined with --workload-spec")
+    if args.workload_spec and (args.ordering != "modulo" or args.workload_n_output_tokens is not None
+                               or args.workload_m_output_tokens is not None):
+        parser.error("--ordering and --workload-n/m-output-tokens apply to the N/M workload, not --workload-spec")
+    if args.burst_length < 1 or args.window < 1 or args.drift_period < 0:
+        parser.error("--burst-length and --window must be >= 1 and --drift-period >= 0")
+    if not 0 <= args.drift_amplitude <= 1:
+        parser.error("--drift-amplitude must be between 0 and 1")
+    args.workers = args.workers or os.cpu_count()
+    if args.workload_spec:
+        try:
+            load_workload_spec(args.workload_spec)
+        except (KeyError, ValueError) as e:
+            parser.error(f"invalid workload spec {args.workload_spec}: {e}")
+
+
+def make_ordering(args) -> Ordering:
+    return Ordering(args.ordering, args.burst_length, args.drift_period, args.drift_amplitude, args.window)
+
+
+def write_dataset(dataset, path: str, start: int = 0, stop: int = None, workers: int = 1,
+                  resume: bool = False, digest=None) -> list:
+    """Stream rows [start, stop) of dataset to path.
+
+    Returns (workload, prompt_tokens, output_tokens_count) for every row
+    written; with resume, rows already complete in path are skipped. A
+    hashlib digest, if given, receives the rows written (see RowWriter).
+    """
+    stop = len(dataset) if stop is None else stop
+    sizer = get_sizer(dataset.tokenizer_path)
+    columns = ["prompt", "output_tokens_count"]
+    if dataset.tokenizer_path:
+        columns.append("prompt_tokens")
+
+    # Continue after the last complete row of an interrupted run
+    done = 0
+    appending = False
+    if resume and os.path.exists(path):
+        unshare(path, keep=True)
+        lines = completed_lines(path)
+        appending = lines > 0
+        done = lines - 1 if appending and not is_jsonl(path) else lines
+        print(f"==== Resuming after {done} completed rows")
+
+    written = []
+    with open_output(path, append=appending) as f:
+        writer = RowWriter(f, path, columns, header=not appending, digest=digest)
+        for i, row in enumerate(dataset.iter_rows(start + done, stop, workers)):
+            # Quick sanity checks for first few prompts
+            assert i >= 3 or sizer.count(row.prompt) == row.prompt_tokens, (
+                f"{row.workload} prompt {start + done + i} has {sizer.count(row.prompt)} {sizer.unit}, "
+                f"expected {row.prompt_tokens}"
+            )
+            writer.writerow(list(row[: len(columns)]))
+            written.append((row.workload, row.prompt_tokens, row.output_tokens_count))
+    return written
+
+
+def _write_tier(task):
+    """Write one sweep tier; returns the sha256 of its rows, or None without with_digest."""
+    dataset, path, workers, with_digest = task
+    digest = hashlib.sha256() if with_digest else None
+    write_dataset(dataset, path, workers=workers, digest=digest)
+    print(f"Wrote {len(dataset)} prompts (ids from {dataset.start_index}) to {path}")
+    return digest.hexdigest() if digest else None
+
+
+def sweep(argv=None):
+    """Generate every concurrency tier in one process and write a manifest.
+
+    Tiers get consecutive, non-overlapping start indices and are written in
+    parallel (largest first) across --workers processes; the sentence tables
+    and tokenizer are loaded once per process.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    parser = argparse.ArgumentParser(
+        prog="heterogeneous-workload-generator.py sweep",
+        description="Generate one heterogeneous dataset per concurrency tier in a single process, "
+                    "with non-overlapping prompt indices, and write a manifest mapping each rate to its file"
+    )
+    parser.add_argument(
+        "--tiers",
+        type=parse_tiers,
+        default=parse_tiers("10,25,50,100"),
+        help="Comma-separated concurrency rates, each optionally with ':total-prompts' (default: 10,25,50,100)"
+    )
+    parser.add_argument(
+        "--prompts-per-rate",
+        type=int,
+        default=10,
+        help="Prompts per unit of rate for tiers without an explicit count (default: 10)"
+    )
+    parser.add_argument(
+        "--start-index",
+        type=int,
+        default=1,
+        help="Start index of the first tier; later tiers continue from there (default: 1)"
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        default=".",
+        help="Directory for the datasets and manifest (default: current directory)"
+    )
+    parser.add_argument(
+        "--output-template",
+        type=str,
+        default="heterogeneous-{rate}.csv",
+        help="File name of each tier's dataset (default: heterogeneous-{rate}.csv)"
+    )
+    parser.add_argument(
+        "--manifest",
+        type=str,
+        default="sweep-manifest.json",
+        help="Manifest file name, written to --output-dir (default: sweep-manifest.json)"
+    )
+    add_workload_args(parser)
+    args = parser.parse_args(argv)
+    check_workload_args(parser, args)
+    if args.prompts_per_rate < 1:
+        parser.error("--prompts-per-rate must be >= 1")
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    tiers = []
+    start_index = args.start_index
+    for rate, total in args.tiers:
+        total = total or rate * args.prompts_per_rate
+        dataset = HeterogeneousDataset(
+            total, args.workload_n_words, args.workload_m_words, args.ratio_n_to_m,
+            args.output_tokens, args.seed, start_index, args.legacy_random, args.tokenizer,
+            args.workload_spec, make_ordering(args), args.workload_n_output_tokens,
+            args.workload_m_output_tokens,
+        )
+        path = os.path.join(args.output_dir, args.output_template.format(rate=rate))
+        tiers.append((rate, dataset, path))
+        start_index += total
+
+    cache = DatasetCache(args.cache_dir, args.cache_size) if args.cache_dir else None
+    pending = tiers
+    keys = {}
+    if cache:
+        pending = []
+        for rate, dataset, path in tiers:
+            params = vars(args).copy()
+            params.update(total_prompts=len(dataset), start_index=dataset.start_index, shard=None)
+            keys[path] = cache.key(cache_fields(argparse.Namespace(**params), path))
+            expected = expected_rows(dataset, 0, len(dataset))
+            if cache.fetch(keys[path], {"prompts": path}, args.verify, expected) is None:
+                pending.append((rate, dataset, path))
+
+    largest_first = [(d, p) for _, d, p in sorted(pending, key=lambda t: len(t[1]), reverse=True)]
+    if args.workers > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=min(args.workers, len(pending))) as executor:
+            tasks = [(d, p, 1, cache is not None) for d, p in largest_first]
+            results = list(executor.map(_write_tier, tasks))
+    else:
+        results = [_write_tier((d, p, args.workers, cache is not None)) for d, p in largest_first]
+    if cache:
+        for (dataset, path), sha256 in zip(largest_first, results):
+            cache.store(keys[path], {"prompts": path}, {"rows": len(dataset), "sha256": sha256})
+
+    manifest = {
+        "generator": "heterogeneous-workload-generator",
+        "target_unit": args.target_unit,
+        "workload_spec": args.workload_spec,
+        "workload_n": args.workload_n_words,
+        "workload_m": args.workload_m_words,
+        "ratio_n_to_m": args.ratio_n_to_m,
+        "output_tokens": args.output_tokens,
+        "seed": args.seed,
+        "ordering": args.ordering,
+        "tiers": [
+            {
+                "rate": rate,
+                "data": os.path.relpath(path, args.output_dir),
+                "start_index": dataset.start_index,
+                "total_prompts": len(dataset),
+            }
+            for rate, dataset, path in tiers
+        ],
+    }
+    manifest_path = os.path.join(args.output_dir, args.manifest)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    print(f"\nSuccessfully generated {len(tiers)} tiers; manifest saved to {manifest_path}")
+
+
+# -------------------------------
+# Recipes
+# -------------------------------
+
+RECIPE_VERSION = 1
+
+# Parameters that, with the sentence pool and workload spec, determine the output
+RECIPE_PARAMS = [
+    "total_prompts", "start_index", "workload_n_words", "workload_m_words", "ratio_n_to_m",
+    "output_tokens", "seed", "legacy_random", "target_unit", "shard", "workload_n_output_tokens",
+    "workload_m_output_tokens", "ordering", "burst_length", "drift_period", "drift_amplitude", "window",
+]
+
+
+def pool_version() -> str:
+    """Short hash of the sentences the prompts are built from."""
+    digest = hashlib.sha256()
+    for text in BASE_SENTENCES:
+        digest.update(text.encode("utf-8") + b"\0")
+    return digest.hexdigest()[:16]
+
+
+def write_recipe(path: str, args, rows: int, sha256: str):
+    recipe = {
+        "recipe": RECIPE_VERSION,
+        "generator": "heterogeneous-workload-generator",
+        "pool_version": pool_version(),
+        "numpy_version": numpy_version(),
+        "params": {name: getattr(args, name) for name in RECIPE_PARAMS},
+        "tokenizer_sha256": file_sha256(args.tokenizer) if args.tokenizer else None,
+        "workload_spec_sha256": workload_spec_sha256(args.workload_spec) if args.workload_spec else None,
+        "rows": rows,
+        "sha256": sha256,
+    }
+    recipe["id"] = recipe_id(recipe)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(recipe, f, indent=2)
+        f.write("\n")
+    print(f"Recipe {recipe['id'][:12]} saved to {path}")
+
+
+def workload_spec_sha256(path: str) -> str:
+    """sha256 of a workload spec together with the empirical histograms it references."""
+    digest = hashlib.sha256(file_sha256(path).encode("ascii"))
+    base_dir = os.path.dirname(os.path.abspath(path))
+    for c in read_workload_spec(path).get("classes") or []:
+        for key in ("isl", "osl"):
+            if c.get(key, {}).get("dist") == "empirical":
+                digest.update(file_sha256(os.path.join(base_dir, c[key]["csv"])).encode("ascii"))
+    return digest.hexdigest()
+
+
+def cache_fields(args, path: str) -> dict:
+    """Everything the output of args written to path depends on; hashed into its cache key."""
+    return {
+        "generator": "heterogeneous-workload-generator",
+        "pool_version": pool_version(),
+        "numpy_version": numpy_version(),
+        "params": {name: getattr(args, name) for name in RECIPE_PARAMS},
+        "tokenizer_sha256": file_sha256(args.tokenizer) if args.tokenizer else None,
+        "workload_spec_sha256": workload_spec_sha256(args.workload_spec) if args.workload_spec else None,
+        "format": output_format(path),
+    }
+
+
+def expected_rows(dataset, start: int, stop: int) -> dict:
+    """role -> (rows, index -> row) rebuilding single rows of dataset[start:stop], for --verify."""
+    width = 3 if dataset.tokenizer_path else 2
+    return {"prompts": (stop - start, lambda k: list(dataset.row(start + k)[:width]))}
+
+
+def load_recipe(path: str, tokenizer_path: str = None, workload_spec: str = None) -> dict:
+    """Read a recipe and check it can be reproduced here; exits with a message otherwise."""
+    with open(path, encoding="utf-8") as f:
+        recipe = json.load(f)
+    if recipe.get("recipe") != RECIPE_VERSION or recipe.get("generator") != "heterogeneous-workload-generator":
+        sys.exit(f"{path} is not a heterogeneous-workload-generator recipe (version {RECIPE_VERSION})")
+    if recipe.get("id") != recipe_id(recipe):
+        sys.exit(f"{path} has been modified: its content hash does not match its id")
+    if recipe["pool_version"] != pool_version():
+        sys.exit(
+            f"{path} was made with sentence pool {recipe['pool_version']}, but this generator has "
+            f"{pool_version()}; use the generator version that made it"
+        )
+    check_numpy_version(path, recipe)
+    for option, value, expected, sha256, what in [
+        ("--tokenizer", tokenizer_path, recipe["tokenizer_sha256"], file_sha256, "file"),
+        ("--workload-spec", workload_spec, recipe["workload_spec_sha256"], workload_spec_sha256,
+         "file, with the histograms it references,"),
+    ]:
+        if not expected:
+            continue
+        if not value:
+            sys.exit(f"{path} needs the file it was made with; pass it with {option}")
+        if sha256(value) != expected:
+            sys.exit(f"{value} is not the {option} {what} {path} was made with")
+    return recipe
+
+
+def materialize(argv=None):
+    """Rebuild a recipe's dataset, streaming it to a file or named pipe, and verify it.
+
+    A dataset that does not match the recipe's checksum is deleted (unless it
+    went to a pipe) and the exit status is non-zero.
+    """
+    parser = argparse.ArgumentParser(
+        prog="heterogeneous-workload-generator.py materialize",
+        description="Rebuild the dataset described by a recipe and verify it against the recipe's checksum"
+    )
+    parser.add_argument("recipe", help="Recipe written with --output-recipe")
+    parser.add_argument(
+        "--output-csv",
+        type=str,
+        default="heterogeneous-prompts.csv",
+        help="Output file, or a named pipe read by guidellm; .jsonl and .gz/.zst suffixes supported "
+             "(default: heterogeneous-prompts.csv)"
+    )
+    parser.add_argument(
+        "--mkfifo",
+        action="store_true",
+        help="Create --output-csv as a named pipe if it does not exist; rows are written as the reader consumes them"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes used to generate prompts; 0 uses all CPUs (default: 1)"
+    )
+    parser.add_argument(
+        "--tokenizer",
+        type=str,
+        default=None,
+        help="Local tokenizer.json; required for recipes that count tokens"
+    )
+    parser.add_argument(
+        "--workload-spec",
+        type=str,
+        default=None,
+        help="Workload spec file; required for recipes made from one"
+    )
+    args = parser.parse_args(argv)
+    if args.workers < 0:
+        parser.error("--workers must be >= 0")
+    recipe = load_recipe(args.recipe, args.tokenizer, args.workload_spec)
+    params = recipe["params"]
+
+    # Recipes from before --ordering have the default modulo layout
+    ordering = Ordering(*(params.get(name, default) for name, default in zip(
+        ["ordering", "burst_length", "drift_period", "drift_amplitude", "window"], Ordering()
+    )))
+    dataset = HeterogeneousDataset(
+        params["total_prompts"], params["workload_n_words"], params["workload_m_words"],
+        params["ratio_n_to_m"], params["output_tokens"], params["seed"], params["start_index"],
+        params["legacy_random"], args.tokenizer if recipe["tokenizer_sha256"] else None,
+        args.workload_spec if recipe["workload_spec_sha256"] else None, ordering,
+        params.get("workload_n_output_tokens"), params.get("workload_m_output_tokens"),
+    )
+    start, stop = 0, len(dataset)
+    if params["shard"]:
+        start, stop = shard_bounds(len(dataset), *params["shard"])
+
+    if args.mkfifo and not os.path.exists(args.output_csv):
+        os.mkfifo(args.output_csv)
+    print(f"==== Materializing recipe {recipe['id'][:12]} ({recipe['rows']} rows) to {args.output_csv}")
+
+    digest = hashlib.sha256()
+    written = write_dataset(dataset, args.output_csv, start, stop, args.workers or os.cpu_count(),
+                            digest=digest)
+
+    if len(written) != recipe["rows"] or digest.hexdigest() != recipe["sha256"]:
+        if os.path.isfile(args.output_csv):
+            os.remove(args.output_csv)
+        sys.exit(f"Checksum mismatch: {args.output_csv} does not reproduce recipe {recipe['id'][:12]}")
+    print(f"==== Verified: sha256 {recipe['sha256'][:12]} matches the recipe")
+
+
+def main(argv=None):
+    if argv and argv[0] == "sweep":
+        return sweep(argv[1:])
+    if argv and argv[0] == "materialize":
+        return materialize(argv[1:])
+
+    parser = argparse.ArgumentParser(
+        description="Generate heterogeneous workload with two interleaved prompt types",
+        epilog="Run '%(prog)s sweep --help' to generate several concurrency tiers in one invocation, "
+               "or '%(prog)s materialize --help' to rebuild a dataset from a recipe."
+    )
+    parser.add_argument(
+        "--total-prompts",
+        type=int,
+        default=10000,
+        help="Total number of prompts to generate (default: 10000)"
+    )
+    parser.add_argument(
+        "--output-csv",
+        type=str,
+        default="heterogeneous-prompts.csv",
+        help="Output CSV file path (default: heterogeneous-prompts.csv)"
+    )
+    parser.add_argument(
+        "--start-index",
+        type=int,
+        default=1,
+        help="Start index for the prompts (default: 1)"
+    )
+    add_workload_args(parser)
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only print the load analysis (and, with --workload-spec, the realized ISL/OSL summary per class) "
+             "without generating any text"
+    )
+    parser.add_argument(
+        "--pd-threshold",
+        type=int,
+        default=0,
+        help="Prompt length (in --target-unit) from which the P/D scheduler sends a request to the prefill pool; "
+             "the load analysis counts those prompts as KV transfers (default: 0, every prompt)"
+    )
+    parser.add_argument(
+        "--load-report",
+        type=str,
+        default=None,
+        help="Also write the per-window load analysis to this CSV file"
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        help="Generate only shard k of K ('k/K', 0-based, e.g. $JOB_COMPLETION_INDEX/4). "
+             "Output goes to <name>.shard-k-of-K<ext>"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run from the last complete row of the existing (uncompressed) output; "
+             "refused unless its <output>.params.json shows the same generation options"
+    )
+    parser.add_argument(
+        "--output-recipe",
+        type=str,
+        default=None,
+        help="Also write a recipe (a few KB) from which the 'materialize' subcommand rebuilds and verifies the output"
+    )
+
+    args = parser.parse_args(argv)
+    check_workload_args(parser, args)
+    if args.resume and args.output_csv.endswith((".gz", ".zst")):
+        parser.error("--resume needs an uncompressed .csv or .jsonl output")
+    if args.resume and args.output_recipe:
+        parser.error("--output-recipe cannot be combined with --resume")
+    if args.resume:
+        # A partly written output is never a cache entry
+        args.cache_dir = None
+
+    N_WORDS = args.workload_n_words
+    M_WORDS = args.workload_m_words
+    TOTAL_PROMPTS = args.total_prompts
+    RATIO = args.ratio_n_to_m
+    OUTPUT_TOKENS = args.output_tokens
+    OUTPUT_FILE = args.output_csv
+    SEED = args.seed
+    START_INDEX = args.start_index
+    WORKERS = args.workers
+    LEGACY = args.legacy_random
+    TOKENIZER = args.tokenizer
+    UNIT = get_sizer(TOKENIZER).unit
+
+    dataset = HeterogeneousDataset(
+        TOTAL_PROMPTS, N_WORDS, M_WORDS, RATIO, OUTPUT_TOKENS, SEED, START_INDEX,
+        LEGACY, TOKENIZER, args.workload_spec, make_ordering(args),
+        args.workload_n_output_tokens, args.workload_m_output_tokens,
+    )
+
+    if args.workload_spec:
+        print(f"==== Generating workload from spec: {args.workload_spec}")
+        for c in load_workload_spec(args.workload_spec):
+            print(f"==== Class {c.name}: weight {c.weight:g}")
+    else:
+        print(f"==== Generating heterogeneous workload:")
+        print(f"==== Workload N: {N_WORDS} {UNIT}, {dataset.n_count} prompts")
+        print(f"==== Workload M: {M_WORDS} {UNIT}, {dataset.m_count} prompts")
+    print(f"==== Total prompts: {TOTAL_PROMPTS}")
+    if not args.workload_spec:
+        if dataset.n_output_tokens == dataset.m_output_tokens:
+            print(f"==== Output tokens per prompt: {OUTPUT_TOKENS}")
+        else:
+            print(f"==== Output tokens per prompt: N {dataset.n_output_tokens}, M {dataset.m_output_tokens}")
+        print(f"==== Ordering: {args.ordering}")
+    print(f"==== Random seed: {SEED}")
+
+    start, stop = 0, len(dataset)
+    if args.shard:
+        shard, num_shards = args.shard
+        start, stop = shard_bounds(len(dataset), shard, num_shards)
+        OUTPUT_FILE = shard_output_path(OUTPUT_FILE, shard, num_shards)
+        print(f"==== Shard {shard}/{num_shards}: rows {start}..{stop - 1}")
+
+    # Lengths of N/M rows are known without sampling, so their analysis is
+    # always printed; spec rows are sampled one by one, only for --dry-run
+    if not args.workload_spec or args.dry_run:
+        isl, osl = dataset.lengths(start, stop)
+        print_load_analysis(isl, osl, args.window, UNIT, args.pd_threshold, start, args.load_report)
+    if args.dry_run:
+        if args.workload_spec:
+            print_mix_summary(dataset, dataset.iter_rows(start, stop, WORKERS, with_prompt=False), UNIT)
+        return
+
+    fields = cache_fields(args, OUTPUT_FILE)
+    if args.resume:
+        check_resume(OUTPUT_FILE, fields)
+    resumable = not OUTPUT_FILE.endswith((".gz", ".zst"))
+    if resumable and (os.path.isfile(OUTPUT_FILE) or not os.path.exists(OUTPUT_FILE)):
+        write_params(OUTPUT_FILE, fields)
+
+    cache = DatasetCache(args.cache_dir, args.cache_size) if args.cache_dir else None
+    info = None
+    if cache:
+        key = cache.key(fields)
+        info = cache.fetch(key, {"prompts": OUTPUT_FILE}, args.verify, expected_rows(dataset, start, stop))
+    if info is not None:
+        # Only the lengths are needed for the summary below
+        written = [
+            (row.workload, row.prompt_tokens, row.output_tokens_count)
+            for row in dataset.iter_rows(start, stop, with_prompt=False)
+        ]
+        sha256 = info["sha256"]
+    else:
+        digest = hashlib.sha256() if args.output_recipe or cache else None
+        written = write_dataset(dataset, OUTPUT_FILE, start, stop, WORKERS, args.resume, digest)
+        sha256 = digest.hexdigest() if digest else None
+        if cache:
+            cache.store(key, {"prompts": OUTPUT_FILE}, {"rows": len(written), "sha256": sha256})
+
+    print(f"\nSuccessfully generated {len(written)} prompts")
+    print(f"Output saved to: {OUTPUT_FILE}")
+    if args.output_recipe:
+        write_recipe(args.output_recipe, args, len(written), sha256)
+
+    if args.workload_spec:
+        # Lengths of rows from an earlier, resumed run are re-sampled cheaply
+        done = stop - start - len(written)
+        earlier = dataset.iter_rows(start, start + done, with_prompt=False)
+        written = [PromptRow(None, osl, isl, w) for w, isl, osl in written]
+        print_mix_summary(dataset, itertools.chain(earlier, written), UNIT)
+        return
+
+    # Print summary statistics
+    print("\nFirst 5 rows:")
+    for i, row in enumerate(dataset[start:min(start + 5, stop)]):
+        print(f"{start + i:>6}  {row.workload}  {row.prompt[:60]}...  {row.output_tokens_count}")
+    print("\nSample prompts (first 100 chars):")
+    for workload in ("N", "M"):
+        i = dataset.find(workload, start, stop)
+        if i is not None:
+            print(f"Workload {workload}: {dataset[i].prompt[:100]}...")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
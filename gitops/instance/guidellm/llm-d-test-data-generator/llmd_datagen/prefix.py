@@ -0,0 +1,1080 @@
+import contextlib
+import hashlib
+import json
+import textwrap
+import argparse
+import collections
+import functools
+import os
+import sys
+
+from . import common
+from .cache import DatasetCache, output_format, parse_size
+from .common import (
+    RowWriter, check_numpy_version, file_sha256, make_rng, normalize, numpy_version, open_output, ordered_map,
+    parse_tiers, pick_sentences, recipe_id,
+)
+
+# -------------------------------
+# Helpers
+# -------------------------------
+
+
+def make_base_prefix() -> str:
+    base = """
+    The project began as a simple curiosity about how people share context. A small team looked at the way
+    long prompts flowed through a system and noticed that many early sentences said the same thing again and again.
+    They wrote notes about repetition, alignment, and the invisible friction that appears when a model must read
+    familiar paragraphs before it reaches anything new. The team proposed a study that would demonstrate why
+    prefix-aware routing matters, not as a trick of engineering, but as a quiet improvement in everyday experience.
+    They chose to write in plain and sturdy English so that anyone could skim the pages and still understand the point.
+    The introduction framed a question: if a service can recognize an already-seen beginning, can it spare effort, time,
+    and energy by reusing what it already knows? The group suspected that the answer was yes, but they also believed
+    that the demonstration should be gentle, measurable, and honest about tradeoffs. They decided to build a dataset
+    of paired prompts where the second part meaningfully continues the first. Each pair would resemble a calm essay,
+    with paragraphs that move at an even pace, never rushing, never leaning on jargon, never demanding specialist knowledge.
+    They wrote examples about communities, tools, learning, and the patient rhythms of maintenance. They gave names to
+    recurring ideas: shared context, stable ground, incremental novelty, careful transitions, and endings that feel earned.
+    Paragraph by paragraph, they drew a path across familiar terrain, noting how predictability can be a gift. A reader
+    who recognizes the early sections can focus attention on the fresh material that follows. An engine that recognizes
+    the early sections can reuse cached work and save effort for what truly changes. The team wanted prose that was
+    specific enough to feel real while remaining broadly applicable. They spoke about kitchens, libraries, workshops,
+    classrooms, neighborhoods, and gardens. They emphasized the kindness of clear signposts, steady tempo, and
+    smooth handoffs between sections. They also noted risks: if a system guesses wrong about a prefix, it can add
+    confusion rather than clarity. So each example would be constructed with careful seams, obvious transitions,
+    and natural cues that signal continuity. In this way, the dataset would be useful for demonstration, inspection,
+    and repeatable measurement. The group hoped that anyone who read a sample would see the intuitive appeal of
+    cache-aware routing long before they looked at charts or timing numbers. They trusted that the writing itself
+    could serve as evidence, because good structure wastes nothing and gives attention back to the reader.
+    """
+    return textwrap.dedent(base).strip()
+
+
+def make_base_continuation() -> str:
+    base = """
+    The continuation begins at the seam where the introduction hands off to deeper detail. It respects what is already
+    known and adds substance without breaking tone. The team shifts from questions to practices, walking slowly through
+    examples that a reader can visualize. First, they describe a library desk where a patron asks for a well-known guide.
+    The librarian smiles because the guide sits in a public binder, already highlighted, already tabbed. Instead of
+    rewriting the guide, the librarian says, "Turn to the section you need; the first pages are unchanged." The patron
+    appreciates the small mercy. Next, the team describes a kitchen where cooks prepare a base stock every morning. When
+    lunch begins, nobody remakes the stock; they build upon it with fresh ingredients. Finally, they describe a workshop
+    where the same checklist starts each repair. Mechanics do not resent the checklist. They appreciate that it catches
+    what routine can forget. These scenes are ordinary on purpose, because the goal is not spectacle but calm reliability.
+    The continuation explains that a cache is a promise to remember shared beginnings so that attention can shift toward
+    what is new. It then details safeguards: validation of the reused prefix, clear boundaries for where reuse stops, and
+    transparent logs that help engineers see when routing decisions succeed or fail. It also discusses fairness, noting
+    that cached work must be accurate, current, and appropriate for the request at hand. The text neither hurries nor
+    stalls; it moves with the cadence of a thoughtful walkthrough, always returning to the reader with signposts that say,
+    "Here is what changed," and, "Here is what stayed the same."
+    """
+    return textwrap.dedent(base).strip()
+
+
+# Filler sentences used to pad out to exact word counts
+FILLER_SENTENCES = [
+    "This sentence maintains the calm tempo and reinforces the central thread of reuse and careful change.",
+    "The writing keeps an even stride, trading spectacle for clarity and quiet confidence.",
+    "Each paragraph tries to waste nothing, offering small details that feel steady rather than dramatic.",
+    "Readers should sense continuity without needing to decipher jargon or decode sudden leaps in logic.",
+    "The examples remain ordinary on purpose, because ordinary tasks reveal the value of dependable structure.",
+    "At every turn the prose names what is shared first, and only then points gently to what is new.",
+    "When familiar ground appears, the text acknowledges it openly and moves ahead without lingering.",
+    "A measured voice invites trust, and trust lets the reader notice improvements that might otherwise hide.",
+    "The goal is transparency, not surprise; the lesson is patient rather than performative.",
+    "By echoing known phrases, the passage guides attention toward the moment where novelty begins.",
+    "The cadence is the same as before: simple words, clear transitions, and respect for the reader's time.",
+    "Nothing essential is rushed; nothing trivial is allowed to sprawl.",
+    "Where a claim is made, an example follows; where an example appears, a reason accompanies it.",
+    "Structure becomes a kind of kindness, returning minutes to people who have many tasks to finish.",
+    "The text keeps circling back to the theme that good routing honors both memory and change.",
+    "If a seam is visible, it is visible on purpose, so that the reader can step across without stumbling.",
+    "Practicality outweighs novelty here; the point is usefulness that lasts beyond the page.",
+    "Even the metaphors are familiar, chosen to welcome rather than to impress.",
+    "The passage stays specific enough to be testable and general enough to travel.",
+    "Small repetitions are not mistakes; they are signposts that help readers track the path.",
+    "The narrative knows where it came from and declares where it is going.",
+    "Every figure of speech earns its place by serving the explanation rather than decorating it.",
+    "When doubt appears, the text slows down and states assumptions in plain view.",
+    "The argument prefers daylight to mystery, procedure to flourish.",
+    "Taken together, these sentences model the very economy the system aims to provide.",
+]
+
+
+@functools.lru_cache(maxsize=None)
+def get_sizer(tokenizer_path: str = None):
+    """Word sizer over the filler sentences, or a token sizer for tokenizer_path; built once per process."""
+    return common.get_sizer(FILLER_SENTENCES, tokenizer_path)
+
+
+def pad_to_length(base_text: str, target: int, rng, sizer=None, base_len: int = None) -> str:
+    """Pad base_text with filler sentences until it measures exactly target.
+
+    sizer measures in words by default (see get_sizer). base_len, if given,
+    is the size of an already single-spaced base_text.
+    """
+    sizer = sizer or get_sizer()
+    if base_len is None:
+        base_text = normalize(base_text)
+        base_len = sizer.count(base_text)
+    if base_len >= target:
+        return sizer.truncate(base_text, target)
+
+    picks, last, rest = pick_sentences(target - base_len, sizer.lengths, rng)
+    text = base_text + "".join(map(sizer.spaced.__getitem__, picks))
+    partial = sizer.partials[last].get(rest)
+    if partial is None:
+        # No clean cut inside this sentence; fall back to cutting the token stream.
+        return sizer.truncate(text + " " + FILLER_SENTENCES[last], target)
+    return text + partial
+
+
+# -------------------------------
+# Main generation
+# -------------------------------
+
+
+def add_generation_args(p):
+    """Options shared by the single-dataset CLI and the sweep subcommand."""
+    p.add_argument(
+        "--target-prefix-words",
+        type=int,
+        default=5000,
+        help="Word count for each prefix section (token count with --target-unit tokens). Defaults to 5000.",
+    )
+    p.add_argument(
+        "--target-continuation-words",
+        type=int,
+        default=1000,
+        help="Word count for each continuation section (token count with --target-unit tokens). Defaults to 1000.",
+    )
+    p.add_argument(
+        "--output-tokens",
+        type=int,
+        default=250,
+        help="Synthetic output token count annotation for each prompt row. Defaults to 250.",
+    )
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes used to generate pairs; 0 uses all CPUs. Output is identical for any value. Defaults to 1.",
+    )
+    p.add_argument(
+        "--legacy-random",
+        action="store_true",
+        help="Pick filler sentences with random.Random one at a time, reproducing the output of earlier versions byte for byte (slower).",
+    )
+    p.add_argument(
+        "--target-unit",
+        choices=["words", "tokens"],
+        default="words",
+        help="Unit for --target-prefix-words/--target-continuation-words. 'tokens' needs --tokenizer and adds a prompt_tokens column. Defaults to words.",
+    )
+    p.add_argument(
+        "--tokenizer",
+        type=str,
+        default=None,
+        help="Path to a local tokenizer.json used with --target-unit tokens (e.g. the model's tokenizer.json).",
+    )
+    p.add_argument(
+        "--cache-dir",
+        type=str,
+        default=os.environ.get("LLMD_DATAGEN_CACHE"),
+        help="Content-addressed dataset cache: outputs whose parameters and sentence pools match an earlier run "
+        "are hard-linked (or copied) from here instead of regenerated. Defaults to $LLMD_DATAGEN_CACHE; unset disables it.",
+    )
+    p.add_argument(
+        "--cache-size",
+        type=parse_size,
+        default=parse_size("20G"),
+        help="Size bound of --cache-dir; least recently used datasets are evicted beyond it. Defaults to 20G.",
+    )
+    p.add_argument(
+        "--verify",
+        type=int,
+        nargs="?",
+        const=16,
+        default=0,
+        help="On a cache hit, check the files' checksums and compare N (default 16) sampled rows of each "
+        "output with a fresh regeneration; a stale entry is dropped and regenerated.",
+    )
+
+
+def check_generation_args(p, args):
+    if args.start_index < 1:
+        p.error("--start-index must be >= 1")
+    if args.output_tokens < 1:
+        p.error("--output-tokens must be >= 1")
+    if args.workers < 0:
+        p.error("--workers must be >= 0")
+    if args.verify < 0:
+        p.error("--verify must be >= 0")
+    if args.target_unit == "tokens" and not args.tokenizer:
+        p.error("--target-unit tokens requires --tokenizer")
+    if args.target_unit == "words":
+        args.tokenizer = None
+    args.workers = args.workers or os.cpu_count()
+
+
+def parse_args(argv=None):
+    """Parse command line arguments.
+
+    Only --start-index was requested; a few extra optional args are provided as
+    low-risk conveniences for smaller test runs or tuning without editing code.
+    """
+    p = argparse.ArgumentParser(
+        description="Generate paired prefix + continuation prompts for cache-aware routing demos",
+        epilog="Run '%(prog)s sweep --help' to generate several concurrency tiers in one invocation, "
+        "'%(prog)s tree --help' for a multi-turn, shared-system-prompt workload, or "
+        "'%(prog)s materialize --help' to rebuild a dataset from a recipe.",
+    )
+    p.add_argument(
+        "--start-index",
+        type=int,
+        default=1,
+        help="Starting pair id (inclusive). Defaults to 1.",
+    )
+    p.add_argument(
+        "--num-pairs",
+        type=int,
+        default=5000,
+        help="Number of pairs to generate beginning at start-index. Defaults to 5000.",
+    )
+    p.add_argument(
+        "--output-prefix-csv",
+        type=str,
+        default="prefix-pairs.csv",
+        help="Output file (side-by-side prefix + full prompt). Use a .jsonl suffix for JSON Lines and .gz/.zst for compression.",
+    )
+    p.add_argument(
+        "--output-guidellm-csv",
+        type=str,
+        default="prefix-prompts.csv",
+        help="Output file formatted for Guidellm consumption. Use a .jsonl suffix for JSON Lines and .gz/.zst for compression.",
+    )
+    p.add_argument(
+        "--chunk-size",
+        type=int,
+        default=200,
+        help="Number of prefix prompts before interleaving same number of continuation prompts (spacing). Also bounds how many pairs are buffered in memory. Defaults to 200.",
+    )
+    p.add_argument(
+        "--output-recipe",
+        type=str,
+        default=None,
+        help="Also write a recipe (a few KB) from which the 'materialize' subcommand rebuilds and verifies the guidellm output.",
+    )
+    add_generation_args(p)
+    args = p.parse_args(argv)
+    check_generation_args(p, args)
+    if args.num_pairs < 1:
+        p.error("--num-pairs must be >= 1")
+    if args.chunk_size < 1:
+        p.error("--chunk-size must be >= 1")
+    return args
+
+
+def parse_sweep_args(argv=None):
+    p = argparse.ArgumentParser(
+        prog="prefix-cache-generator.py sweep",
+        description="Generate one dataset per concurrency tier in a single process, with "
+        "non-overlapping pair ids, and write a manifest mapping each rate to its file",
+    )
+    p.add_argument(
+        "--tiers",
+        type=parse_tiers,
+        default=parse_tiers("10,25,50,100,250:5000,500:10000"),
+        help="Comma-separated concurrency rates, each optionally with ':num-pairs'. "
+        "Defaults to 10,25,50,100,250:5000,500:10000.",
+    )
+    p.add_argument(
+        "--pairs-per-rate",
+        type=int,
+        default=10,
+        help="Pairs per unit of rate for tiers without an explicit count. Defaults to 10.",
+    )
+    p.add_argument(
+        "--chunk-per-rate",
+        type=int,
+        default=2,
+        help="Chunk size per unit of rate. Defaults to 2 (e.g. chunk size 20 for rate 10).",
+    )
+    p.add_argument(
+        "--start-index",
+        type=int,
+        default=1,
+        help="First pair id of the first tier; later tiers continue from there. Defaults to 1.",
+    )
+    p.add_argument(
+        "--output-dir",
+        type=str,
+        default=".",
+        help="Directory for the datasets and manifest. Defaults to the current directory.",
+    )
+    p.add_argument(
+        "--pairs-template",
+        type=str,
+        default="pairs-{rate}.csv",
+        help="File name of each tier's pairs output. Defaults to pairs-{rate}.csv.",
+    )
+    p.add_argument(
+        "--prompts-template",
+        type=str,
+        default="prompts-{rate}.csv",
+        help="File name of each tier's guidellm output. Defaults to prompts-{rate}.csv.",
+    )
+    p.add_argument(
+        "--manifest",
+        type=str,
+        default="sweep-manifest.json",
+        help="Manifest file name, written to --output-dir. Defaults to sweep-manifest.json.",
+    )
+    add_generation_args(p)
+    args = p.parse_args(argv)
+    check_generation_args(p, args)
+    if args.pairs_per_rate < 1 or args.chunk_per_rate < 1:
+        p.error("--pairs-per-rate and --chunk-per-rate must be >= 1")
+    return args
+
+
+def iter_prefixes(start_index, stop_index, prefix_base_template, target_prefix, legacy=False,
+                  tokenizer_path=None):
+    """Yield (pair_id, prefix_text) for pair ids in [start_index, stop_index)."""
+    sizer = get_sizer(tokenizer_path)
+    template = " " + normalize(prefix_base_template)
+    template_len = sizer.count(template)
+    for i in range(start_index, stop_index):
+        # Slightly customize the prefix so each pair is different
+        prefix_intro = (
+            f"This is pair {i}, which demonstrates a long shared prefix that an engine "
+            f"might cache and reuse across requests."
+        )
+        prefix_full_base = prefix_intro + template
+        base_len = sizer.count(prefix_intro) + template_len
+
+        rng = make_rng(i, legacy)  # deterministic variation per pair
+        prefix_text = pad_to_length(prefix_full_base, target_prefix, rng, sizer, base_len)
+
+        yield i, prefix_text
+
+
+def _prefix_shard(task):
+    start_index, stop_index, target_prefix, legacy, tokenizer_path = task
+    return list(
+        iter_prefixes(
+            start_index, stop_index, make_base_prefix(), target_prefix, legacy, tokenizer_path
+        )
+    )
+
+
+def iter_prefixes_parallel(start_index, stop_index, target_prefix, workers, shard_size,
+                           legacy=False, tokenizer_path=None):
+    """Same rows as iter_prefixes, generated in shards across worker processes.
+
+    Every pair is seeded by its own id, so sharding the id range does not
+    change the output.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    tasks = (
+        (lo, min(lo + shard_size, stop_index), target_prefix, legacy, tokenizer_path)
+        for lo in range(start_index, stop_index, shard_size)
+    )
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for shard in ordered_map(executor, _prefix_shard, tasks, window=2 * workers):
+            yield from shard
+
+
+def make_continuation(target_cont, legacy=False, tokenizer_path=None) -> str:
+    """Continuation text shared by every pair, sized with the separating space it gets in the full prompt."""
+    sizer = get_sizer(tokenizer_path)
+    cont_rng = make_rng(9999, legacy)
+    continuation_base = normalize(make_base_continuation())
+    continuation_text = pad_to_length(
+        continuation_base, target_cont, cont_rng, sizer, sizer.count(" " + continuation_base)
+    )
+    assert sizer.count(" " + continuation_text) == target_cont, (
+        f"Continuation not {target_cont} {sizer.unit}"
+    )
+    return continuation_text
+
+
+def iter_prefix_chunks(start_index, stop_index, target_prefix, chunk_size, workers=1, legacy=False,
+                       tokenizer_path=None):
+    """Yield pairs [start_index, stop_index) as lists of up to chunk_size (pair_id, prefix_text).
+
+    Each chunk's prefix prompts are followed by the same number of full
+    prompts in the guidellm output; only one chunk is held in memory.
+    """
+    if workers > 1:
+        prefixes = iter_prefixes_parallel(
+            start_index, stop_index, target_prefix, workers, chunk_size, legacy, tokenizer_path
+        )
+    else:
+        prefixes = iter_prefixes(
+            start_index, stop_index, make_base_prefix(), target_prefix, legacy, tokenizer_path
+        )
+    chunk = []
+    for pair in prefixes:
+        chunk.append(pair)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_prefix_prompts(num_pairs: int = 5000, start_index: int = 1, chunk_size: int = 200,
+                        target_prefix_words: int = 5000, target_continuation_words: int = 1000,
+                        output_tokens: int = 250, workers: int = 1, legacy_random: bool = False,
+                        tokenizer: str = None):
+    """Yield the guidellm rows of a prefix dataset as (prompt, output_tokens_count).
+
+    Same rows, in the same order, as --output-guidellm-csv with the matching
+    options, without writing a file. With tokenizer (a local tokenizer.json),
+    the targets are in tokens instead of words.
+    """
+    continuation_text = make_continuation(target_continuation_words, legacy_random, tokenizer)
+    chunks = iter_prefix_chunks(
+        start_index, start_index + num_pairs, target_prefix_words, chunk_size, workers,
+        legacy_random, tokenizer,
+    )
+    for chunk in chunks:
+        for _, prefix_text in chunk:
+            yield prefix_text, output_tokens
+        for _, prefix_text in chunk:
+            yield prefix_text + " " + continuation_text, output_tokens
+
+
+def write_prefix_dataset(args, continuation_text, digest=None):
+    """Write the pairs and guidellm outputs described by args in one streaming pass.
+
+    Returns the number of guidellm rows. The pairs output is skipped if args.output_prefix_csv is None. A hashlib
+    digest, if given, receives the guidellm rows (see RowWriter).
+    """
+    TARGET_PREFIX = args.target_prefix_words
+    TARGET_CONT = args.target_continuation_words
+    N_PAIRS = args.num_pairs
+    START_INDEX = args.start_index
+    CHUNK_SIZE = args.chunk_size
+    OUTPUT_TOKENS = args.output_tokens
+    output_path = args.output_prefix_csv
+    OUTPUT_PATH = args.output_guidellm_csv
+    WORKERS = args.workers
+    LEGACY = args.legacy_random
+    TOKENIZER = args.tokenizer
+    sizer = get_sizer(TOKENIZER)
+
+    # Both outputs are written in a single pass. Only the prefixes of the
+    # current chunk are held in memory; the full prompt is rebuilt from the
+    # shared continuation when the chunk is written.
+    with contextlib.ExitStack() as stack:
+        prompts_f = stack.enter_context(open_output(OUTPUT_PATH))
+        pairs_writer = None
+        if output_path:
+            pairs_writer = RowWriter(
+                stack.enter_context(open_output(output_path)),
+                output_path,
+                ["pair_id", "prompt_1_prefix", "prompt_2_prefix_plus_continuation"],
+                lineterminator="\r\n",
+            )
+        columns = ["prompt", "output_tokens_count"]
+        prefix_extra, full_extra = [], []
+        if TOKENIZER:
+            columns.append("prompt_tokens")
+            prefix_extra, full_extra = [TARGET_PREFIX], [TARGET_PREFIX + TARGET_CONT]
+        prompts_writer = RowWriter(prompts_f, OUTPUT_PATH, columns, digest=digest)
+
+        chunks = iter_prefix_chunks(
+            START_INDEX, START_INDEX + N_PAIRS, TARGET_PREFIX, CHUNK_SIZE, WORKERS, LEGACY, TOKENIZER
+        )
+        for chunk in chunks:
+            for i, prefix_text in chunk:
+                full_prompt = prefix_text + " " + continuation_text
+
+                # Quick sanity checks for first few pairs
+                if i < START_INDEX + 3:
+                    assert sizer.count(prefix_text) == TARGET_PREFIX, (
+                        f"Prefix length mismatch for pair {i}"
+                    )
+                    assert sizer.count(full_prompt) == TARGET_PREFIX + TARGET_CONT, (
+                        f"Full prompt length mismatch for pair {i}"
+                    )
+
+                if pairs_writer:
+                    pairs_writer.writerow([i, prefix_text, full_prompt])
+
+            # spacing between prefix and continuation blocks when interleaving
+            for _, prefix_text in chunk:
+                prompts_writer.writerow([prefix_text, OUTPUT_TOKENS] + prefix_extra)
+            for _, prefix_text in chunk:
+                prompts_writer.writerow(
+                    [prefix_text + " " + continuation_text, OUTPUT_TOKENS] + full_extra
+                )
+
+    outputs = f"{output_path} and {OUTPUT_PATH}" if output_path else OUTPUT_PATH
+    print(
+        f"Done. Wrote {N_PAIRS} pairs (ids {START_INDEX}..{START_INDEX + N_PAIRS - 1}) to {outputs}."
+    )
+    return 2 * N_PAIRS
+
+
+def _write_tier(task):
+    """Write one sweep tier; returns (rows, sha256 of the rows or None)."""
+    tier, continuation_text, with_digest = task
+    digest = hashlib.sha256() if with_digest else None
+    rows = write_prefix_dataset(tier, continuation_text, digest)
+    return rows, digest.hexdigest() if digest else None
+
+
+def sweep(argv=None):
+    """Generate every concurrency tier in one process and write a manifest.
+
+    The continuation text and split prefix template are built once; tiers get
+    consecutive, non-overlapping pair id ranges and are written in parallel
+    (largest first) across --workers processes.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    args = parse_sweep_args(argv)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    continuation_text = make_continuation(
+        args.target_continuation_words, args.legacy_random, args.tokenizer
+    )
+
+    tiers = []
+    start_index = args.start_index
+    for rate, num_pairs in args.tiers:
+        num_pairs = num_pairs or rate * args.pairs_per_rate
+        tier = vars(args).copy()
+        tier.update(
+            rate=rate,
+            start_index=start_index,
+            num_pairs=num_pairs,
+            chunk_size=rate * args.chunk_per_rate,
+            output_prefix_csv=os.path.join(args.output_dir, args.pairs_template.format(rate=rate)),
+            output_guidellm_csv=os.path.join(args.output_dir, args.prompts_template.format(rate=rate)),
+            workers=1,
+        )
+        tiers.append(argparse.Namespace(**tier))
+        start_index += num_pairs
+
+    cache = DatasetCache(args.cache_dir, args.cache_size) if args.cache_dir else None
+    pending = tiers
+    if cache:
+        pending = []
+        for tier in tiers:
+            tier.cache_key = cache.key(cache_fields(tier))
+            expected = expected_rows(tier, continuation_text)
+            if cache.fetch(tier.cache_key, cache_outputs(tier), args.verify, expected) is None:
+                pending.append(tier)
+
+    largest_first = sorted(pending, key=lambda t: t.num_pairs, reverse=True)
+    tasks = [(tier, continuation_text, cache is not None) for tier in largest_first]
+    if args.workers > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=min(args.workers, len(pending))) as executor:
+            results = list(executor.map(_write_tier, tasks))
+    else:
+        results = []
+        for task in tasks:
+            # A single tier can still use every worker for its own pairs
+            task[0].workers = args.workers
+            results.append(_write_tier(task))
+    if cache:
+        for tier, (rows, sha256) in zip(largest_first, results):
+            cache.store(tier.cache_key, cache_outputs(tier), {"rows": rows, "sha256": sha256})
+
+    manifest = {
+        "generator": "prefix-cache-generator",
+        "target_unit": args.target_unit,
+        "target_prefix": args.target_prefix_words,
+        "target_continuation": args.target_continuation_words,
+        "output_tokens": args.output_tokens,
+        "tiers": [
+            {
+                "rate": t.rate,
+                "data": os.path.relpath(t.output_guidellm_csv, args.output_dir),
+                "pairs": os.path.relpath(t.output_prefix_csv, args.output_dir),
+                "start_index": t.start_index,
+                "num_pairs": t.num_pairs,
+                "chunk_size": t.chunk_size,
+            }
+            for t in tiers
+        ],
+    }
+    manifest_path = os.path.join(args.output_dir, args.manifest)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    print(f"Done. Wrote {len(tiers)} tiers; manifest saved to {manifest_path}.")
+
+
+# -------------------------------
+# Recipes
+# -------------------------------
+
+RECIPE_VERSION = 1
+
+# Parameters that, with the sentence pools, determine the guidellm output
+RECIPE_PARAMS = [
+    "start_index", "num_pairs", "chunk_size", "target_prefix_words", "target_continuation_words",
+    "output_tokens", "legacy_random", "target_unit",
+]
+
+
+def pool_version() -> str:
+    """Short hash of the base texts and filler sentences the prompts are built from."""
+    digest = hashlib.sha256()
+    for text in [make_base_prefix(), make_base_continuation(), *FILLER_SENTENCES]:
+        digest.update(text.encode("utf-8") + b"\0")
+    return digest.hexdigest()[:16]
+
+
+def write_recipe(path: str, args, rows: int, sha256: str):
+    recipe = {
+        "recipe": RECIPE_VERSION,
+        "generator": "prefix-cache-generator",
+        "pool_version": pool_version(),
+        "numpy_version": numpy_version(),
+        "params": {name: getattr(args, name) for name in RECIPE_PARAMS},
+        "tokenizer_sha256": file_sha256(args.tokenizer) if args.tokenizer else None,
+        "rows": rows,
+        "sha256": sha256,
+    }
+    recipe["id"] = recipe_id(recipe)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(recipe, f, indent=2)
+        f.write("\n")
+    print(f"Recipe {recipe['id'][:12]} saved to {path}.")
+
+
+def load_recipe(path: str, tokenizer_path: str = None) -> dict:
+    """Read a recipe and check it can be reproduced here; exits with a message otherwise."""
+    with open(path, encoding="utf-8") as f:
+        recipe = json.load(f)
+    if recipe.get("recipe") != RECIPE_VERSION or recipe.get("generator") != "prefix-cache-generator":
+        sys.exit(f"{path} is not a prefix-cache-generator recipe (version {RECIPE_VERSION})")
+    if recipe.get("id") != recipe_id(recipe):
+        sys.exit(f"{path} has been modified: its content hash does not match its id")
+    if recipe["pool_version"] != pool_version():
+        sys.exit(
+            f"{path} was made with sentence pool {recipe['pool_version']}, but this generator has "
+            f"{pool_version()}; use the generator version that made it"
+        )
+    check_numpy_version(path, recipe)
+    if recipe["tokenizer_sha256"]:
+        if not tokenizer_path:
+            sys.exit(f"{path} counts tokens; pass the same tokenizer.json with --tokenizer")
+        if file_sha256(tokenizer_path) != recipe["tokenizer_sha256"]:
+            sys.exit(f"{tokenizer_path} is not the tokenizer {path} was made with")
+    return recipe
+
+
+def parse_materialize_args(argv=None):
+    p = argparse.ArgumentParser(
+        prog="prefix-cache-generator.py materialize",
+        description="Rebuild the guidellm output described by a recipe and verify it against the "
+        "recipe's checksum",
+    )
+    p.add_argument("recipe", help="Recipe written with --output-recipe.")
+    p.add_argument(
+        "--output-csv",
+        type=str,
+        default="prefix-prompts.csv",
+        help="Output file, or a named pipe read by guidellm. Use a .jsonl suffix for JSON Lines and .gz/.zst for compression. Defaults to prefix-prompts.csv.",
+    )
+    p.add_argument(
+        "--mkfifo",
+        action="store_true",
+        help="Create --output-csv as a named pipe if it does not exist; rows are written as the reader consumes them.",
+    )
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes used to generate pairs; 0 uses all CPUs. Defaults to 1.",
+    )
+    p.add_argument(
+        "--tokenizer",
+        type=str,
+        default=None,
+        help="Local tokenizer.json; required for recipes that count tokens.",
+    )
+    args = p.parse_args(argv)
+    if args.workers < 0:
+        p.error("--workers must be >= 0")
+    args.workers = args.workers or os.cpu_count()
+    return args
+
+
+def materialize(argv=None):
+    """Rebuild a recipe's dataset, streaming it to a file or named pipe, and verify it.
+
+    A dataset that does not match the recipe's checksum is deleted (unless it
+    went to a pipe) and the exit status is non-zero.
+    """
+    args = parse_materialize_args(argv)
+    recipe = load_recipe(args.recipe, args.tokenizer)
+
+    gen = parse_args([])
+    vars(gen).update(recipe["params"])
+    gen.tokenizer = args.tokenizer if recipe["tokenizer_sha256"] else None
+    gen.workers = args.workers
+    gen.output_prefix_csv = None
+    gen.output_guidellm_csv = args.output_csv
+
+    if args.mkfifo and not os.path.exists(args.output_csv):
+        os.mkfifo(args.output_csv)
+    print(f"==== Materializing recipe {recipe['id'][:12]} ({recipe['rows']} rows) to {args.output_csv}")
+
+    digest = hashlib.sha256()
+    continuation_text = make_continuation(gen.target_continuation_words, gen.legacy_random, gen.tokenizer)
+    rows = write_prefix_dataset(gen, continuation_text, digest)
+
+    if rows != recipe["rows"] or digest.hexdigest() != recipe["sha256"]:
+        if os.path.isfile(args.output_csv):
+            os.remove(args.output_csv)
+        sys.exit(f"Checksum mismatch: {args.output_csv} does not reproduce recipe {recipe['id'][:12]}")
+    print(f"==== Verified: sha256 {recipe['sha256'][:12]} matches the recipe.")
+
+
+# -------------------------------
+# Cache
+# -------------------------------
+
+
+def cache_outputs(args) -> dict:
+    """Outputs of args by role, as stored in a dataset cache entry."""
+    outputs = {"guidellm": args.output_guidellm_csv}
+    if args.output_prefix_csv:
+        outputs["pairs"] = args.output_prefix_csv
+    return outputs
+
+
+def cache_fields(args) -> dict:
+    """Everything the outputs of args depend on; hashed into their cache key."""
+    return {
+        "generator": "prefix-cache-generator",
+        "pool_version": pool_version(),
+        "numpy_version": numpy_version(),
+        "params": {name: getattr(args, name) for name in RECIPE_PARAMS},
+        "tokenizer_sha256": file_sha256(args.tokenizer) if args.tokenizer else None,
+        "formats": {role: output_format(path) for role, path in cache_outputs(args).items()},
+    }
+
+
+def expected_rows(args, continuation_text) -> dict:
+    """role -> (rows, index -> row) rebuilding single rows of the outputs of args, for --verify."""
+    prefix_extra, full_extra = [], []
+    if args.tokenizer:
+        prefix_extra = [args.target_prefix_words]
+        full_extra = [args.target_prefix_words + args.target_continuation_words]
+
+    def prefix(offset):
+        i = args.start_index + offset
+        pairs = iter_prefixes(
+            i, i + 1, make_base_prefix(), args.target_prefix_words, args.legacy_random, args.tokenizer
+        )
+        return next(pairs)[1]
+
+    def guidellm_row(k):
+        # each chunk of pairs gives its prefixes, then the same pairs' full prompts
+        base = k // (2 * args.chunk_size) * args.chunk_size
+        size = min(args.chunk_size, args.num_pairs - base)
+        r = k - 2 * base
+        if r < size:
+            return [prefix(base + r), args.output_tokens] + prefix_extra
+        return [prefix(base + r - size) + " " + continuation_text, args.output_tokens] + full_extra
+
+    def pairs_row(j):
+        text = prefix(j)
+        return [args.start_index + j, text, text + " " + continuation_text]
+
+    return {"guidellm": (2 * args.num_pairs, guidellm_row), "pairs": (args.num_pairs, pairs_row)}
+
+
+# -------------------------------
+# Tree workloads
+# -------------------------------
+
+
+def parse_tree_args(argv=None):
+    p = argparse.ArgumentParser(
+        prog="prefix-cache-generator.py tree",
+        description="Generate a prefix-tree workload: shared system prompts, Zipf-popular documents and "
+        "branching multi-turn conversations, interleaved in arrival order",
+    )
+    p.add_argument(
+        "--conversations",
+        type=int,
+        default=500,
+        help="Number of conversations. Defaults to 500.",
+    )
+    p.add_argument(
+        "--depth",
+        type=int,
+        default=4,
+        help="Turns per conversation path; each turn is one request. Defaults to 4.",
+    )
+    p.add_argument(
+        "--branching",
+        type=int,
+        default=1,
+        help="Follow-up turns branching from each turn (1 is a linear chat, 2+ models retries and "
+        "forks). Defaults to 1.",
+    )
+    p.add_argument(
+        "--system-prompts",
+        type=int,
+        default=4,
+        help="Number of distinct system prompts. Defaults to 4.",
+    )
+    p.add_argument(
+        "--system-words",
+        type=int,
+        default=500,
+        help="Word count of each system prompt. Defaults to 500.",
+    )
+    p.add_argument(
+        "--documents",
+        type=int,
+        default=200,
+        help="Size of the RAG document pool. Defaults to 200.",
+    )
+    p.add_argument(
+        "--document-words",
+        type=int,
+        default=2000,
+        help="Word count of each document. Defaults to 2000.",
+    )
+    p.add_argument(
+        "--zipf",
+        type=float,
+        default=1.0,
+        help="Popularity skew of documents: document k is picked with weight 1/k^zipf (0 is uniform). "
+        "Defaults to 1.0.",
+    )
+    p.add_argument(
+        "--shared-fraction",
+        type=float,
+        default=0.8,
+        help="Fraction of conversations opening with a shared system prompt + document; the rest open "
+        "with a unique context of the same length. Defaults to 0.8.",
+    )
+    p.add_argument(
+        "--turn-words",
+        type=int,
+        default=200,
+        help="Words added by each turn. Defaults to 200.",
+    )
+    p.add_argument(
+        "--active-conversations",
+        type=int,
+        default=32,
+        help="Conversations open at once. The next request comes from a random open conversation, so "
+        "more open conversations put more requests between a turn and its follow-up. Defaults to 32.",
+    )
+    p.add_argument(
+        "--output-tokens",
+        type=int,
+        default=250,
+        help="Synthetic output token count annotation for each prompt row. Defaults to 250.",
+    )
+    p.add_argument("--seed", type=int, default=42, help="Random seed. Defaults to 42.")
+    p.add_argument(
+        "--output-csv",
+        type=str,
+        default="tree-prompts.csv",
+        help="Output file formatted for Guidellm consumption. Use a .jsonl suffix for JSON Lines and "
+        ".gz/.zst for compression. Defaults to tree-prompts.csv.",
+    )
+    args = p.parse_args(argv)
+    for name in ("conversations", "depth", "branching", "system_prompts", "system_words", "documents",
+                 "document_words", "turn_words", "active_conversations", "output_tokens"):
+        if getattr(args, name) < 1:
+            p.error(f"--{name.replace('_', '-')} must be >= 1")
+    if args.zipf < 0:
+        p.error("--zipf must be >= 0")
+    if not 0 <= args.shared_fraction <= 1:
+        p.error("--shared-fraction must be between 0 and 1")
+    return args
+
+
+class TreeWorkload:
+    """Requests of a prefix-tree workload, in arrival order.
+
+    Every conversation opens with a context: a system prompt followed by a
+    document drawn by Zipf popularity, or (for 1 - shared_fraction of them)
+    a unique context of the same length. Each turn appends turn_words to its
+    parent's prompt and has `branching` follow-ups, down to `depth` turns.
+    Turns of `active_conversations` open conversations are interleaved at
+    random. Every piece of text is seeded by its own ids, so the output
+    depends only on the arguments.
+    """
+
+    def __init__(self, args):
+        import numpy as np
+        self.args = args
+        self.sizer = get_sizer()
+        weights = 1.0 / np.arange(1, args.documents + 1) ** args.zipf
+        self.doc_cdf = np.cumsum(weights / weights.sum())
+        self.systems = {}
+        self.documents = {}
+        self.contexts = collections.Counter()  # (system, document) -> conversations, filled while iterating
+
+    def text(self, intro: str, words: int, *key) -> str:
+        import numpy as np
+        rng = np.random.default_rng([self.args.seed, *key])
+        return pad_to_length(intro, words, rng, self.sizer)
+
+    def system_prompt(self, s: int) -> str:
+        if s not in self.systems:
+            self.systems[s] = self.text(
+                f"System prompt {s}: you are a careful assistant. Answer in the calm, plain style of the "
+                f"reference material and say clearly what is reused and what is new.",
+                self.args.system_words, 0, s,
+            )
+        return self.systems[s]
+
+    def document(self, d: int) -> str:
+        if d not in self.documents:
+            self.documents[d] = self.text(
+                f"Reference document {d}. " + make_base_prefix(), self.args.document_words, 1, d
+            )
+        return self.documents[d]
+
+    def context(self, c: int):
+        """(text, system, document) opening conversation c; system and document are None if unique."""
+        import numpy as np
+        args = self.args
+        rng = np.random.default_rng([args.seed, 2, c])
+        if rng.random() >= args.shared_fraction:
+            text = self.text(
+                f"Private context for conversation {c}.", args.system_words + args.document_words, 3, c
+            )
+            return text, None, None
+        s = int(rng.integers(args.system_prompts))
+        d = min(int(np.searchsorted(self.doc_cdf, rng.random(), side="right")), args.documents - 1)
+        return self.system_prompt(s) + " " + self.document(d), s, d
+
+    def turn(self, c: int, label: str) -> str:
+        key = [int(part) for part in label.split(".")]
+        return self.text(
+            f"Conversation {c}, turn {label}: the user follows up on the material above.",
+            self.args.turn_words, 4, c, *key,
+        )
+
+    def __iter__(self):
+        """Yield (conversation, turn label, prompt, prompt words, words reusable from earlier prompts)."""
+        import numpy as np
+        args = self.args
+        rng = np.random.default_rng([args.seed, 5])
+        seen_systems, seen_contexts = set(), set()
+        context_words = args.system_words + args.document_words
+        next_conversation = 0
+        active = []
+
+        def open_conversation():
+            nonlocal next_conversation
+            c = next_conversation
+            next_conversation += 1
+            text, s, d = self.context(c)
+            if s is None:
+                reused = 0
+            elif (s, d) in seen_contexts:
+                reused = context_words
+            elif s in seen_systems:
+                reused = args.system_words
+            else:
+                reused = 0
+            if s is not None:
+                seen_systems.add(s)
+                seen_contexts.add((s, d))
+                self.contexts[s, d] += 1
+            # pending turns: (label, parent text, parent words, words of the parent already seen)
+            return c, collections.deque([("1", text, context_words, reused)])
+
+        while next_conversation < min(args.active_conversations, args.conversations):
+            active.append(open_conversation())
+        while active:
+            k = int(rng.integers(len(active)))
+            c, pending = active[k]
+            label, parent, parent_words, reused = pending.popleft()
+            prompt = parent + " " + self.turn(c, label)
+            words = parent_words + args.turn_words
+            yield c, label, prompt, words, reused
+            if label.count(".") + 1 < args.depth:
+                # follow-ups extend this prompt, which has just been seen in full
+                for b in range(1, args.branching + 1):
+                    pending.append((f"{label}.{b}", prompt, words, words))
+            if not pending:
+                if next_conversation < args.conversations:
+                    active[k] = open_conversation()
+                else:
+                    active.pop(k)
+
+
+def tree(argv=None):
+    """Generate a prefix-tree workload and report how much of it is reusable."""
+    args = parse_tree_args(argv)
+    workload = TreeWorkload(args)
+    turns = sum(args.branching ** t for t in range(args.depth))
+    print(
+        f"==== {args.conversations} conversations x {turns} turns (depth {args.depth}, branching "
+        f"{args.branching}) = {args.conversations * turns} requests"
+    )
+
+    requests = total_words = reused_words = 0
+    with open_output(args.output_csv) as f:
+        writer = RowWriter(f, args.output_csv, ["prompt", "output_tokens_count", "conversation_id", "turn"])
+        for c, label, prompt, words, reused in workload:
+            writer.writerow([prompt, args.output_tokens, c, label])
+            requests += 1
+            total_words += words
+            reused_words += reused
+
+    contexts = workload.contexts
+    if contexts:
+        (_, top_doc), top = contexts.most_common(1)[0]
+        print(
+            f"==== {sum(contexts.values())} conversations share {len(contexts)} system prompt + document "
+            f"contexts; the most popular is used {top} times (document {top_doc})"
+        )
+    print(
+        f"==== Reusable prefix with an unbounded cache: {reused_words / total_words:.1%} of {total_words:,} prompt words "
+        f"(use simulator/kv-cache-simulator.py for finite caches)"
+    )
+    print(f"Done. Wrote {requests} requests to {args.output_csv}.")
+
+
+def main(argv=None):
+    if argv and argv[0] == "sweep":
+        return sweep(argv[1:])
+    if argv and argv[0] == "tree":
+        return tree(argv[1:])
+    if argv and argv[0] == "materialize":
+        return materialize(argv[1:])
+
+    args = parse_args(argv)
+    continuation_text = make_continuation(
+        args.target_continuation_words, args.legacy_random, args.tokenizer
+    )
+    cache = DatasetCache(args.cache_dir, args.cache_size) if args.cache_dir else None
+    if cache:
+        key = cache.key(cache_fields(args))
+        info = cache.fetch(key, cache_outputs(args), args.verify, expected_rows(args, continuation_text))
+        if info is not None:
+            if args.output_recipe:
+                write_recipe(args.output_recipe, args, info["rows"], info["sha256"])
+            return
+
+    digest = hashlib.sha256() if args.output_recipe or cache else None
+    rows = write_prefix_dataset(args, continuation_text, digest)
+    if cache:
+        cache.store(key, cache_outputs(args), {"rows": rows, "sha256": digest.hexdigest()})
+    if args.output_recipe:
+        write_recipe(args.output_recipe, args, rows, digest.hexdigest())
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
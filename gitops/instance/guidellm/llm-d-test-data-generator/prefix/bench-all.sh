@@ -4,6 +4,8 @@ TARGET=http://<gateway-hostname>/<namespace>/<llm-d-instance>
 MODEL=Qwen/Qwen3-4B
 SCENARIO_NAME="llm-d-intelligent-inference-x2"
 MAX_SECONDS=120
+# Set to the --tier-file of a running metrics sampler to tag its samples with the active rate
+TIER_FILE=${TIER_FILE:-}
 
 # List of pairs: rate and corresponding data file
 BENCHMARKS=(
@@ -15,12 +17,23 @@ BENCHMARKS=(
   "10 prompts-10.csv"
 )
 
+# Prefer the tiers recorded by generate-all.sh (sweep manifest) when present
+MANIFEST=sweep-manifest.json
+if [ -f "$MANIFEST" ]; then
+  mapfile -t BENCHMARKS < <(python -c "
+import json, sys
+for t in sorted(json.load(open(sys.argv[1]))['tiers'], key=lambda t: t['rate'], reverse=True):
+    print(t['rate'], t['data'])
+" "$MANIFEST")
+fi
+
 # Loop through the list and run guidellm benchmark for each pair
 for benchmark in "${BENCHMARKS[@]}"; do
   RATE=$(echo $benchmark | awk '{print $1}')
   DATA=$(echo $benchmark | awk '{print $2}')
   
   echo "Running benchmark with rate=$RATE and data=$DATA"
+  [ -n "$TIER_FILE" ] && echo "$RATE" > "$TIER_FILE"
   guidellm benchmark run --target $TARGET \
     --model $MODEL \
     --data $DATA \
@@ -29,6 +42,7 @@ for benchmark in "${BENCHMARKS[@]}"; do
     --max-seconds $MAX_SECONDS \
     --output-path $SCENARIO_NAME-$RATE.json
 done
+[ -n "$TIER_FILE" ] && : > "$TIER_FILE"
 
 # Tar all the JSON output files
 echo "Creating tar archive of benchmark results..."
@@ -0,0 +1,327 @@
+import argparse
+import collections
+import csv
+import gzip
+import io
+import json
+import os
+import random
+import sys
+
+import numpy as np
+
+from prefix_cache import PrefixCache, token_chain, word_chain
+
+# -------------------------------
+# Input
+# -------------------------------
+
+
+def open_input(path: str):
+    """Open a generator output (.csv / .jsonl, optionally .gz / .zst) as text."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", newline="", encoding="utf-8")
+    if path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            sys.exit(f"Reading {path} requires the 'zstandard' package (pip install zstandard)")
+        raw = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        return io.TextIOWrapper(raw, newline="", encoding="utf-8")
+    return open(path, newline="", encoding="utf-8")
+
+
+def iter_prompts(path: str):
+    """Yield the prompt column of a generator output in file order."""
+    name = path
+    for suffix in (".gz", ".zst"):
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+    csv.field_size_limit(sys.maxsize)
+    with open_input(path) as f:
+        if name.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)["prompt"]
+        else:
+            rows = csv.reader(f)
+            column = next(rows).index("prompt")
+            for row in rows:
+                yield row[column]
+
+
+def _word_chains(task) -> list:
+    prompts, block_size = task
+    return [word_chain(p, block_size) for p in prompts]
+
+
+def load_chains(path: str, block_size: int, tokenizer_path: str = None, batch: int = 256,
+                workers: int = 1) -> list:
+    """Block chains for every prompt in path, in words or (with tokenizer_path) tokens.
+
+    With workers > 1, word chains are hashed in worker processes, batch
+    prompts at a time.
+    """
+    prompts = iter_prompts(path)
+    if tokenizer_path is None:
+        if workers <= 1:
+            return [word_chain(p, block_size) for p in prompts]
+        from concurrent.futures import ProcessPoolExecutor
+
+        tasks = iter(lambda: ([p for _, p in zip(range(batch), prompts)], block_size), ([], block_size))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return [c for chains in executor.map(_word_chains, tasks) for c in chains]
+
+    try:
+        from tokenizers import Tokenizer
+    except ImportError:
+        sys.exit("--tokenizer requires the 'tokenizers' package (pip install tokenizers)")
+    tokenizer = Tokenizer.from_file(tokenizer_path)
+    chains = []
+    while True:
+        chunk = [p for _, p in zip(range(batch), prompts)]
+        if not chunk:
+            return chains
+        for enc in tokenizer.encode_batch(chunk, add_special_tokens=False):
+            chains.append(token_chain(enc.ids, block_size))
+
+
+def reuse_distance(chains: list, quantile: float = 0.9):
+    """Blocks requested between two uses of the same block, at quantile over every reuse.
+
+    This bounds the cache a single replica needs for that share of the
+    repeated blocks to hit under LRU. None when no block is used twice.
+    """
+    if not chains:
+        return None
+    hashes = np.concatenate(chains)
+    order = np.argsort(hashes, kind="stable")
+    repeated = hashes[order[1:]] == hashes[order[:-1]]
+    gaps = (order[1:] - order[:-1])[repeated]
+    if not len(gaps):
+        return None
+    return int(np.quantile(gaps, quantile))
+
+
+# -------------------------------
+# Simulation
+# -------------------------------
+
+
+class Replica(PrefixCache):
+    """One serving instance with an LRU prefix cache of capacity blocks."""
+
+    def __init__(self, capacity: int):
+        super().__init__(capacity)
+        self.requests = 0
+
+
+POLICIES = ["round-robin", "random", "prefix-affinity", "least-loaded-prefix"]
+
+
+def simulate(chains: list, policy: str, replicas: int, capacity: int, concurrency: int,
+             prefix_weight: float = 2.0, load_weight: float = 1.0, seed: int = 0) -> dict:
+    """Route every request in order and account prefix cache hits.
+
+    Load is the number of the last `concurrency` requests routed to each
+    replica, a stand-in for in-flight requests under closed-loop concurrency.
+    """
+    pool = [Replica(capacity) for _ in range(replicas)]
+    rng = random.Random(seed)
+    recent = collections.deque()
+    load = [0] * replicas
+    total = hit = 0
+
+    for i, chain in enumerate(chains):
+        chain = chain.tolist()
+        if policy == "round-robin":
+            r = i % replicas
+            matched = pool[r].match(chain)
+        elif policy == "random":
+            r = rng.randrange(replicas)
+            matched = pool[r].match(chain)
+        else:
+            matches = [rep.match(chain) for rep in pool]
+            if policy == "prefix-affinity":
+                # longest cached prefix wins; ties go to the least loaded replica
+                r = max(range(replicas), key=lambda j: (matches[j], -load[j], -j))
+            else:
+                # weighted scorers, as in the llm-d scheduler's prefix + load scoring
+                n = max(len(chain), 1)
+                r = max(
+                    range(replicas),
+                    key=lambda j: (
+                        prefix_weight * matches[j] / n - load_weight * load[j] / concurrency,
+                        -j,
+                    ),
+                )
+            matched = matches[r]
+
+        pool[r].admit(chain, matched)
+        pool[r].requests += 1
+        total += len(chain)
+        hit += matched
+
+        recent.append(r)
+        load[r] += 1
+        if len(recent) > concurrency:
+            load[recent.popleft()] -= 1
+
+    requests = [rep.requests for rep in pool]
+    return {
+        "policy": policy,
+        "requests": len(chains),
+        "blocks": total,
+        "hit_blocks": hit,
+        "hit_rate": hit / total if total else 0.0,
+        "requests_per_replica": requests,
+    }
+
+
+# -------------------------------
+# Main
+# -------------------------------
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(
+        description="Predict prefix cache hit rates of routing policies for a generated dataset, without GPUs"
+    )
+    p.add_argument("data", help="Generator output in request order (.csv or .jsonl, optionally .gz/.zst)")
+    p.add_argument("--replicas", type=int, default=4, help="Number of serving replicas. Defaults to 4.")
+    p.add_argument(
+        "--block-size",
+        type=int,
+        default=16,
+        help="Tokens (or words) per KV-cache block. Defaults to 16, vLLM's default.",
+    )
+    p.add_argument(
+        "--cache-tokens",
+        type=int,
+        default=None,
+        help="Prefix cache capacity per replica in tokens (or words). Defaults to a size taken from the input: "
+             "enough for 90%% of repeated blocks to still be cached when a prefix-aware policy sends them back "
+             "to the same replica (with 25%% headroom), or 500000 when no block repeats.",
+    )
+    p.add_argument(
+        "--concurrency",
+        type=int,
+        default=10,
+        help="Requests considered in flight when measuring replica load. Defaults to 10.",
+    )
+    p.add_argument(
+        "--policies",
+        type=lambda v: v.split(","),
+        default=POLICIES,
+        help=f"Comma-separated routing policies to compare. Defaults to {','.join(POLICIES)}.",
+    )
+    p.add_argument(
+        "--prefix-weight",
+        type=float,
+        default=2.0,
+        help="Weight of the prefix match score for least-loaded-prefix. Defaults to 2.0.",
+    )
+    p.add_argument(
+        "--load-weight",
+        type=float,
+        default=1.0,
+        help="Weight of the load score for least-loaded-prefix. Defaults to 1.0.",
+    )
+    p.add_argument(
+        "--tokenizer",
+        type=str,
+        default=None,
+        help="Local tokenizer.json to count real tokens; whitespace words are used otherwise.",
+    )
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes used to hash prompts and to simulate the policies side by side; 0 uses all CPUs. "
+             "Results are identical for any value. Defaults to 1.",
+    )
+    p.add_argument("--seed", type=int, default=0, help="Seed for the random policy. Defaults to 0.")
+    p.add_argument("--output-json", type=str, default=None, help="Also write the results as JSON.")
+    args = p.parse_args(argv)
+    unknown = set(args.policies) - set(POLICIES)
+    if unknown:
+        p.error(f"unknown policies: {', '.join(sorted(unknown))} (choose from {', '.join(POLICIES)})")
+    if min(args.replicas, args.block_size, args.concurrency) < 1 or (args.cache_tokens or 1) < 1:
+        p.error("--replicas, --block-size, --cache-tokens and --concurrency must be >= 1")
+    if args.workers < 0:
+        p.error("--workers must be >= 0")
+    args.workers = args.workers or os.cpu_count()
+    return args
+
+
+def _simulate(task) -> dict:
+    chains, policy, args, capacity = task
+    result = simulate(
+        chains, policy, args.replicas, capacity, args.concurrency,
+        args.prefix_weight, args.load_weight, args.seed,
+    )
+    result["prefill_saved"] = result["hit_blocks"] * args.block_size
+    result["prefill_computed"] = (result["blocks"] - result["hit_blocks"]) * args.block_size
+    return result
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    unit = "tokens" if args.tokenizer else "words"
+
+    chains = load_chains(args.data, args.block_size, args.tokenizer, workers=args.workers)
+    print(f"==== {len(chains)} requests from {args.data}")
+
+    # Spread over the replicas, the blocks requested between two uses of a
+    # block is what one replica must hold for a prefix-aware policy to hit,
+    # plus 25% for replicas that receive more than their share. It must hold
+    # the longest prompt in any case.
+    distance = reuse_distance(chains)
+    longest = max(map(len, chains), default=0)
+    needed = max(-(-distance * 5 // (4 * args.replicas)), longest) if distance else None
+    if args.cache_tokens is None:
+        capacity = needed or 500000 // args.block_size
+        args.cache_tokens = capacity * args.block_size
+        print(f"==== --cache-tokens sized from the input: {args.cache_tokens} {unit} per replica")
+    else:
+        capacity = args.cache_tokens // args.block_size
+        if needed and capacity < needed:
+            print(
+                f"==== Warning: a replica needs {needed} blocks for repeated blocks to be reused (they arrive "
+                f"{distance} blocks apart, the longest prompt has {longest}), but --cache-tokens holds "
+                f"{capacity}; most will be evicted first. "
+                f"Pass --cache-tokens {needed * args.block_size} or more for a cache that can hit.",
+                file=sys.stderr,
+            )
+    print(f"==== {args.replicas} replicas, {capacity} blocks of {args.block_size} {unit} each")
+
+    tasks = [(chains, policy, args, capacity) for policy in args.policies]
+    if args.workers <= 1 or len(tasks) == 1:
+        results = [_simulate(task) for task in tasks]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(args.workers, len(tasks))) as executor:
+            results = list(executor.map(_simulate, tasks))
+
+    print(f"\n{'policy':<22} {'hit rate':>9} {'prefill saved':>15} {'prefill computed':>17}  requests per replica")
+    for r in results:
+        print(
+            f"{r['policy']:<22} {r['hit_rate']:>8.1%} {r['prefill_saved']:>15,} "
+            f"{r['prefill_computed']:>17,}  {r['requests_per_replica']}"
+        )
+    print(f"\n(prefill in {unit}; only full blocks are counted)")
+
+    if args.output_json:
+        with open(args.output_json, "w", encoding="utf-8") as f:
+            json.dump(
+                {"data": args.data, "unit": unit, **{k: v for k, v in vars(args).items() if k != "data"},
+                 "results": results},
+                f,
+                indent=2,
+            )
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,373 @@
+import argparse
+import asyncio
+import collections
+import contextlib
+import itertools
+import json
+import math
+import sys
+import time
+import uuid
+
+from prefix_cache import PrefixCache, word_chain
+
+# -------------------------------
+# Engine
+# -------------------------------
+
+OUTPUT_WORDS = ["the", "cache", "keeps", "shared", "context", "so", "new", "work", "starts", "sooner"]
+
+
+class Engine:
+    """One simulated inference instance.
+
+    Requests wait until the batch has a free slot and enough KV blocks for
+    their prompt and output. Prefills run one at a time and cost time per
+    prompt token not found in the prefix cache; decode then costs time per
+    output token, growing with the number of running requests.
+
+    Running requests and the prefix cache share the capacity blocks, as in
+    vLLM: a request reuses its cached prefix blocks and takes the rest from
+    the pool, evicting least recently used cached blocks if needed. After
+    prefill its prompt blocks join the cache. A running request's prefix and
+    prompt blocks stay pinned until it finishes, so no other request can
+    evict them; its output blocks return to the pool when it finishes.
+    """
+
+    def __init__(self, index: int, args):
+        self.index = index
+        self.args = args
+        self.capacity = args.kv_cache_tokens // args.block_size
+        self.cache = PrefixCache(self.capacity)
+        self.prefill_lock = asyncio.Lock()
+        self.admission = asyncio.Condition()
+        self.running = 0
+        self.waiting = 0
+        self.held_blocks = 0  # blocks of running requests that are not in the prefix cache
+        self.counters = collections.Counter()
+
+    def reserve(self, blocks: int):
+        """Move blocks between running requests and the prefix cache, which keeps what is left."""
+        self.held_blocks += blocks
+        self.cache.resize(self.capacity - self.held_blocks)
+
+    @property
+    def used_blocks(self) -> int:
+        """Blocks of running requests: their own plus the cached ones they pin, for gpu_cache_usage_perc."""
+        return self.held_blocks + len(self.cache.pinned)
+
+    def fits(self, chain, matched: int, new: int) -> bool:
+        """Whether new blocks, with chain[:matched] pinned, fit beside the running requests' blocks."""
+        pinned = self.cache.pinned
+        return self.used_blocks + sum(block not in pinned for block in chain[:matched]) + new <= self.capacity
+
+    @property
+    def load(self) -> int:
+        return self.running + self.waiting
+
+    async def generate(self, prompt: str, max_tokens: int, chain=None):
+        """Yield max_tokens output words with simulated timing, counting tokens in self.counters."""
+        args = self.args
+        scale = args.time_scale
+        words = len(prompt.split())
+        chain = word_chain(prompt, args.block_size).tolist() if chain is None else chain
+        need = min(math.ceil((words + max_tokens) / args.block_size), self.capacity)
+
+        self.waiting += 1
+        try:
+            async with self.admission:
+                await self.admission.wait_for(
+                    lambda: self.running < args.max_batch
+                    and self.fits(chain, self.cache.match(chain), need - self.cache.match(chain))
+                )
+                matched = self.cache.match(chain)
+                # pin the hit first so making room cannot evict it
+                pinned = chain[:matched]
+                self.cache.pin(pinned)
+                self.cache.admit(pinned, matched)
+                held = need - matched
+                self.reserve(held)
+                self.running += 1
+        finally:
+            self.waiting -= 1
+        try:
+            hit = matched * args.block_size
+            self.counters["prefix_cache_queries"] += words
+            self.counters["prefix_cache_hits"] += hit
+            self.counters["prompt_tokens"] += words
+
+            async with self.prefill_lock:
+                await asyncio.sleep(scale * (args.prefill_overhead_ms + (words - hit) * args.prefill_ms_per_token) / 1000)
+            computed = min(len(chain) - matched, held)
+            # the computed prompt blocks move from the request to the cache, pinned until it finishes
+            pinned = chain[: matched + computed]
+            self.cache.pin(pinned[matched:])
+            self.reserve(-computed)
+            held -= computed
+            self.cache.admit(pinned, matched)
+            for i in range(max_tokens):
+                slowdown = 1 + args.decode_batch_penalty * (self.running - 1)
+                await asyncio.sleep(scale * args.decode_ms_per_token * slowdown / 1000)
+                self.counters["generation_tokens"] += 1
+                yield OUTPUT_WORDS[i % len(OUTPUT_WORDS)]
+            self.counters["request_success"] += 1
+        finally:
+            async with self.admission:
+                self.running -= 1
+                self.cache.unpin(pinned)
+                self.reserve(-held)
+                self.admission.notify_all()
+
+    def metrics(self) -> dict:
+        """vLLM metric name -> (type, value) for this engine."""
+        c = self.counters
+        return {
+            "vllm:num_requests_running": ("gauge", self.running),
+            "vllm:num_requests_waiting": ("gauge", self.waiting),
+            "vllm:gpu_cache_usage_perc": ("gauge", self.used_blocks / self.capacity),
+            "vllm:prefix_cache_queries": ("counter", c["prefix_cache_queries"]),
+            "vllm:prefix_cache_hits": ("counter", c["prefix_cache_hits"]),
+            "vllm:prompt_tokens": ("counter", c["prompt_tokens"]),
+            "vllm:generation_tokens": ("counter", c["generation_tokens"]),
+            "vllm:request_success": ("counter", c["request_success"]),
+        }
+
+
+class Router:
+    """Pick an engine per request: round-robin, or the longest cached prefix (ties to the least loaded)."""
+
+    def __init__(self, engines, policy: str, block_size: int):
+        self.engines = engines
+        self.policy = policy
+        self.block_size = block_size
+        self.turn = itertools.cycle(engines)
+
+    def route(self, prompt: str):
+        """(engine, block chain of prompt)."""
+        chain = word_chain(prompt, self.block_size).tolist()
+        if self.policy == "round-robin" or len(self.engines) == 1:
+            return next(self.turn), chain
+        engine = max(self.engines, key=lambda e: (e.cache.match(chain), -e.load, -e.index))
+        return engine, chain
+
+
+def exposition(engines, model: str) -> str:
+    """Prometheus text exposition of every engine's metrics, labelled by engine index."""
+    lines = []
+    per_engine = [e.metrics() for e in engines]
+    for name, (kind, _) in per_engine[0].items():
+        lines.append(f"# TYPE {name} {kind}")
+        suffix = "_total" if kind == "counter" else ""
+        for engine, metrics in zip(engines, per_engine):
+            lines.append(f'{name}{suffix}{{engine="{engine.index}",model_name="{model}"}} {metrics[name][1]}')
+    return "\n".join(lines) + "\n"
+
+
+# -------------------------------
+# HTTP
+# -------------------------------
+
+
+class Server:
+    """Minimal HTTP/1.1 server for the OpenAI completions API, /metrics and /health."""
+
+    def __init__(self, args):
+        self.args = args
+        self.engines = [Engine(i, args) for i in range(args.instances)]
+        self.router = Router(self.engines, args.router, args.block_size)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, path, _ = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                await self.dispatch(method, path.split("?")[0], body, writer)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, path, body, writer):
+        model = self.args.model
+        if method == "GET" and path == "/v1/models":
+            return await self.respond(writer, 200, {"object": "list", "data": [{"id": model, "object": "model"}]})
+        if method == "GET" and path == "/health":
+            return await self.respond(writer, 200, {})
+        if method == "GET" and path == "/metrics":
+            return await self.respond(writer, 200, exposition(self.engines, model), "text/plain; version=0.0.4")
+        if method == "POST" and path == "/v1/completions":
+            try:
+                request = json.loads(body)
+                prompt = request["prompt"]
+                if isinstance(prompt, list):
+                    prompt = prompt[0]
+                max_tokens = int(request.get("max_tokens", 16))
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                return await self.respond(writer, 400, {"error": {"message": f"invalid request: {e}"}})
+            return await self.complete(writer, prompt, max_tokens, request)
+        await self.respond(writer, 404, {"error": {"message": f"no route for {method} {path}"}})
+
+    @staticmethod
+    async def respond(writer, status: int, payload, content_type: str = "application/json"):
+        body = payload.encode("utf-8") if isinstance(payload, str) else json.dumps(payload).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+    async def complete(self, writer, prompt: str, max_tokens: int, request: dict):
+        model = self.args.model
+        engine, chain = self.router.route(prompt)
+        completion_id = f"cmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        prompt_tokens = len(prompt.split())
+
+        def chunk(text, finish_reason=None):
+            return {
+                "id": completion_id, "object": "text_completion", "created": created, "model": model,
+                "choices": [{"index": 0, "text": text, "logprobs": None, "finish_reason": finish_reason}],
+            }
+
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": max_tokens,
+                 "total_tokens": prompt_tokens + max_tokens}
+        if not request.get("stream"):
+            async with contextlib.aclosing(engine.generate(prompt, max_tokens, chain)) as words:
+                text = "".join([" " + word async for word in words])
+            payload = chunk(text, "length")
+            payload["usage"] = usage
+            return await self.respond(writer, 200, payload)
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+
+        def send(event):
+            data = f"data: {json.dumps(event) if not isinstance(event, str) else event}\n\n".encode("utf-8")
+            writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+        generated = 0
+        async with contextlib.aclosing(engine.generate(prompt, max_tokens, chain)) as words:
+            async for word in words:
+                generated += 1
+                send(chunk(" " + word, "length" if generated == max_tokens else None))
+                await writer.drain()
+        if (request.get("stream_options") or {}).get("include_usage"):
+            event = chunk("")
+            event["choices"] = []
+            event["usage"] = usage
+            send(event)
+        send("[DONE]")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+# -------------------------------
+# Main
+# -------------------------------
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(
+        description="Mock OpenAI-compatible inference server with a simulated prefill/decode cost model "
+        "and prefix cache, for testing the benchmark pipeline without GPUs"
+    )
+    p.add_argument("--host", type=str, default="127.0.0.1", help="Listen address. Defaults to 127.0.0.1.")
+    p.add_argument("--port", type=int, default=8000, help="Listen port. Defaults to 8000.")
+    p.add_argument("--model", type=str, default="mock-model", help="Model name served. Defaults to mock-model.")
+    p.add_argument(
+        "--instances",
+        type=int,
+        default=1,
+        help="Simulated instances behind the built-in router. Defaults to 1.",
+    )
+    p.add_argument(
+        "--router",
+        choices=["round-robin", "prefix-aware"],
+        default="round-robin",
+        help="How requests are spread over --instances. prefix-aware picks the longest cached prefix, "
+        "then the least loaded instance. Defaults to round-robin.",
+    )
+    p.add_argument("--block-size", type=int, default=16, help="Tokens per KV block. Defaults to 16.")
+    p.add_argument(
+        "--kv-cache-tokens",
+        type=int,
+        default=200000,
+        help="KV cache capacity per instance in tokens. Running requests take their blocks from it and the "
+        "prefix cache keeps the rest, evicting least recently used blocks to make room. Defaults to 200000.",
+    )
+    p.add_argument(
+        "--max-batch",
+        type=int,
+        default=64,
+        help="Requests running at once per instance; the rest queue. Defaults to 64.",
+    )
+    p.add_argument(
+        "--prefill-ms-per-token",
+        type=float,
+        default=0.1,
+        help="Prefill time per uncached prompt token. Defaults to 0.1.",
+    )
+    p.add_argument(
+        "--prefill-overhead-ms",
+        type=float,
+        default=5.0,
+        help="Fixed time per prefill. Defaults to 5.",
+    )
+    p.add_argument(
+        "--decode-ms-per-token",
+        type=float,
+        default=20.0,
+        help="Decode time per output token for a lone request. Defaults to 20.",
+    )
+    p.add_argument(
+        "--decode-batch-penalty",
+        type=float,
+        default=0.01,
+        help="Extra decode time per token for each other running request, as a fraction. Defaults to 0.01.",
+    )
+    p.add_argument(
+        "--time-scale",
+        type=float,
+        default=1.0,
+        help="Multiply every simulated delay, e.g. 0.1 for fast tests. Defaults to 1.",
+    )
+    args = p.parse_args(argv)
+    if min(args.instances, args.block_size, args.max_batch) < 1 or args.kv_cache_tokens < args.block_size:
+        p.error("--instances, --block-size and --max-batch must be >= 1 and --kv-cache-tokens >= --block-size")
+    return args
+
+
+async def serve(args):
+    server = Server(args)
+    listener = await asyncio.start_server(server.handle, args.host, args.port)
+    print(
+        f"==== Serving {args.model} on http://{args.host}:{args.port} with {args.instances} instance(s), "
+        f"{args.router} routing"
+    )
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv=None):
+    try:
+        asyncio.run(serve(parse_args(argv)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,152 @@
+"""Block hashing and the LRU prefix cache shared by kv-cache-simulator.py and mock-server.py."""
+import collections
+import itertools
+
+import numpy as np
+
+# -------------------------------
+# Block hashing
+# -------------------------------
+
+_COEFFICIENTS = np.empty(0, dtype=np.uint64)
+
+
+def _coefficients(n: int) -> np.ndarray:
+    """Fixed odd 64-bit multipliers, one per token position, grown on demand."""
+    global _COEFFICIENTS
+    if len(_COEFFICIENTS) < n:
+        size = max(n, 2 * len(_COEFFICIENTS), 1 << 16)
+        rng = np.random.default_rng(0x5EED)
+        _COEFFICIENTS = rng.integers(0, 2**64, size=size, dtype=np.uint64, endpoint=False) | np.uint64(1)
+    return _COEFFICIENTS[:n]
+
+
+def prefix_hashes(values: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Hash values[:e + 1] for every e in ends, in one pass.
+
+    Each hash is a running sum of position-weighted values, so two prompts
+    share hash k exactly when they agree up to the k-th end (barring 64-bit
+    collisions), like vLLM's chained block hashes, and the whole chain comes
+    from one cumulative sum instead of rehashing every prefix.
+    """
+    if not len(ends):
+        return np.empty(0, dtype=np.uint64)
+    n = int(ends[-1]) + 1
+    weighted = values[:n].astype(np.uint64) * _coefficients(n)
+    return np.cumsum(weighted, dtype=np.uint64)[ends]
+
+
+_BYTE_MASKS = np.array([(1 << (8 * r)) - 1 for r in range(8)], dtype=np.uint64)
+
+
+def word_chain(text: str, block_size: int) -> np.ndarray:
+    """Chain of block hashes where a block is block_size whitespace-separated words.
+
+    The text is hashed 8 bytes at a time: the hash up to a block's last byte
+    is the running sum over the whole 8-byte words before it, plus the word
+    holding that byte masked to the bytes up to it.
+    """
+    raw = text.encode("utf-8")
+    data = np.frombuffer(raw, dtype=np.uint8)
+    if not len(data):
+        return np.empty(0, dtype=np.uint64)
+    space = data <= 0x20  # ASCII space and control characters, as str.split() sees them
+    # last byte of every word: a non-space byte followed by a space or the end
+    word_end = ~space
+    word_end[:-1] &= space[1:]
+    ends = np.flatnonzero(word_end)[block_size - 1::block_size]
+    if not len(ends):
+        return np.empty(0, dtype=np.uint64)
+    n = int(ends[-1]) + 1
+    words = np.frombuffer(raw[:n] + bytes(-n % 8), dtype="<u8")
+    coefficients = _coefficients(len(words) + 1)
+    running = np.cumsum(words * coefficients[:len(words)], dtype=np.uint64)
+    full, rest = np.divmod(ends + 1, 8)
+    before = np.where(full > 0, running[full - 1], np.uint64(0))
+    partial = words[np.minimum(full, len(words) - 1)] & _BYTE_MASKS[rest]
+    return before + partial * coefficients[full]
+
+
+def token_chain(ids, block_size: int) -> np.ndarray:
+    """Chain of block hashes where a block is block_size token ids."""
+    ids = np.asarray(ids, dtype=np.int64)
+    ends = np.arange(block_size - 1, len(ids), block_size)
+    return prefix_hashes(ids.view(np.uint64), ends)
+
+
+# -------------------------------
+# LRU cache
+# -------------------------------
+
+_consume = collections.deque(maxlen=0).extend
+
+
+class PrefixCache:
+    """LRU cache of at most capacity block hashes.
+
+    Pinned blocks (see pin) are in use by a running request and are never
+    evicted; capacity must leave room for them.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.blocks = collections.OrderedDict()
+        self.pinned = collections.Counter()
+
+    def match(self, chain) -> int:
+        """Number of leading blocks of chain already cached.
+
+        admit() never leaves a block more recently used than its parent, so
+        LRU eviction keeps the cached set prefix-closed and the match length
+        can be found by bisection.
+        """
+        blocks = self.blocks
+        lo, hi = 0, len(chain)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if chain[mid] in blocks:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def admit(self, chain, matched: int):
+        """Cache every block of chain, evicting least recently used blocks.
+
+        Blocks are touched last-to-first so a prompt's leading blocks are the
+        most recently used and its tail is evicted first, keeping shared
+        prefixes intact (vLLM frees a request's blocks in the same order).
+        The first matched blocks are already cached and the rest are not.
+        """
+        blocks = self.blocks
+        blocks.update(dict.fromkeys(reversed(chain[matched:])))
+        # map() drained by a zero-length deque runs these loops in C; they are
+        # most of the simulation time on large datasets
+        _consume(map(blocks.move_to_end, reversed(chain[:matched])))
+        self.evict()
+
+    def resize(self, capacity: int):
+        """Change the capacity, evicting least recently used blocks to fit."""
+        self.capacity = capacity
+        self.evict()
+
+    def pin(self, chain):
+        """Keep the (cached) blocks of chain from eviction until unpin(chain)."""
+        self.pinned.update(chain)
+
+    def unpin(self, chain):
+        pinned = self.pinned
+        for block in chain:
+            if pinned[block] > 1:
+                pinned[block] -= 1
+            else:
+                pinned.pop(block, None)
+
+    def evict(self):
+        blocks = self.blocks
+        excess = len(blocks) - self.capacity
+        if excess <= 0:
+            return
+        pinned = self.pinned
+        victims = blocks if not pinned else (block for block in blocks if block not in pinned)
+        _consume(map(blocks.pop, list(itertools.islice(victims, excess))))
@@ -0,0 +1,52 @@
+import importlib.util
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Makes llmd_datagen, and the modules the simulator scripts import, importable from the tests
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "simulator"))
+
+SCRIPTS = {
+    "prefix": os.path.join(ROOT, "prefix", "prefix-cache-generator.py"),
+    "heterogeneous": os.path.join(ROOT, "heterogeneous", "heterogeneous-workload-generator.py"),
+    "simulator": os.path.join(ROOT, "simulator", "kv-cache-simulator.py"),
+    "mock-server": os.path.join(ROOT, "simulator", "mock-server.py"),
+    "load-driver": os.path.join(ROOT, "driver", "load-driver.py"),
+    "metrics-sampler": os.path.join(ROOT, "analysis", "metrics-sampler.py"),
+    "analyze-results": os.path.join(ROOT, "analysis", "analyze-results.py"),
+    "benchmark": os.path.join(ROOT, "bench", "benchmark-generators.py"),
+}
+
+
+def load_script(script):
+    """Import one of SCRIPTS as a module; their file names are not valid module names."""
+    spec = importlib.util.spec_from_file_location(script.replace("-", "_"), SCRIPTS[script])
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def run(tmp_path):
+    """run(script, *args) runs one of SCRIPTS in tmp_path and returns the CompletedProcess.
+
+    A non-zero exit fails the test unless check=False.
+    """
+    base_env = {k: v for k, v in os.environ.items() if k != "LLMD_DATAGEN_CACHE"}
+
+    def run(script, *args, check=True, env=None):
+        result = subprocess.run(
+            [sys.executable, SCRIPTS[script], *map(str, args)],
+            cwd=tmp_path, capture_output=True, text=True, env={**base_env, **(env or {})},
+        )
+        if check and result.returncode:
+            pytest.fail(f"{script} {' '.join(map(str, args))} exited {result.returncode}:\n{result.stderr}")
+        return result
+
+    return run
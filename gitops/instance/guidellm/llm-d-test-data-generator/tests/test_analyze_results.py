@@ -0,0 +1,93 @@
+import json
+import tarfile
+
+import numpy as np
+import pytest
+
+from conftest import load_script
+
+# a prompt that spells out, escaped, the keys the streaming parser looks for
+TRICKY = 'Reply with JSON like {"successful": [1], "strategy": {"streams": 9}} — «ünïcode» included.'
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    return load_script("analyze-results")
+
+
+def report(streams, ttfts, seed=0):
+    """A guidellm-style report with one concurrent benchmark per streams value."""
+    rng = np.random.default_rng(seed)
+    benchmarks = []
+    for n, ttft in zip(streams, ttfts):
+        records = []
+        for i in range(40):
+            start = 100.0 + i * 0.5
+            first = start + ttft * (1 + rng.random()) / 1000
+            records.append({
+                "request_id": f"{n}-{i}", "prompt": f"{TRICKY} #{i}", "output": "word " * 20,
+                "prompt_tokens": 300, "output_tokens": 20, "start_time": start, "end_time": first + 0.4,
+                "first_token_time": first, "last_token_time": first + 0.38,
+            })
+        benchmarks.append({
+            "args": {"note": TRICKY},
+            "strategy": {"type_": "concurrent", "streams": n},
+            "requests": {"successful": records, "errored": [dict(records[0], error="boom")], "incomplete": []},
+        })
+    return {"benchmarks": benchmarks, "note": TRICKY}
+
+
+def write(path, data):
+    path.write_text(json.dumps(data, indent=1, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+def expected(data):
+    """Per-benchmark TTFT and E2E percentiles computed from json.load."""
+    out = []
+    for b in data["benchmarks"]:
+        records = b["requests"]["successful"]
+        ttft = [(r["first_token_time"] - r["start_time"]) * 1000 for r in records]
+        e2e = [(r["end_time"] - r["start_time"]) * 1000 for r in records]
+        out.append((np.percentile(ttft, [50, 90, 95, 99]), np.percentile(e2e, [50, 90, 95, 99])))
+    return out
+
+
+def test_small_chunks_match_json_load(analyzer, tmp_path, monkeypatch):
+    path = write(tmp_path / "report.json", report([4, 8], [50, 90]))
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    monkeypatch.setattr(analyzer, "_CHUNK", 7)
+    tiers = analyzer.analyze(path)
+    assert list(tiers) == ["4#0", "8#1"]
+    for (ttft, e2e), summary in zip(expected(data), tiers.values()):
+        assert summary["requests"] == 40 and summary["errored"] == 1
+        assert [summary[f"ttft_p{p}"] for p in (50, 90, 95, 99)] == pytest.approx(ttft.tolist())
+        assert [summary[f"e2e_p{p}"] for p in (50, 90, 95, 99)] == pytest.approx(e2e.tolist())
+    monkeypatch.undo()
+    assert analyzer.analyze(path) == tiers
+
+
+def test_tar_members_are_tiers(analyzer, tmp_path):
+    with tarfile.open(tmp_path / "scenario.tar.gz", "w:gz") as tar:
+        for rate in (16, 8):
+            tar.add(write(tmp_path / f"scenario-{rate}.json", report([rate], [40])), f"scenario-{rate}.json")
+    tiers = analyzer.analyze(str(tmp_path / "scenario.tar.gz"))
+    assert list(tiers) == ["8", "16"]
+    assert all(s["requests"] == 40 for s in tiers.values())
+
+
+def test_fail_on_regression_uses_per_metric_thresholds(run, tmp_path):
+    write(tmp_path / "base.json", report([8], [100]))
+    write(tmp_path / "slow.json", report([8], [130]))
+    args = ["base.json", "slow.json", "--threshold", 1000, "--fail-on-regression"]
+
+    result = run("analyze-results", *args, "--metric-thresholds", "ttft_p99=10", "--output-json", "out.json",
+                 check=False)
+    assert result.returncode == 1
+    with open(tmp_path / "out.json") as f:
+        regressed = [r["metric"] for r in json.load(f)["comparisons"]["slow"] if r["regressed"]]
+    assert regressed == ["ttft_p99"]
+
+    assert run("analyze-results", *args, "--metric-thresholds", "ttft_p99=50", check=False).returncode == 0
+    assert run("analyze-results", *args, check=False).returncode == 0
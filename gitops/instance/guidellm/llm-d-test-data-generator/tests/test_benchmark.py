@@ -0,0 +1,14 @@
+import json
+
+
+def test_timed_runs_ignore_the_dataset_cache(run, tmp_path):
+    cache = tmp_path / "cache"
+    result = run("benchmark", "--counts", 5, "--words", 60, "--repeat", 2, "--startup-runs", 1,
+                 "--output-json", "results.json", env={"LLMD_DATAGEN_CACHE": str(cache)})
+    assert "Ignoring LLMD_DATAGEN_CACHE" in result.stdout
+    # nothing was stored, so no repeat was served from the cache
+    assert not cache.exists()
+    with open(tmp_path / "results.json") as f:
+        cases = json.load(f)["cases"]
+    assert {case["generator"] for case in cases} == {"prefix", "heterogeneous"}
+    assert all(case["bytes"] > 0 for case in cases)
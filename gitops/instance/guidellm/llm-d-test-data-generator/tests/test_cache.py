@@ -0,0 +1,81 @@
+import os
+import stat
+import time
+
+from llmd_datagen.cache import DatasetCache
+
+ARGS = ["--num-pairs", 6, "--chunk-size", 3, "--target-prefix-words", 40, "--target-continuation-words", 10,
+        "--output-prefix-csv", "pairs.csv", "--output-guidellm-csv", "prompts.csv"]
+
+
+def entry_files(cache):
+    """The data files of every entry in cache."""
+    return [os.path.join(root, name) for root, _, names in os.walk(cache) for name in names if name != "entry.json"]
+
+
+def test_miss_then_hit(run, tmp_path):
+    run("prefix", *ARGS)
+    fresh = (tmp_path / "prompts.csv").read_bytes()
+    os.remove(tmp_path / "prompts.csv")
+
+    assert "Cache miss" in run("prefix", *ARGS, "--cache-dir", "cache").stdout
+    assert "Cache hit" in run("prefix", *ARGS, "--cache-dir", "cache").stdout
+    assert (tmp_path / "prompts.csv").read_bytes() == fresh
+    files = entry_files(tmp_path / "cache")
+    assert len(files) == 2
+    assert all(stat.S_IMODE(os.stat(f).st_mode) == 0o444 for f in files)
+
+
+def test_editing_a_restored_output_drops_the_entry(run, tmp_path):
+    run("prefix", *ARGS, "--cache-dir", "cache")
+    fresh = (tmp_path / "prompts.csv").read_bytes()
+    run("prefix", *ARGS, "--cache-dir", "cache")
+    # the output is a hard link into the cache; force an append through it
+    os.chmod(tmp_path / "prompts.csv", 0o644)
+    with open(tmp_path / "prompts.csv", "a") as f:
+        f.write("extra,1\n")
+
+    result = run("prefix", *ARGS, "--cache-dir", "cache")
+    assert "was modified after it was stored" in result.stderr
+    assert "Cache hit" not in result.stdout
+    assert (tmp_path / "prompts.csv").read_bytes() == fresh
+
+
+def test_verify_drops_a_tampered_entry(run, tmp_path):
+    run("prefix", *ARGS, "--cache-dir", "cache")
+    fresh = (tmp_path / "prompts.csv").read_bytes()
+    # same size and mtime, different bytes: only the checksum can tell
+    path = next(f for f in entry_files(tmp_path / "cache") if os.path.basename(f).startswith("guidellm"))
+    st = os.stat(path)
+    os.chmod(path, 0o644)
+    with open(path, "r+b") as f:
+        f.seek(st.st_size // 2)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(b"x" if byte != b"x" else b"y")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    result = run("prefix", *ARGS, "--cache-dir", "cache", "--verify", 4)
+    assert "is stale" in result.stderr and "does not match its checksum" in result.stderr
+    assert (tmp_path / "prompts.csv").read_bytes() == fresh
+    assert "Cache hit" in run("prefix", *ARGS, "--cache-dir", "cache", "--verify", 4).stdout
+
+
+def test_least_recently_used_entries_are_evicted_by_size(tmp_path):
+    cache = DatasetCache(str(tmp_path / "cache"), max_bytes=250)
+    now = time.time()
+
+    def store(key, age):
+        path = tmp_path / f"{key}.csv"
+        path.write_bytes(b"x" * 100)
+        cache.store(key, {"prompts": str(path)})
+        meta = tmp_path / "cache" / key / "entry.json"
+        os.utime(meta, (now - age, now - age))
+
+    store("a", 100)
+    store("b", 50)
+    # a hit makes a the most recently used entry
+    assert cache.fetch("a", {"prompts": str(tmp_path / "out.csv")}) is not None
+    store("c", 0)
+    assert sorted(os.listdir(tmp_path / "cache")) == ["a", "c"]
+    assert cache.fetch("b", {"prompts": str(tmp_path / "out.csv")}) is None
@@ -0,0 +1,26 @@
+import csv
+
+import pytest
+
+from llmd_datagen.heterogeneous import HeterogeneousDataset, Ordering
+
+
+@pytest.mark.parametrize("strategy", ["modulo", "shuffle", "bursty", "adversarial"])
+def test_find_matches_rows(strategy):
+    dataset = HeterogeneousDataset(60, 20, 40, ratio=3, ordering=Ordering(strategy, 4, 0, 1.0, 8))
+    workloads = [dataset.row(i, with_prompt=False).workload for i in range(len(dataset))]
+    for start, stop in [(0, 60), (13, 41), (50, 60)]:
+        for workload in ("N", "M"):
+            expected = next((i for i in range(start, stop) if workloads[i] == workload), None)
+            assert dataset.find(workload, start, stop) == expected
+
+
+def test_sample_prompts_come_from_the_shard(run, tmp_path):
+    result = run("heterogeneous", "--total-prompts", 40, "--workload-n-words", 20, "--workload-m-words", 60,
+                 "--ratio-n-to-m", 3, "--shard", "1/2", "--output-csv", "out.csv")
+    with open(tmp_path / "out.shard-1-of-2.csv", newline="") as f:
+        rows = list(csv.DictReader(f))
+    samples = result.stdout.split("Sample prompts (first 100 chars):\n")[1].splitlines()
+    for workload, words in (("N", 20), ("M", 60)):
+        first = next(r["prompt"] for r in rows if len(r["prompt"].split()) == words)
+        assert f"Workload {workload}: {first[:100]}..." in samples
@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from conftest import load_script
+
+
+@pytest.fixture(scope="module")
+def driver():
+    return load_script("load-driver")
+
+
+@pytest.fixture(scope="module")
+def mock_server():
+    return load_script("mock-server")
+
+
+@pytest.fixture
+def prompts(run, tmp_path):
+    """16 prompts: 8 prefixes of 4 blocks, each followed 4 rows later by its prefix + continuation."""
+    run("prefix", "--num-pairs", 8, "--chunk-size", 4, "--target-prefix-words", 64,
+        "--target-continuation-words", 16, "--output-tokens", 4, "--output-guidellm-csv", "prompts.csv")
+    return str(tmp_path / "prompts.csv")
+
+
+def drive(driver, mock_server, tmp_path, server_args, driver_args):
+    """Run the driver against an in-process mock server; returns (server, summary, records per rate)."""
+    server = mock_server.Server(mock_server.parse_args(["--block-size", "16", *server_args]))
+
+    async def scenario():
+        listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            await driver.run(driver.parse_args([
+                "--target", f"http://127.0.0.1:{port}", "--output-dir", str(tmp_path / "out"), *driver_args
+            ]))
+
+    asyncio.run(scenario())
+    with open(tmp_path / "out" / "summary.json") as f:
+        summary = json.load(f)
+    records = {}
+    for s in summary["rates"]:
+        with open(tmp_path / "out" / f"requests-{s['rate']}.jsonl") as f:
+            records[s["rate"]] = [json.loads(line) for line in f]
+    return server, summary, records
+
+
+@pytest.mark.parametrize("kind", ["poisson", "gamma"])
+def test_schedule_has_the_requested_mean_rate(driver, kind):
+    offsets = driver.make_schedule(kind, 50.0, 20000, np.random.default_rng(0), burstiness=0.5)
+    assert offsets[0] == 0 and np.all(np.diff(offsets) >= 0)
+    assert len(offsets) / offsets[-1] == pytest.approx(50.0, rel=0.05)
+
+
+def test_ramp_and_trace_schedules(driver):
+    offsets = driver.make_schedule("ramp", 40.0, 5000, np.random.default_rng(0), ramp_steps=4)
+    # each step sends the same number of requests, at 10, 20, 30 and 40 per second
+    steps = np.split(offsets, 4)
+    rates = [(len(step) - 1) / (step[-1] - step[0]) for step in steps]
+    assert rates == pytest.approx([10.0, 20.0, 30.0, 40.0], rel=0.1)
+
+    trace = np.array([0.0, 1.0, 3.0, 6.0])
+    assert driver.make_schedule("trace", 2.0, 3, None, trace=trace).tolist() == [0.0, 0.5, 1.5]
+
+
+def test_open_loop_sends_on_schedule(driver, mock_server, tmp_path, prompts):
+    _, summary, records = drive(driver, mock_server, tmp_path, ["--time-scale", "0.1"],
+                                ["--data", prompts, "--rates", "20", "--max-requests", "30"])
+    rows = records["20"]
+    assert len(rows) == 30 and all(r["error"] is None for r in rows)
+    scheduled = np.array([r["scheduled"] for r in rows])
+    start = np.array([r["start"] for r in rows])
+    assert np.all(start - scheduled < 0.05)
+    assert summary["rates"][0]["queued_requests"] == 0
+    assert all(r["output_tokens"] == 4 and r["ttft"] <= r["e2e"] for r in rows)
+
+
+def test_connection_wait_is_not_in_ttft(driver, mock_server, tmp_path, prompts, capsys):
+    # 4 output tokens at 20ms each: with one connection, 10 requests sent together queue for each other
+    _, summary, records = drive(driver, mock_server, tmp_path, ["--time-scale", "1"],
+                                ["--data", prompts, "--rates", "1000", "--max-requests", "10", "--connections", "1"])
+    rows = records["1000"]
+    assert summary["rates"][0]["queued_requests"] == 9
+    assert max(r["queue_wait"] for r in rows) > 0.3
+    assert all(r["ttft"] < 0.05 for r in rows)
+    assert summary["rates"][0]["max_send_lag"] < 0.05
+    assert "waited up to" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("router, hits", [("round-robin", False), ("prefix-aware", True)])
+def test_prefix_dataset_hits_only_with_prefix_aware_routing(driver, mock_server, tmp_path, prompts, router, hits):
+    server, _, _ = drive(driver, mock_server, tmp_path, ["--instances", "3", "--router", router, "--time-scale", "0"],
+                         ["--data", prompts, "--schedule", "concurrent", "--rates", "1", "--max-requests", "16"])
+    counters = [engine.counters for engine in server.engines]
+    assert sum(c["request_success"] for c in counters) == 16
+    hit_blocks = sum(c["prefix_cache_hits"] for c in counters)
+    # every continuation repeats its 64-word prefix, 4 whole blocks
+    assert hit_blocks == (8 * 64 if hits else 0)
@@ -0,0 +1,39 @@
+import json
+import math
+import os
+
+import pytest
+
+from conftest import FIXTURES, load_script
+
+SCRAPES = os.path.join(FIXTURES, "metrics")
+
+
+@pytest.mark.parametrize("scrapes, verdict", [
+    ("idle", "idle"),
+    ("queue-bound", "queue-bound"),
+    ("memory-bound", "memory-bound"),
+    ("compute-bound-prefill", "compute-bound prefill"),
+    ("ok", "ok"),
+])
+def test_recorded_scrapes_get_their_verdict(run, tmp_path, scrapes, verdict):
+    run("metrics-sampler", os.path.join(SCRAPES, scrapes), "--count", 3, "--interval", 0.01, "--tier", 8,
+        "--output", "samples.jsonl", "--output-json", "diagnosis.json")
+    with open(tmp_path / "diagnosis.json") as f:
+        report = json.load(f)
+    assert report["8"]["samples"] == 3
+    assert report["8"]["verdict"] == verdict
+    # every non-idle recording keeps 8 requests in flight, so nothing points upstream
+    assert not any("upstream" in note for note in report["8"]["notes"])
+
+
+@pytest.mark.filterwarnings("error")
+def test_diagnosis_without_samples(run, tmp_path):
+    sampler = load_script("metrics-sampler")
+    samples = tmp_path / "samples.jsonl"
+    samples.write_text(json.dumps({"version": 1, "interval": 0.25, "targets": ["pod"],
+                                   "columns": list(sampler.COLUMNS)}) + "\n")
+    report = sampler.diagnose(str(samples), sampler.parse_diagnose_args([str(samples)]))
+    assert report["all"]["samples"] == 0
+    assert report["all"]["verdict"] == "no samples"
+    assert math.isnan(report["all"]["inflight_mean"])
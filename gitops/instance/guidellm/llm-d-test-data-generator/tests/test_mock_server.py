@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from conftest import load_script
+
+
+@pytest.fixture(scope="module")
+def mock_server():
+    return load_script("mock-server")
+
+
+def words(prefix, n):
+    return " ".join(f"{prefix}{i}" for i in range(n))
+
+
+def test_running_requests_and_prefix_cache_share_the_kv_capacity(mock_server):
+    args = mock_server.parse_args(["--kv-cache-tokens", "64", "--block-size", "4", "--time-scale", "0"])
+    engine = mock_server.Engine(0, args)
+
+    async def scenario():
+        # 40 prompt words fill 10 blocks, which stay cached after the request
+        async for _ in engine.generate(words("a", 40), 4):
+            pass
+        assert len(engine.cache.blocks) == 10 and engine.held_blocks == 0
+
+        # 8 prompt words and 40 output tokens take 12 of the 16 blocks, evicting cached ones;
+        # after prefill the 2 prompt blocks move to the prefix cache
+        seen = []
+        async for _ in engine.generate(words("b", 8), 40):
+            seen.append((len(engine.cache.blocks), engine.held_blocks))
+        assert all(cached + held <= 16 for cached, held in seen)
+        assert max(held for _, held in seen) == 10
+        assert engine.held_blocks == 0
+
+        # the second prompt is still cached, so repeating it hits both blocks
+        async for _ in engine.generate(words("b", 8), 1):
+            pass
+        return engine.counters
+
+    counters = asyncio.run(scenario())
+    assert counters["prefix_cache_hits"] == 8
+    assert counters["request_success"] == 3
+
+
+def test_concurrent_requests_never_overcommit_the_kv_cache(mock_server):
+    # each request needs 90 of the 100 blocks, so the second must wait for the first to finish
+    args = mock_server.parse_args(["--kv-cache-tokens", "1600", "--block-size", "16", "--time-scale", "0"])
+    engine = mock_server.Engine(0, args)
+    seen = []
+
+    async def request(prefix):
+        async for _ in engine.generate(words(prefix, 1280), 160):
+            seen.append((engine.used_blocks, engine.metrics()["vllm:gpu_cache_usage_perc"][1], engine.running))
+
+    async def scenario():
+        await asyncio.gather(request("a"), request("b"), request("a"))
+
+    asyncio.run(scenario())
+    assert all(used <= engine.capacity and usage <= 1.0 for used, usage, _ in seen)
+    assert max(running for _, _, running in seen) == 1
+    assert engine.used_blocks == 0 and not engine.cache.pinned
+    assert engine.counters["request_success"] == 3
+
+
+def test_pinned_blocks_are_not_evicted():
+    from prefix_cache import PrefixCache
+
+    cache = PrefixCache(4)
+    cache.admit([1, 2, 3], 0)
+    cache.pin([1, 2])
+    cache.admit([7, 8], 0)
+    # 3 is the least recently used block that is not pinned
+    assert set(cache.blocks) == {1, 2, 7, 8}
+    cache.unpin([1, 2])
+    cache.resize(2)
+    assert set(cache.blocks) == {7, 8} and not cache.pinned
@@ -0,0 +1,53 @@
+"""Byte-for-byte parity: --legacy-random against the original scripts, --workers against a serial run.
+
+fixtures/legacy holds the output of the generators as they were before
+--legacy-random existed, for the arguments below.
+"""
+import os
+
+import pytest
+
+from conftest import FIXTURES
+
+PREFIX_ARGS = [
+    "--num-pairs", 7, "--chunk-size", 3, "--target-prefix-words", 120,
+    "--target-continuation-words", 30, "--start-index", 4, "--output-tokens", 17,
+]
+HETEROGENEOUS_ARGS = [
+    "--total-prompts", 11, "--workload-n-words", 40, "--workload-m-words", 150, "--ratio-n-to-m", 3,
+    "--output-tokens", 19, "--seed", 7, "--start-index", 2,
+]
+
+
+def fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURES, "legacy", name), "rb") as f:
+        return f.read()
+
+
+def test_prefix_legacy_matches_original(run, tmp_path):
+    run("prefix", *PREFIX_ARGS, "--legacy-random",
+        "--output-prefix-csv", "pairs.csv", "--output-guidellm-csv", "prompts.csv")
+    assert (tmp_path / "pairs.csv").read_bytes() == fixture("prefix-pairs.csv")
+    assert (tmp_path / "prompts.csv").read_bytes() == fixture("prefix-prompts.csv")
+
+
+def test_heterogeneous_legacy_matches_original(run, tmp_path):
+    run("heterogeneous", *HETEROGENEOUS_ARGS, "--legacy-random", "--output-csv", "prompts.csv")
+    assert (tmp_path / "prompts.csv").read_bytes() == fixture("heterogeneous-prompts.csv")
+
+
+@pytest.mark.parametrize("legacy", [[], ["--legacy-random"]])
+def test_prefix_workers_match_serial(run, tmp_path, legacy):
+    args = PREFIX_ARGS + ["--num-pairs", 40] + legacy
+    run("prefix", *args, "--output-prefix-csv", "p1.csv", "--output-guidellm-csv", "g1.csv")
+    run("prefix", *args, "--workers", 3, "--output-prefix-csv", "p3.csv", "--output-guidellm-csv", "g3.csv")
+    assert (tmp_path / "p1.csv").read_bytes() == (tmp_path / "p3.csv").read_bytes()
+    assert (tmp_path / "g1.csv").read_bytes() == (tmp_path / "g3.csv").read_bytes()
+
+
+@pytest.mark.parametrize("legacy", [[], ["--legacy-random"]])
+def test_heterogeneous_workers_match_serial(run, tmp_path, legacy):
+    args = HETEROGENEOUS_ARGS + ["--total-prompts", 600] + legacy
+    run("heterogeneous", *args, "--output-csv", "h1.csv")
+    run("heterogeneous", *args, "--workers", 3, "--output-csv", "h3.csv")
+    assert (tmp_path / "h1.csv").read_bytes() == (tmp_path / "h3.csv").read_bytes()
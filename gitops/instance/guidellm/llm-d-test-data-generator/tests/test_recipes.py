@@ -0,0 +1,57 @@
+import json
+import shutil
+
+from conftest import ROOT
+from llmd_datagen.common import recipe_id
+
+SPEC_DIR = f"{ROOT}/heterogeneous"
+
+
+def spec_files(tmp_path):
+    for name in ("workload-spec-example.yaml", "osl-histogram-example.csv"):
+        shutil.copy(f"{SPEC_DIR}/{name}", tmp_path / name)
+
+
+def edit_recipe(path, **fields):
+    recipe = json.loads(path.read_text())
+    recipe.update(fields)
+    recipe["id"] = recipe_id(recipe)
+    path.write_text(json.dumps(recipe))
+
+
+def test_prefix_recipe_materializes_to_the_same_rows(run, tmp_path):
+    run("prefix", "--num-pairs", 12, "--chunk-size", 4, "--target-prefix-words", 80,
+        "--target-continuation-words", 20, "--output-guidellm-csv", "prompts.csv", "--output-recipe", "r.json")
+    run("prefix", "materialize", "r.json", "--output-csv", "again.jsonl")
+    run("prefix", "materialize", "r.json", "--output-csv", "again.csv")
+    assert (tmp_path / "again.csv").read_bytes() == (tmp_path / "prompts.csv").read_bytes()
+
+
+def test_heterogeneous_recipe_covers_the_spec_histograms(run, tmp_path):
+    spec_files(tmp_path)
+    spec = ["--workload-spec", "workload-spec-example.yaml"]
+    run("heterogeneous", "--total-prompts", 30, *spec, "--output-csv", "mixed.csv", "--output-recipe", "r.json")
+    run("heterogeneous", "materialize", "r.json", *spec, "--output-csv", "again.csv")
+    assert (tmp_path / "again.csv").read_bytes() == (tmp_path / "mixed.csv").read_bytes()
+
+    with open(tmp_path / "osl-histogram-example.csv", "a") as f:
+        f.write("1024,50\n")
+    result = run("heterogeneous", "materialize", "r.json", *spec, "--output-csv", "changed.csv", check=False)
+    assert result.returncode and "histograms it references" in result.stderr
+    assert not (tmp_path / "changed.csv").exists()
+
+
+def test_recipe_from_another_numpy_is_refused(run, tmp_path):
+    run("heterogeneous", "--total-prompts", 8, "--output-csv", "p.csv", "--output-recipe", "r.json")
+    recipe = json.loads((tmp_path / "r.json").read_text())
+    assert recipe["numpy_version"]
+
+    edit_recipe(tmp_path / "r.json", numpy_version="1.0.0")
+    result = run("heterogeneous", "materialize", "r.json", "--output-csv", "again.csv", check=False)
+    assert result.returncode and "NumPy 1.0.0" in result.stderr
+
+    # recipes written before the field existed still materialize
+    del recipe["numpy_version"]
+    recipe["id"] = recipe_id(recipe)
+    (tmp_path / "r.json").write_text(json.dumps(recipe))
+    run("heterogeneous", "materialize", "r.json", "--output-csv", "again.csv")
@@ -0,0 +1,30 @@
+import os
+
+ARGS = ["--total-prompts", 40, "--workload-n-words", 30, "--workload-m-words", 90, "--seed", 3]
+
+
+def truncate(path, keep):
+    """Cut path to its first keep bytes, as an interrupted run would leave it."""
+    with open(path, "r+b") as f:
+        f.truncate(keep)
+
+
+def test_resume_completes_an_interrupted_run(run, tmp_path):
+    run("heterogeneous", *ARGS, "--output-csv", "full.csv")
+    run("heterogeneous", *ARGS, "--output-csv", "part.csv")
+    truncate(tmp_path / "part.csv", os.path.getsize(tmp_path / "part.csv") // 2)
+    result = run("heterogeneous", *ARGS, "--output-csv", "part.csv", "--resume")
+    assert "Resuming after" in result.stdout
+    assert (tmp_path / "part.csv").read_bytes() == (tmp_path / "full.csv").read_bytes()
+
+
+def test_resume_refuses_rows_made_with_other_options(run, tmp_path):
+    run("heterogeneous", *ARGS, "--output-csv", "part.csv")
+    truncate(tmp_path / "part.csv", 2000)
+    result = run("heterogeneous", *ARGS[:-1], 4, "--output-csv", "part.csv", "--resume", check=False)
+    assert result.returncode and "different seed" in result.stderr
+    assert os.path.getsize(tmp_path / "part.csv") == 2000
+
+    os.remove(tmp_path / "part.csv.params.json")
+    result = run("heterogeneous", *ARGS, "--output-csv", "part.csv", "--resume", check=False)
+    assert result.returncode and "params.json is missing" in result.stderr
@@ -0,0 +1,61 @@
+import json
+
+import numpy as np
+import pytest
+
+from conftest import load_script
+
+PREFIX_ARGS = ["--num-pairs", 60, "--chunk-size", 10, "--target-prefix-words", 200,
+               "--target-continuation-words", 40, "--output-guidellm-csv", "prompts.csv"]
+
+
+@pytest.fixture(scope="module")
+def simulator():
+    return load_script("simulator")
+
+
+def test_word_chain_shares_exactly_the_common_blocks(simulator):
+    words = [f"w{i}" for i in range(64)]
+    base = simulator.word_chain(" ".join(words), 4)
+    assert len(base) == 16
+    for k in (0, 1, 7, 15):
+        changed = words[:4 * k + 2] + ["other"] + words[4 * k + 3:]
+        chain = simulator.word_chain(" ".join(changed), 4)
+        assert list(chain[:k]) == list(base[:k])
+        assert not np.isin(chain[k:], base).any()
+    # a trailing partial block is not hashed
+    assert list(simulator.word_chain(" ".join(words[:63]), 4)) == list(base[:15])
+
+
+def test_replica_evicts_least_recently_used_tails_first(simulator):
+    replica = simulator.Replica(4)
+    replica.admit([1, 2, 3, 4], 0)
+    replica.admit([1, 2, 5, 6], 2)
+    # 4 and 3 were least recently used; a prompt's leading blocks are the most recent
+    assert list(replica.blocks) == [6, 5, 2, 1]
+    replica.admit([7, 8, 9], 0)
+    assert list(replica.blocks) == [1, 9, 8, 7]
+    assert replica.match([1, 2, 5, 6]) == 1
+
+
+def test_default_cache_is_sized_from_the_input(run, tmp_path):
+    run("prefix", *PREFIX_ARGS)
+    result = run("simulator", "prompts.csv", "--output-json", "sized.json")
+    assert "--cache-tokens sized from the input" in result.stdout
+    sized = json.loads((tmp_path / "sized.json").read_text())
+    hits = {r["policy"]: r["hit_rate"] for r in sized["results"]}
+    assert hits["prefix-affinity"] > 0.4
+
+    result = run("simulator", "prompts.csv", "--cache-tokens", 200, "--output-json", "small.json")
+    assert "Warning" in result.stderr
+    small = json.loads((tmp_path / "small.json").read_text())
+    assert all(r["hit_rate"] < hits[r["policy"]] for r in small["results"] if hits[r["policy"]])
+
+
+def test_workers_give_identical_results(run, tmp_path):
+    run("prefix", *PREFIX_ARGS)
+    run("simulator", "prompts.csv", "--output-json", "serial.json")
+    run("simulator", "prompts.csv", "--workers", 3, "--output-json", "parallel.json")
+    serial = json.loads((tmp_path / "serial.json").read_text())
+    parallel = json.loads((tmp_path / "parallel.json").read_text())
+    assert serial["results"] == parallel["results"]
@@ -0,0 +1,56 @@
+import csv
+
+import pytest
+
+tokenizers = pytest.importorskip("tokenizers")
+
+from llmd_datagen.heterogeneous import BASE_SENTENCES  # noqa: E402
+from llmd_datagen.prefix import FILLER_SENTENCES, make_base_continuation, make_base_prefix  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def tokenizer(tmp_path_factory):
+    """A small byte-level BPE tokenizer.json (splitting on whitespace before merging, like Qwen or Llama)."""
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers, trainers
+
+    tokenizer = Tokenizer(models.BPE())
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = decoders.ByteLevel()
+    trainer = trainers.BpeTrainer(vocab_size=600, initial_alphabet=pre_tokenizers.ByteLevel.alphabet())
+    tokenizer.train_from_iterator(
+        [make_base_prefix(), make_base_continuation(), *FILLER_SENTENCES, *BASE_SENTENCES], trainer
+    )
+    path = tmp_path_factory.mktemp("tokenizer") / "tokenizer.json"
+    tokenizer.save(str(path))
+    return Tokenizer.from_file(str(path)), str(path)
+
+
+def read_rows(path):
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def count(tokenizer, text):
+    return len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+def test_prefix_rows_have_the_target_token_counts(run, tmp_path, tokenizer):
+    tok, path = tokenizer
+    run("prefix", "--num-pairs", 12, "--chunk-size", 4, "--target-prefix-words", 150,
+        "--target-continuation-words", 40, "--target-unit", "tokens", "--tokenizer", path)
+    rows = read_rows(tmp_path / "prefix-prompts.csv")
+    assert len(rows) == 24
+    for row in rows:
+        assert count(tok, row["prompt"]) == int(row["prompt_tokens"])
+    assert sorted({int(row["prompt_tokens"]) for row in rows}) == [150, 190]
+
+
+def test_heterogeneous_rows_have_the_target_token_counts(run, tmp_path, tokenizer):
+    tok, path = tokenizer
+    run("heterogeneous", "--total-prompts", 40, "--workload-n-words", 60, "--workload-m-words", 300,
+        "--target-unit", "tokens", "--tokenizer", path, "--output-csv", "prompts.csv")
+    rows = read_rows(tmp_path / "prompts.csv")
+    assert len(rows) == 40
+    for row in rows:
+        assert count(tok, row["prompt"]) == int(row["prompt_tokens"])
+    assert sorted({int(row["prompt_tokens"]) for row in rows}) == [60, 300]
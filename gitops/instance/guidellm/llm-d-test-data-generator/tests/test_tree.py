@@ -0,0 +1,71 @@
+import csv
+import itertools
+import os
+
+import pytest
+
+from llmd_datagen.prefix import TreeWorkload, parse_tree_args
+
+ARGS = ["--conversations", 12, "--system-prompts", 2, "--system-words", 20, "--documents", 3,
+        "--document-words", 40, "--turn-words", 10, "--active-conversations", 4, "--shared-fraction", 0.6]
+
+
+def common_words(a: str, b: str) -> int:
+    """Number of leading words a and b share."""
+    return sum(1 for _ in itertools.takewhile(lambda pair: pair[0] == pair[1], zip(a.split(), b.split())))
+
+
+def labels(depth, branching):
+    """Every turn label of one conversation tree."""
+    level = ["1"]
+    out = []
+    for _ in range(depth):
+        out += level
+        level = [f"{label}.{b}" for label in level for b in range(1, branching + 1)]
+    return out
+
+
+@pytest.mark.parametrize("depth, branching", [(1, 1), (4, 1), (3, 2), (2, 3)])
+def test_row_count_follows_depth_and_branching(run, tmp_path, depth, branching):
+    run("prefix", "tree", *ARGS, "--depth", depth, "--branching", branching, "--output-csv", "tree.csv")
+    with open(tmp_path / "tree.csv", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 12 * sum(branching ** t for t in range(depth))
+    for c in range(12):
+        turns = [r["turn"] for r in rows if r["conversation_id"] == str(c)]
+        assert sorted(turns) == sorted(labels(depth, branching))
+        # a turn always comes after the turn it follows up on
+        assert all(turns.index(t.rsplit(".", 1)[0]) < turns.index(t) for t in turns if "." in t)
+
+
+def test_rows_share_exactly_their_common_node_as_prefix():
+    args = parse_tree_args([str(a) for a in ARGS] + ["--depth", "3", "--branching", "2"])
+    workload = TreeWorkload(args)
+    rows = {(c, label): (prompt, words) for c, label, prompt, words, _ in workload}
+    context_words = args.system_words + args.document_words
+
+    for (c, label), (prompt, words) in rows.items():
+        assert len(prompt.split()) == words == context_words + args.turn_words * (label.count(".") + 1)
+        if "." in label:
+            parent, _ = rows[c, label.rsplit(".", 1)[0]]
+            assert prompt.startswith(parent + " ")
+
+    for (c, a), (d, b) in itertools.combinations(rows, 2):
+        if c != d or a.startswith(b + ".") or b.startswith(a + "."):
+            continue
+        # turns of one conversation share the text of their deepest common turn, plus part of the
+        # fixed intro of the next turn, but no more of that turn
+        shared = rows[c, ".".join(os.path.commonprefix([a.split("."), b.split(".")]))][1]
+        assert shared <= common_words(rows[c, a][0], rows[d, b][0]) < shared + args.turn_words
+
+    contexts = {c: workload.context(c) for c in range(args.conversations)}
+    assert len(set(contexts.values())) < args.conversations  # some conversations share a context
+    for c, d in itertools.combinations(contexts, 2):
+        (_, sys_c, doc_c), (_, sys_d, doc_d) = contexts[c], contexts[d]
+        shared = common_words(rows[c, "1"][0], rows[d, "1"][0])
+        if sys_c is not None and (sys_c, doc_c) == (sys_d, doc_d):
+            assert context_words <= shared < context_words + args.turn_words
+        elif sys_c is not None and sys_c == sys_d:
+            assert args.system_words <= shared < context_words
+        else:
+            assert shared < args.system_words